@@ -1,27 +1,49 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, send_file  # ✅ Added send_file
+import atexit
+import time
+import math
+APP_IMPORT_STARTED = time.perf_counter()
+
+from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, send_file, Response, stream_with_context  # ✅ Added send_file
 from werkzeug.utils import secure_filename
 import os
 import numpy as np
-from tensorflow.keras.models import load_model
-from tensorflow.keras.preprocessing import image
 from datetime import datetime
 import uuid
 import requests
 import json
 
 #----------------------------------------------new-----------------------------------------------------
-import whisper
-import speech_recognition as sr
-from pydub import AudioSegment
+# TensorFlow, transformers (Whisper), pyttsx3/gTTS and pygame are imported lazily - see lazy_loader.py
 import io
-import pyttsx3
-from gtts import gTTS
-import pygame
 import tempfile
 import shutil
 import os
-from transformers import pipeline
+from collections import deque
 from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+import zipfile
+import re
+
+from config import Config
+from asr_pool import ASRWorkerPool
+from audio_store import AudioStore
+from audio_frontend import AudioDecodeError, SAMPLE_RATE, VoiceActivityGate, decode_audio, split_at_pauses
+from embeddings import HashingEmbedder
+from inference import BatchInferenceEngine
+from knowledge_index import KnowledgeIndex, disease_passages, document_passages
+from labels import FAILED as LABELS_FAILED, RELOADED as LABELS_RELOADED, LabelIndex, file_digest
+from llm_client import LLMBusyError, LLMClient, LLMStatusError, LLMUnavailableError
+from llm_health import LLMHealthMonitor
+from lazy_loader import LazyResource, warm_up, startup_report
+from model_host import ModelHostClient, RemoteModel, RemoteASR, load_local_classifier, load_local_asr
+from prediction_cache import PredictionCache
+from response_cache import ResponseCache
+from sensor_archive import SensorArchive
+from sensor_store import SENSOR_METRICS, SensorStore, SensorValidationError, auto_resolution, parse_duration
+from sensor_alerts import SensorAlertEngine
+from sensor_stream import SensorBroadcaster, SensorPeers
+from tts_service import TTSService
+from preprocessing import decode_image, image_to_tensor, get_image_buffer, thumbnail_data_uri
 
 #----------------------------------------------new-----------------------------------------------------
 
@@ -41,29 +63,71 @@ app.config['MAX_CONTENT_LENGTH'] = MAX_FILE_SIZE
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
 # LLM Configuration
-OLLAMA_URL = "http://127.0.0.1:11434/api/generate"
+OLLAMA_URL = Config.OLLAMA_URL
 MODEL_NAME = "mistral"
-LLM_AVAILABLE = False
 
-# Test LLM availability
-def test_llm_connection():
-    try:
-        response = requests.get("http://127.0.0.1:11434/api/version", timeout=5)
-        return response.status_code == 200
-    except:
-        return False
-
-LLM_AVAILABLE = test_llm_connection()
-print(f"🤖 LLM Status: {'Available' if LLM_AVAILABLE else 'Offline - Using Database Only'}")
-
-# Load ML model
-print("Loading AI model...")
-try:
-    model = load_model('model/plant_disease_model.h5')
-    print("✅ Model loaded successfully!")
-except Exception as e:
-    print(f"❌ Error loading model: {e}")
-    model = None
+# One keep-alive pool and concurrency limit per Ollama server, shared by every chat path
+llm_client = LLMClient(
+    pool_size=Config.LLM_POOL_SIZE,
+    max_concurrency=Config.LLM_MAX_CONCURRENCY,
+    max_queue=Config.LLM_MAX_QUEUE,
+    queue_timeout=Config.LLM_QUEUE_TIMEOUT,
+    read_timeout=Config.LLM_READ_TIMEOUT,
+    failure_threshold=Config.LLM_BREAKER_FAILURES,
+    reset_timeout=Config.LLM_BREAKER_RESET_SECONDS,
+)
+
+# Answers to repeated /chat questions about the same disease
+chat_cache = ResponseCache(
+    max_entries=Config.CHAT_CACHE_SIZE,
+    ttl_seconds=Config.CHAT_CACHE_TTL,
+    disk_path=Config.CHAT_CACHE_PATH,
+    embed=HashingEmbedder(),
+    similarity=Config.CHAT_CACHE_SIMILARITY,
+    namespace=f"{MODEL_NAME}@rag",  # answers from the retrieval-grounded prompt
+)
+
+# LLM availability: background probes + per-endpoint circuit breakers (started at the bottom of this file)
+llm_monitor = LLMHealthMonitor(llm_client, interval=Config.LLM_HEALTH_INTERVAL,
+                               probe_timeout=Config.LLM_PROBE_TIMEOUT)
+
+def llm_available():
+    """Whether the chat model's circuit is closed (no I/O)"""
+    return llm_client.endpoint(OLLAMA_URL).breaker.state == 'closed'
+
+# Shared model host (see model_host.py); None means each worker loads its own models
+model_host_client = ModelHostClient(Config.MODEL_HOST_ADDRESS) if Config.MODEL_HOST_ADDRESS else None
+
+# ML model - loaded on first /detect (or at startup via WARMUP_SUBSYSTEMS)
+def load_classifier(res):
+    if model_host_client is not None:
+        with res.phase('connect'):
+            model_host_client.call('ping')
+        return RemoteModel(model_host_client)
+    return load_local_classifier(res)
+
+classifier = LazyResource('classifier', load_classifier)
+
+def get_model():
+    """Loaded Keras model, or None if it failed to load"""
+    return classifier.get()
+
+# Batch concurrent /detect requests into a single forward pass
+inference_engine = BatchInferenceEngine(
+    lambda batch: get_model().predict(batch, verbose=0),
+    max_batch_size=Config.INFERENCE_MAX_BATCH_SIZE,
+    max_wait_ms=Config.INFERENCE_MAX_WAIT_MS
+)
+
+# Skip the forward pass for photos we have already classified
+prediction_cache = PredictionCache(
+    max_entries=Config.PREDICTION_CACHE_SIZE,
+    ttl_seconds=Config.PREDICTION_CACHE_TTL,
+    disk_path=Config.PREDICTION_CACHE_PATH,
+    phash_max_distance=Config.PREDICTION_CACHE_PHASH_DISTANCE,
+    # Content hash, not a per-process counter, so workers sharing the disk tier agree on it
+    namespace=f"{Config.MODEL_PATH}@{file_digest(Config.CLASS_INDICES_PATH)}"
+)
 
 # Enhanced disease information with step-by-step instructions
 disease_info = {
@@ -668,36 +732,47 @@ disease_info = {
     }
 }
 
-# Your disease classes (from your working model)
+# Disease database keys; the model's output order comes from the label index below
 classes = list(disease_info.keys())
 
 
+def load_knowledge_index(res):
+    with res.phase('passages'):
+        passages = list(disease_passages(disease_info)) + list(document_passages(Config.KNOWLEDGE_DIR))
+    with res.phase('embed'):
+        return KnowledgeIndex(passages, HashingEmbedder())
+
+knowledge_index = LazyResource('knowledge_index', load_knowledge_index)
+
+def retrieve_notes(question, disease_name=None):
+    """Most relevant disease_info / agronomy passages for a question, as prompt lines"""
+    index = knowledge_index.get()
+    if index is None:
+        return None
+    hits = index.search(question, k=Config.RAG_TOP_K, disease=disease_name)
+    return '\n'.join(f"- {passage.text}" for passage, _ in hits)
+
 def query_llm(prompt, context_data):
     """Query LLM for enhanced agricultural advice"""
-    if not LLM_AVAILABLE:
-        return "LLM service not available. Showing database recommendations only."
-    
     try:
-        # Create expert agricultural prompt
-        expert_prompt = f"""
-        You are an expert agricultural consultant helping Indian farmers. 
-        
-        Context:
-        - Detected Disease: {context_data.get('disease_name', 'Unknown')}
-        - Current Treatment: {context_data.get('treatment', 'Unknown')}
-        - Pesticide: {context_data.get('pesticide', 'Unknown')}
-        - Cost: {context_data.get('cost', 'Unknown')}
+        disease_name = context_data.get('disease_name')
+        notes = retrieve_notes(prompt, disease_name)
+        if notes is None:
+            notes = (f"- Treatment: {context_data.get('treatment', 'Unknown')}. "
+                     f"Pesticide: {context_data.get('pesticide', 'Unknown')}. Cost: {context_data.get('cost', 'Unknown')}")
         
-        Farmer's Question: {prompt}
-        
-        Provide a helpful, practical response focusing on:
-        1. Direct answer to their question
-        2. Safety considerations
-        3. Cost-effective alternatives if relevant
-        4. Prevention tips for Indian farming conditions
-        
-        Keep response concise and actionable (max 200 words).
-        """
+        # Short prompt grounded in our own database rather than the model's memory
+        expert_prompt = f"""You are an agricultural advisor helping Indian farmers.
+Answer from the notes below; do not contradict their dosages, steps, timing or safety advice.
+If the notes do not cover the question, give brief general advice and say so.
+
+Detected disease: {disease_name or 'Unknown'}
+Notes:
+{notes}
+
+Farmer's question: {prompt}
+
+Answer in at most 120 words."""
         
         payload = {
             "model": MODEL_NAME,
@@ -705,18 +780,23 @@ def query_llm(prompt, context_data):
             "stream": False,
             "options": {
                 "temperature": 0.7,
-                "max_tokens": 200
+                "max_tokens": 200,
+                "num_predict": Config.RAG_MAX_TOKENS
             }
         }
         
-        response = requests.post(OLLAMA_URL, json=payload, timeout=100)
-        
-        if response.status_code == 200:
-            result = response.json()
-            return result.get("response", "Unable to generate response")
-        else:
-            return f"LLM service error (Status: {response.status_code})"
+        result = llm_client.generate(OLLAMA_URL, payload)
+        if not result.get("response"):
+            return "Unable to generate response"
+        chat_cache.put(context_data, prompt, result["response"])
+        return result["response"]
             
+    except LLMStatusError as e:
+        return str(e)
+    except LLMUnavailableError:
+        return "LLM service not available. Showing database recommendations only."
+    except LLMBusyError:
+        return "LLM service is busy. Please try again in a moment."
     except requests.exceptions.Timeout:
         return "LLM service timeout. Please try again later."
     except requests.exceptions.ConnectionError:
@@ -727,16 +807,28 @@ def query_llm(prompt, context_data):
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def preprocess_image(image_path, target_size=(224, 224)):
+def preprocess_image(image_source, target_size=(224, 224), out=None):
+    """Decode a path, file object or raw bytes straight into a (1, H, W, 3) float32 tensor"""
     try:
-        img_tensor = image.load_img(image_path, target_size=target_size)
-        img_tensor = image.img_to_array(img_tensor) / 255.0
-        img_tensor = np.expand_dims(img_tensor, axis=0)
-        return img_tensor
+        img = decode_image(image_source, target_size)
+        return image_to_tensor(img, out=out)
     except Exception as e:
         print(f"Error preprocessing image: {e}")
         return None
 
+# Background writer for the optional copy of each upload
+upload_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='upload-writer')
+
+def persist_upload(filename, data):
+    """Write upload bytes to UPLOAD_FOLDER off the request thread"""
+    def write():
+        try:
+            with open(os.path.join(app.config['UPLOAD_FOLDER'], filename), 'wb') as f:
+                f.write(data)
+        except OSError as e:
+            print(f"Error saving upload {filename}: {e}")
+    return upload_writer.submit(write)
+
 def get_disease_info(disease_name):
     return disease_info.get(disease_name, {
         'pesticide': 'Consult agricultural expert',
@@ -749,6 +841,52 @@ def get_disease_info(disease_name):
         'safety': 'Follow expert guidance',
         'youtube_videos': [{"title": "General Plant Care", "url": "https://www.youtube.com/results?search_query=plant+disease+management"}]
     })
+
+def on_labels_reloaded(table):
+    """A retrained model was deployed: reload it and forget old predictions"""
+    classifier.reset()
+    if model_host_client is not None:
+        try:
+            model_host_client.call('reload', label_index.digest)
+        except RuntimeError as e:
+            print(f"❌ Could not ask the model host to reload: {e}")
+    prediction_cache.clear(namespace=f"{Config.MODEL_PATH}@{label_index.digest}", disk=False)
+
+# Model output index -> disease record, validated against class_indices.txt at startup.
+# Display names and info are built once here instead of per request.
+label_index = LabelIndex(
+    Config.CLASS_INDICES_PATH,
+    classes,
+    get_disease_info,
+    on_reload=on_labels_reloaded,
+    check_interval=Config.LABEL_RELOAD_INTERVAL
+)
+
+def format_prediction(pred):
+    """Turn a class-probability vector into the disease result shown to farmers"""
+    ranked = label_index.table.top_k(pred, k=Config.TOP_K, temperature=Config.CALIBRATION_TEMPERATURE)
+    entry, probability = ranked[0]
+    margin = probability - ranked[1][1] if len(ranked) > 1 else probability
+    disease_data = entry.info
+
+    return {
+        'disease_name': entry.display_name,
+        'confidence': round(probability * 100, 2),
+        'top_k': [
+            {'disease_name': e.display_name, 'confidence': round(p * 100, 2)}
+            for e, p in ranked
+        ],
+        'uncertain': probability < Config.UNCERTAIN_CONFIDENCE or margin < Config.UNCERTAIN_MARGIN,
+        'treatment': disease_data['treatment'],
+        'prevention': disease_data['prevention'],
+        'pesticide': disease_data['pesticide'],
+        'dosage': disease_data['dosage'],
+        'cost': disease_data['cost'],
+        'steps': disease_data['steps'],
+        'timing': disease_data['timing'],
+        'safety': disease_data['safety'],
+        'youtube_videos': disease_data['youtube_videos']
+    }
 #------------------------------------------------------------------------------------------------------
 
 import requests
@@ -773,93 +911,68 @@ requests.adapters.HTTPAdapter.send = patched_send
 
 
 #----------------------------------------------new-----------------------------------------------------
-# Load Whisper model (supports 99+ languages including Tamil)
-whisper_asr = pipeline(
-    "automatic-speech-recognition",
-    model="openai/whisper-base",
-    framework="pt"   # ✅ important
+# Whisper model (supports 99+ languages including Tamil) - loaded on first voice query
+def load_whisper_asr(res):
+    if model_host_client is not None:
+        return RemoteASR(model_host_client)
+    return load_local_asr(res)
+
+whisper_loader = LazyResource('whisper_asr', load_whisper_asr)
+
+def get_whisper_asr():
+    asr = whisper_loader.get()
+    if asr is None:
+        raise RuntimeError(f"Whisper ASR not available: {whisper_loader.error}")
+    return asr
+
+# Silent / near-silent recordings never reach Whisper
+vad_gate = VoiceActivityGate(
+    energy_threshold=Config.VAD_ENERGY_THRESHOLD,
+    min_speech_seconds=Config.VAD_MIN_SPEECH_SECONDS
 )
 
+# All transcription goes through one queue that batches concurrent utterances
+asr_pool = ASRWorkerPool(
+    get_whisper_asr,
+    max_batch_size=Config.ASR_MAX_BATCH_SIZE,
+    max_wait_ms=Config.ASR_MAX_WAIT_MS,
+    workers=Config.ASR_WORKERS
+)
 
-def transcribe_audio(audio_file):
-    """Convert speech to text using Whisper with comprehensive error handling"""
-    print(f"🎤 Starting transcription for: {audio_file}")
-    
+
+def transcribe_audio(audio):
+    """Convert speech to text using Whisper; audio is the uploaded bytes or a 16 kHz float32 array"""
     try:
-        # Check if file exists and has content
-        if not os.path.exists(audio_file):
-            print(f"❌ File not found: {audio_file}")
-            return None
-        
-        file_size = os.path.getsize(audio_file)
-        print(f"📁 Audio file size: {file_size} bytes")
-        
-        if file_size == 0:
-            print("❌ Empty audio file")
+        if isinstance(audio, (bytes, bytearray)):
+            print(f"📁 Audio size: {len(audio)} bytes")
+            audio = decode_audio(bytes(audio))
+
+        audio, vad = vad_gate.check(audio)
+        print(f"🎵 Audio duration: {vad['duration']:.2f}s, {vad['asr_seconds']:.2f}s sent to Whisper (VAD {vad['gate_ms']:.3f} ms)")
+
+        if audio is None:
+            print(f"❌ No speech detected ({vad['rejected']}) - skipping Whisper")
             return None
-        
-        # Try direct transcription first
-        print("🔄 Attempting direct Whisper transcription...")
-        result = whisper_asr(audio_file)
-        
+
+        result = asr_pool.transcribe({'raw': audio, 'sampling_rate': SAMPLE_RATE})
         print(f"✅ Raw Whisper result: {result}")
-        
+
         if result and 'text' in result and result['text'].strip():
             transcribed_text = result['text'].strip()
             print(f"✅ Transcription successful: '{transcribed_text}'")
-            
+
             return {
                 'text': transcribed_text,
                 'language': detect_language(transcribed_text),
                 'confidence': 0.85
             }
-        else:
-            print("❌ Whisper returned empty or invalid result")
-            
-            # Try with audio preprocessing
-            print("🔄 Trying with audio preprocessing...")
-            try:
-                import librosa
-                import soundfile as sf
-                
-                # Load and preprocess audio
-                audio_data, sr = librosa.load(audio_file, sr=16000)
-                duration = len(audio_data) / sr
-                print(f"🎵 Audio duration: {duration:.2f} seconds, sample rate: {sr}")
-                
-                if duration < 0.5:
-                    print("❌ Audio too short (< 0.5 seconds)")
-                    return None
-                
-                # Save preprocessed audio
-                temp_processed = f"temp_processed_{uuid.uuid4().hex}.wav"
-                sf.write(temp_processed, audio_data, 16000)
-                
-                # Try transcription again
-                result = whisper_asr(temp_processed)
-                os.unlink(temp_processed)  # Cleanup
-                
-                if result and 'text' in result and result['text'].strip():
-                    transcribed_text = result['text'].strip()
-                    print(f"✅ Preprocessing successful: '{transcribed_text}'")
-                    
-                    return {
-                        'text': transcribed_text,
-                        'language': detect_language(transcribed_text),
-                        'confidence': 0.85
-                    }
-                else:
-                    print("❌ Preprocessing also failed - no text output")
-                    return None
-                    
-            except ImportError as e:
-                print(f"❌ Missing audio libraries: {e}")
-                print("Install with: pip install librosa soundfile")
-                return None
-            except Exception as e:
-                print(f"❌ Audio preprocessing error: {e}")
-                return None
-        
+
+        print("❌ Whisper returned empty or invalid result")
+        return None
+
+    except AudioDecodeError as e:
+        print(f"❌ Audio decode error: {e}")
+        return None
     except Exception as e:
         print(f"❌ Transcription error: {type(e).__name__}: {e}")
         import traceback
@@ -873,14 +986,17 @@ def setup_multilingual_llm():
     """Setup multiple LLM endpoints for different languages"""
     llm_configs = {
         'english': {
-            'url': "http://127.0.0.1:11434/api/generate",
+            'url': Config.OLLAMA_URL,
             'model': "mistral"
         },
         'tamil': {
-            'url': "http://127.0.0.1:11435/api/generate",  # Different port for Tamil model
+            'url': Config.OLLAMA_TAMIL_URL,  # Different port for Tamil model
             'model': "tamil-llama"  # Or other Tamil-capable model
         }
     }
+    # Each endpoint gets (once) its own keep-alive connection pool and slot limit
+    for config in llm_configs.values():
+        config['endpoint'] = llm_client.endpoint(config['url'])
     return llm_configs
 
 def detect_language(text):
@@ -895,8 +1011,8 @@ def detect_language(text):
     else:
         return 'english'
 
-def query_multilingual_llm(prompt, language='english'):
-    """Enhanced LLM query with language support"""
+def build_multilingual_request(prompt, language='english', stream=False):
+    """Ollama URL and payload for a language-specific agricultural prompt"""
     llm_configs = setup_multilingual_llm()
     
     # Create language-specific agricultural prompt
@@ -943,34 +1059,87 @@ def query_multilingual_llm(prompt, language='english'):
     payload = {
         "model": config['model'],
         "prompt": expert_prompt,
-        "stream": False,
+        "stream": stream,
         "options": {
             "temperature": 0.7,
             "max_tokens": 250
         }
     }
+    return config['url'], payload
+
+def query_multilingual_llm(prompt, language='english'):
+    """Enhanced LLM query with language support"""
+    url, payload = build_multilingual_request(prompt, language)
     
     try:
-        response = requests.post(config['url'], json=payload, timeout=100)
-        if response.status_code == 200:
-            return response.json().get("response", "Unable to generate response")
+        return llm_client.generate(url, payload).get("response", "Unable to generate response")
+    except (LLMStatusError, LLMBusyError, LLMUnavailableError):
+        return "Service temporarily unavailable"
     except Exception as e:
         return f"Error: {str(e)}"
-    
-    return "Service temporarily unavailable"
 
+def stream_multilingual_llm(prompt, language='english'):
+    """Yield response tokens from Ollama as they are generated"""
+    url, payload = build_multilingual_request(prompt, language, stream=True)
+    yield from llm_client.stream(url, payload)
 
+SENTENCE_END = re.compile(r'.*?[.!?।\n](?=\s)', re.S)
 
-def setup_tts():
-    """Initialize TTS engines"""
-    engine = pyttsx3.init()
-    
-    # Configure for better voice quality
-    voices = engine.getProperty('voices')
-    engine.setProperty('rate', 150)  # Speed
-    engine.setProperty('volume', 0.8)  # Volume
-    
-    return engine
+def pop_sentences(buffer, min_length=20):
+    """Split complete sentences (of at least min_length chars) off the front of buffer"""
+    sentences, start = [], 0
+    for match in SENTENCE_END.finditer(buffer):
+        if len(buffer[start:match.end()].strip()) >= min_length:
+            sentences.append(buffer[start:match.end()].strip())
+            start = match.end()
+    return sentences, buffer[start:]
+
+
+
+def load_tts(res):
+    with res.phase('import'):
+        import pyttsx3
+        from gtts import gTTS
+    return {'pyttsx3': pyttsx3, 'gTTS': gTTS}
+
+tts_modules = LazyResource('tts', load_tts)
+
+def load_audio_playback(res):
+    with res.phase('import'):
+        import pygame
+    return pygame
+
+audio_playback = LazyResource('audio_playback', load_audio_playback)
+
+audio_store = AudioStore(
+    Config.AUDIO_STORE_DIR,
+    max_bytes=Config.AUDIO_STORE_MAX_MB * 1024 * 1024,
+    ttl=Config.AUDIO_STORE_TTL,
+    gc_interval=Config.AUDIO_STORE_GC_INTERVAL,
+)
+
+# Older versions wrote TTS replies into the working directory and never removed them
+for stale in [f for f in os.listdir('.') if f.startswith('temp_tts_')]:
+    try:
+        os.unlink(stale)
+    except OSError:
+        pass
+
+tts_service = TTSService(
+    tts_modules.get,
+    audio_store,
+    engines=Config.TTS_ENGINES,
+    voice=Config.TTS_VOICE,
+    rate=Config.TTS_RATE,
+    volume=Config.TTS_VOLUME,
+)
+
+def fixed_tts_phrases():
+    """Replies that are spoken word for word: database advice and service fallbacks"""
+    phrases = ["Service temporarily unavailable"]
+    for info in disease_info.values():
+        phrases.extend([info.get('treatment'), info.get('prevention')])
+    return phrases
 
 @contextmanager
 def temporary_audio_file(suffix='.mp3'):
@@ -986,29 +1155,14 @@ def temporary_audio_file(suffix='.mp3'):
             pass
 
 def text_to_speech(text, language='en'):
-    """Convert text to speech with automatic cleanup"""
-    try:
-        if language in ['tamil', 'tanglish']:
-            # Tamil TTS using gTTS
-            tts = gTTS(text=text, lang='ta', slow=False)
-            final_path = f"temp_tts_{uuid.uuid4().hex}.mp3"
-            tts.save(final_path)
-            return final_path
-        else:
-            # ✅ English TTS using pyttsx3
-            engine = setup_tts()
-            final_path = f"temp_tts_{uuid.uuid4().hex}.wav"
-            engine.save_to_file(text, final_path)
-            engine.runAndWait()
-            return final_path
-    except Exception as e:
-        print(f"TTS Error: {e}")
-        return None
+    """Convert text to speech; repeated phrases come straight from the TTS cache"""
+    return tts_service.synthesize(text, language)
 
 
 def play_audio_response(audio_file):
     """Play generated audio response"""
     try:
+        pygame = audio_playback.get()
         pygame.mixer.init()
         pygame.mixer.music.load(audio_file)
         pygame.mixer.music.play()
@@ -1031,8 +1185,6 @@ def voice_assistant():
 @app.route('/voice-query', methods=['POST'])
 def voice_query():
     """Handle voice-based agricultural queries with improved error handling"""
-    temp_audio_path = None
-    
     try:
         # Validate request
         if 'audio' not in request.files:
@@ -1042,22 +1194,18 @@ def voice_query():
         if audio_file.filename == '':
             return jsonify({'error': 'No file selected'}), 400
         
-        # Save with proper validation
-        temp_audio_path = f"temp_audio_{uuid.uuid4().hex}.webm"  # ✅ Changed to webm
-        audio_file.save(temp_audio_path)
+        # Decode straight from the request bytes - no temp files
+        audio_bytes = audio_file.read()
+        print(f"📁 Audio file size: {len(audio_bytes)} bytes")
         
-        # ✅ Add debugging information
-        file_size = os.path.getsize(temp_audio_path)
-        print(f"📁 Audio file size: {file_size} bytes")
-        
-        if file_size == 0:
+        if len(audio_bytes) == 0:
             return jsonify({'error': 'Empty audio file received'}), 400
         
-        if file_size > 10 * 1024 * 1024:  # 10MB limit
+        if len(audio_bytes) > 10 * 1024 * 1024:  # 10MB limit
             return jsonify({'error': 'Audio file too large'}), 400
         
         # Transcribe audio
-        transcription = transcribe_audio(temp_audio_path)
+        transcription = transcribe_audio(audio_bytes)
         if not transcription:
             return jsonify({'error': 'Failed to transcribe audio - check server logs'}), 400
         
@@ -1081,48 +1229,126 @@ def voice_query():
     except Exception as e:
         print(f"❌ Voice processing error: {e}")
         return jsonify({'error': f'Voice processing error: {str(e)}'}), 500
-    
-    finally:
-        # Cleanup uploaded file
-        if temp_audio_path and os.path.exists(temp_audio_path):
-            os.unlink(temp_audio_path)
 
 
+def transcribe_chunks(audio_data, sample_rate=16000, ahead=2):
+    """Yield (chunk index, text) for consecutive slices of a decoded waveform.
+
+    Slices end at pauses near VOICE_STREAM_CHUNK_SECONDS so words are not cut in
+    half, and only ``ahead`` slices are queued at a time: the first partial
+    transcript arrives after one slice's worth of Whisper time instead of waiting
+    for the whole recording to be batched.
+    """
+    slices = [
+        audio_data[start:end]
+        for start, end in split_at_pauses(audio_data, Config.VOICE_STREAM_CHUNK_SECONDS, sample_rate)
+        if end - start >= sample_rate // 4
+    ]
+
+    def submit(piece):
+        return asr_pool.submit({'raw': piece, 'sampling_rate': sample_rate})
+
+    futures = deque(submit(piece) for piece in slices[:ahead])
+    for index in range(len(slices)):
+        future = futures.popleft()
+        if index + ahead < len(slices):
+            futures.append(submit(slices[index + ahead]))
+        text = (future.result() or {}).get('text', '').strip()
+        if text:
+            yield index, text
+
+@app.route('/voice-query/stream', methods=['POST'])
+def voice_query_stream():
+    """Streaming voice query: partial transcripts, LLM tokens and per-sentence audio as NDJSON"""
+    if 'audio' not in request.files or request.files['audio'].filename == '':
+        return jsonify({'error': 'No audio file provided'}), 400
+
+    audio_bytes = request.files['audio'].read()
+
+    def emit(record):
+        return json.dumps(record, ensure_ascii=False) + '\n'
+
+    def generate():
+        tts_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='stream-tts')
+        pending = []  # (index, sentence, future) in playback order
+        try:
+            audio_data, vad = vad_gate.check(decode_audio(audio_bytes))
+            if audio_data is None:
+                yield emit({'type': 'error', 'error': f"No speech detected ({vad['rejected']})"})
+                return
+
+            parts = []
+            for index, text in transcribe_chunks(audio_data):
+                parts.append(text)
+                yield emit({'type': 'transcript_partial', 'chunk': index, 'text': ' '.join(parts)})
+
+            transcript = ' '.join(parts).strip()
+            if not transcript:
+                yield emit({'type': 'error', 'error': 'Failed to transcribe audio - check server logs'})
+                return
+            language = detect_language(transcript)
+            yield emit({'type': 'transcript', 'text': transcript, 'language': language})
+
+            def drain(wait=False):
+                while pending and (wait or pending[0][2].done()):
+                    index, sentence, future = pending.pop(0)
+                    path = future.result()
+                    if path:
+                        yield emit({'type': 'audio', 'index': index, 'sentence': sentence,
+                                    'url': f"/audio/{os.path.basename(path)}"})
+
+            response_parts, buffer, spoken = [], '', 0
+            for token in stream_multilingual_llm(transcript, language):
+                response_parts.append(token)
+                yield emit({'type': 'token', 'text': token})
+                buffer += token
+                sentences, buffer = pop_sentences(buffer)
+                for sentence in sentences:
+                    pending.append((spoken, sentence, tts_pool.submit(text_to_speech, sentence, language)))
+                    spoken += 1
+                yield from drain()
+
+            if buffer.strip():
+                pending.append((spoken, buffer.strip(), tts_pool.submit(text_to_speech, buffer.strip(), language)))
+            yield from drain(wait=True)
+
+            yield emit({'type': 'done', 'transcription': transcript, 'language': language,
+                        'response': ''.join(response_parts), 'timestamp': datetime.now().isoformat()})
+        except Exception as e:
+            print(f"❌ Streaming voice error: {e}")
+            yield emit({'type': 'error', 'error': f'Voice processing error: {str(e)}'})
+        finally:
+            tts_pool.shutdown(wait=False)
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson',
+                    headers={'X-Accel-Buffering': 'no', 'Cache-Control': 'no-cache'})
 
 @app.route('/audio/<filename>')
 def serve_audio(filename):
-    """Serve generated audio files"""
-    import os
-    # Ensure the file exists and serve from correct location
-    file_path = os.path.join(tempfile.gettempdir(), filename)
-    if os.path.exists(file_path):
-        return send_file(file_path, as_attachment=False, mimetype='audio/mpeg')
-    else:
+    """Serve generated audio with Range and ETag support so browsers can stream and cache it"""
+    artifact = audio_store.lookup(filename)
+    if artifact is None:
         return jsonify({'error': 'Audio file not found'}), 404
-    
+    path, mimetype, etag = artifact
+    # Names are content-addressed, so a file never changes once written
+    return send_file(path, mimetype=mimetype, as_attachment=False, conditional=True,
+                     etag=etag, max_age=Config.AUDIO_STORE_TTL)
 
 @app.route('/test-transcription')
 def test_transcription():
     """Test transcription with a simple audio file"""
     try:
-        # Create a simple test audio file
-        import numpy as np
-        import soundfile as sf
-        
+        # Create a simple test signal in memory
         # Generate a 2-second sine wave (like a beep)
         duration = 2  # seconds
         sample_rate = 16000
         frequency = 440  # A4 note
         
         t = np.linspace(0, duration, duration * sample_rate, False)
-        wave = 0.3 * np.sin(2 * np.pi * frequency * t)
-        
-        test_file = "test_audio_beep.wav"
-        sf.write(test_file, wave, sample_rate)
+        wave = (0.3 * np.sin(2 * np.pi * frequency * t)).astype(np.float32)
         
         # Test transcription
-        result = whisper_asr(test_file)
-        os.unlink(test_file)  # Cleanup
+        result = asr_pool.transcribe({'raw': wave, 'sampling_rate': sample_rate})
         
         return jsonify({
             'status': 'Whisper test completed',
@@ -1166,48 +1392,42 @@ def detect_disease():
         flash('Please upload a valid image file (PNG, JPG, JPEG, GIF)', 'error')
         return redirect(url_for('index'))
 
-    if model is None:
+    label_index.maybe_reload()
+    if get_model() is None:
         flash('AI model not available. Please try again later.', 'error')
         return redirect(url_for('index'))
 
     try:
-        # Save uploaded file
-        filename = f"{uuid.uuid4().hex}_{secure_filename(file.filename)}"
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(filepath)
-
-        # Preprocess and predict
-        processed_image = preprocess_image(filepath)
-        if processed_image is None:
+        # Decode the upload in memory - no disk round trip
+        image_bytes = file.read()
+        try:
+            img = decode_image(image_bytes, Config.IMAGE_SIZE)
+            processed_image = image_to_tensor(img, out=get_image_buffer(Config.IMAGE_SIZE))
+        except Exception as e:
+            print(f"Error preprocessing image: {e}")
             flash('Error processing image. Please try another image.', 'error')
             return redirect(url_for('index'))
 
-        # Make prediction
-        pred = model.predict(processed_image)[0]
-        pred_idx = np.argmax(pred)
-        confidence = float(np.max(pred) * 100)
-        
-        # Get disease information
-        disease_name = classes[pred_idx]
-        disease_data = get_disease_info(disease_name)
+        # Make prediction (re-uploads of the same photo are served from cache)
+        fingerprint = prediction_cache.fingerprint(processed_image)
+        pred = prediction_cache.get(fingerprint)
+        if pred is None:
+            pred = inference_engine.predict(processed_image)[0]
+            prediction_cache.put(fingerprint, pred)
         
         # Prepare comprehensive result
-        result = {
-            'disease_name': disease_name.replace("__", " → ").replace("_(", " ("),
-            'confidence': round(confidence, 2),
-            'image_path': f'uploads/{filename}',
-            'treatment': disease_data['treatment'],
-            'prevention': disease_data['prevention'],
-            'pesticide': disease_data['pesticide'],
-            'dosage': disease_data['dosage'],
-            'cost': disease_data['cost'],
-            'steps': disease_data['steps'],
-            'timing': disease_data['timing'],
-            'safety': disease_data['safety'],
-            'youtube_videos': disease_data['youtube_videos'],
+        result = format_prediction(pred)
+        if Config.PERSIST_UPLOADS:
+            filename = f"{uuid.uuid4().hex}_{secure_filename(file.filename)}"
+            persist_upload(filename, image_bytes)
+            result['image_path'] = f'uploads/{filename}'
+        else:
+            result['image_data'] = thumbnail_data_uri(img)
+
+        result.update({
             'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-            'llm_available': LLM_AVAILABLE
-        }
+            'llm_available': llm_available()
+        })
 
         return render_template('detect.html', result=result)
 
@@ -1216,6 +1436,116 @@ def detect_disease():
         flash('Error analyzing image. Please try again.', 'error')
         return redirect(url_for('index'))
 
+class BatchLimitError(ValueError):
+    """Bulk upload over the image-count or uncompressed-size limits"""
+
+def collect_batch_images():
+    """Read uploaded images (multiple files and/or zip archives) into memory.
+
+    Zip entries are counted and their declared sizes summed before anything is
+    decompressed, so an oversized archive (or a zip bomb) is rejected up front.
+    """
+    max_images = Config.BATCH_DETECT_MAX_IMAGES
+    max_bytes = Config.BATCH_DETECT_MAX_UNCOMPRESSED_MB * 1024 * 1024
+    images, total_bytes = [], 0
+    for upload in request.files.getlist('images') + request.files.getlist('archive'):
+        if not upload or upload.filename == '':
+            continue
+        if upload.filename.lower().endswith('.zip'):
+            with zipfile.ZipFile(io.BytesIO(upload.read())) as archive:
+                entries = [e for e in archive.infolist() if not e.is_dir() and allowed_file(e.filename)]
+                if len(images) + len(entries) > max_images:
+                    raise BatchLimitError(f'Too many images (max {max_images})')
+                total_bytes += sum(e.file_size for e in entries)
+                if total_bytes > max_bytes:
+                    raise BatchLimitError(f'Images too large once unzipped (max {Config.BATCH_DETECT_MAX_UNCOMPRESSED_MB} MB)')
+                for entry in entries:
+                    with archive.open(entry) as f:
+                        data = f.read(entry.file_size + 1)
+                    if len(data) > entry.file_size:
+                        raise zipfile.BadZipFile(f'{entry.filename} is larger than its header says')
+                    images.append((os.path.basename(entry.filename), data))
+        elif allowed_file(upload.filename):
+            if len(images) + 1 > max_images:
+                raise BatchLimitError(f'Too many images (max {max_images})')
+            images.append((secure_filename(upload.filename), upload.read()))
+    return images
+
+@app.route('/api/detect/batch', methods=['POST'])
+def detect_disease_batch():
+    """Bulk detection API - streams one NDJSON prediction per image"""
+    label_index.maybe_reload()
+    if get_model() is None:
+        return jsonify({'error': 'AI model not available'}), 503
+
+    try:
+        images = collect_batch_images()
+    except zipfile.BadZipFile:
+        return jsonify({'error': 'Invalid zip archive'}), 400
+    except BatchLimitError as e:
+        return jsonify({'error': str(e)}), 413
+
+    if not images:
+        return jsonify({'error': 'No valid images provided (PNG, JPG, JPEG, GIF or a zip of them)'}), 400
+
+    batch_size = Config.INFERENCE_MAX_BATCH_SIZE
+
+    def emit(record):
+        return json.dumps(record, ensure_ascii=False) + '\n'
+
+    def run_chunk(chunk):
+        preds = inference_engine.predict(np.concatenate([tensor for _, _, tensor in chunk], axis=0))
+        for (index, name, tensor), pred in zip(chunk, preds):
+            prediction_cache.put(prediction_cache.fingerprint(tensor), pred)
+            record = format_prediction(pred)
+            record.update({'type': 'result', 'index': index, 'filename': name})
+            yield emit(record)
+
+    def generate():
+        yield emit({'type': 'start', 'total': len(images), 'timestamp': datetime.now().isoformat()})
+        processed = failed = 0
+
+        with ThreadPoolExecutor(max_workers=Config.BATCH_DETECT_WORKERS) as pool:
+            # Keep only a few decoded tensors in flight instead of preprocessing every image up front
+            ahead = max(batch_size, Config.BATCH_DETECT_WORKERS) * 2
+            futures = deque(pool.submit(preprocess_image, data, Config.IMAGE_SIZE) for _, data in images[:ahead])
+            chunk = []
+            for index, (name, _) in enumerate(images):
+                tensor = futures.popleft().result()
+                if index + ahead < len(images):
+                    futures.append(pool.submit(preprocess_image, images[index + ahead][1], Config.IMAGE_SIZE))
+                if tensor is None:
+                    failed += 1
+                    yield emit({'type': 'error', 'index': index, 'filename': name, 'error': 'Error processing image'})
+                    continue
+                cached = prediction_cache.get(prediction_cache.fingerprint(tensor))
+                if cached is not None:
+                    processed += 1
+                    record = format_prediction(cached)
+                    record.update({'type': 'result', 'index': index, 'filename': name, 'cached': True})
+                    yield emit(record)
+                    continue
+                chunk.append((index, name, tensor))
+                if len(chunk) >= batch_size:
+                    try:
+                        yield from run_chunk(chunk)
+                        processed += len(chunk)
+                    except Exception as e:
+                        failed += len(chunk)
+                        yield emit({'type': 'error', 'indices': [i for i, _, _ in chunk], 'error': str(e)})
+                    chunk = []
+            if chunk:
+                try:
+                    yield from run_chunk(chunk)
+                    processed += len(chunk)
+                except Exception as e:
+                    failed += len(chunk)
+                    yield emit({'type': 'error', 'indices': [i for i, _, _ in chunk], 'error': str(e)})
+
+        yield emit({'type': 'done', 'processed': processed, 'failed': failed, 'timestamp': datetime.now().isoformat()})
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
 @app.route('/chat', methods=['POST'])
 def chat_with_ai():
     """Enhanced chat endpoint for LLM integration"""
@@ -1227,13 +1557,25 @@ def chat_with_ai():
         if not user_question.strip():
             return jsonify({'error': 'Question cannot be empty'}), 400
         
+        cached = chat_cache.get(disease_context, user_question)
+        if cached is not None:
+            response_text, match = cached
+            return jsonify({
+                'response': response_text,
+                'source': 'cache',
+                'cache': match,
+                'llm_available': llm_available(),
+                'timestamp': datetime.now().isoformat()
+            })
+        
         # Get LLM response
         llm_response = query_llm(user_question, disease_context)
+        available = llm_available()
         
         return jsonify({
             'response': llm_response,
-            'source': 'AI Assistant' if LLM_AVAILABLE else 'Database',
-            'llm_available': LLM_AVAILABLE,
+            'source': 'AI Assistant' if available else 'Database',
+            'llm_available': available,
             'timestamp': datetime.now().isoformat()
         })
         
@@ -1248,75 +1590,279 @@ def chat_with_ai():
 def health_check():
     return jsonify({
         'status': 'healthy',
-        'model_loaded': model is not None,
-        'llm_available': LLM_AVAILABLE,
+        'model_loaded': classifier.peek() is not None,
+        'model_host': Config.MODEL_HOST_ADDRESS,
+        'llm_available': llm_available(),
+        'llm': llm_monitor.status(),
         'total_diseases': len(classes),
+        'label_index': label_index.status(),
+        'prediction_cache': prediction_cache.stats(),
+        'chat_cache': chat_cache.stats(),
+        'audio_store': audio_store.stats(),
+        'sensors': sensor_store.stats(),
+        'sensor_alerts': sensor_alerts.stats(),
+        'sensor_stream': sensor_broadcaster.stats(),
+        'sensor_peers': sensor_peers.stats() if sensor_peers is not None else None,
         'timestamp': datetime.now().isoformat()
     })
 
+@app.route('/api/metrics/inference')
+def inference_metrics():
+    """Batch size and queue wait metrics for the /detect inference engine"""
+    return jsonify(inference_engine.metrics())
+
+@app.route('/api/metrics/asr')
+def asr_metrics():
+    """Whisper queue depth, batch size and latency metrics"""
+    asr = asr_pool.metrics()
+    ms_per_second = asr['total_inference_ms'] / asr['audio_seconds'] if asr['audio_seconds'] else None
+    return jsonify(dict(asr, model=Config.ASR_MODEL, vad=vad_gate.metrics(ms_per_second)))
+
+@app.route('/api/metrics/llm')
+def llm_metrics():
+    """Ollama connection pools: active/queued generations, coalesced prompts, latency"""
+    return jsonify(llm_client.metrics())
+
+@app.route('/api/metrics/knowledge')
+def knowledge_metrics():
+    """Retrieval index size and search latency"""
+    index = knowledge_index.peek()
+    return jsonify(index.metrics() if index is not None else knowledge_index.report())
+
+@app.route('/api/metrics/tts')
+def tts_metrics():
+    """Text-to-speech cache hit rate, size and synthesis time"""
+    return jsonify(tts_service.metrics())
+
+@app.route('/api/labels/reload', methods=['POST'])
+def reload_labels():
+    """Re-read class_indices.txt now (and reload the model) instead of waiting for the file check"""
+    outcome = label_index.reload()
+    if outcome == LABELS_FAILED:
+        return jsonify({'error': label_index.last_error, 'label_index': label_index.status()}), 400
+    return jsonify({'reloaded': outcome == LABELS_RELOADED, 'label_index': label_index.status()})
+
+@app.route('/api/startup-report')
+def startup_report_api():
+    """Import/load cost of each heavy subsystem (only those used so far are loaded)"""
+    return jsonify({
+        'app_import_seconds': APP_IMPORT_SECONDS,
+        'subsystems': startup_report()
+    })
+
 #-------------------------------------------------------------------------------------------------------------
 @app.route('/iot-dashboard')
 def iot_dashboard():
     return render_template('iot_dashboard.html')
 
-# Add API endpoint for real-time sensor data
-@app.route('/api/sensor-data')
-def get_sensor_data():
-    """API endpoint to get current sensor readings"""
+# Readings pushed by the ESP32 nodes
+# Compressed on-disk tier for full-resolution history (off unless SENSOR_ARCHIVE_DIR is set)
+sensor_archive = SensorArchive(
+    Config.SENSOR_ARCHIVE_DIR,
+    block_size=Config.SENSOR_ARCHIVE_BLOCK_SIZE,
+    flush_interval=Config.SENSOR_ARCHIVE_FLUSH_INTERVAL
+) if Config.SENSOR_ARCHIVE_DIR else None
+if sensor_archive is not None:
+    atexit.register(sensor_archive.close)
+
+sensor_store = SensorStore(
+    capacity=Config.SENSOR_BUFFER_CAPACITY,
+    max_batch=Config.SENSOR_MAX_BATCH,
+    max_clock_skew=Config.SENSOR_MAX_CLOCK_SKEW,
+    max_scan_points=Config.SENSOR_ARCHIVE_MAX_SCAN_POINTS,
+    rollups=Config.SENSOR_ROLLUPS,
+    archive=sensor_archive
+)
+
+# Status and alerts are computed once per reading here, not in every open dashboard
+sensor_alerts = SensorAlertEngine(
+    rules_path=Config.SENSOR_RULES_PATH,
+    alpha=Config.SENSOR_EWMA_ALPHA,
+    z_threshold=Config.SENSOR_ZSCORE_THRESHOLD,
+    warmup=Config.SENSOR_ANOMALY_WARMUP
+)
+
+# Centre and spread of the simulated readings used when SENSOR_DEMO_DATA is on
+DEMO_SENSOR_RANGES = {
+    'soil_moisture': (35, -10, 15),
+    'soil_ph': (6.0, -0.8, 1.5),
+    'soil_temperature': (22, -5, 8),
+    'water_ph': (7.0, -0.5, 0.8),
+    'turbidity': (2.0, 0, 3.0),
+    'salinity_ec': (1.0, -0.3, 0.8),
+}
+
+@app.route('/api/sensor-data/ingest', methods=['POST'])
+def ingest_sensor_data():
+    """Batched readings from one device: {"device": "esp32-01", "crop": "tomato", "readings": [{"timestamp": ..., "soil_ph": 6.4}, ...]}"""
+    if Config.SENSOR_INGEST_TOKEN and request.headers.get('X-Device-Token') != Config.SENSOR_INGEST_TOKEN:
+        return jsonify({'error': 'Invalid device token'}), 401
+
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Body must be a JSON object with "device" and "readings"'}), 400
+    try:
+        summary, appended = sensor_store.ingest(data.get('device'), data.get('readings'))
+    except SensorValidationError as e:
+        return jsonify({'error': str(e)}), 400
+    if appended:
+        if sensor_peers is not None:
+            sensor_peers.send(data['device'], data.get('crop'), appended)
+        summary['alerts'] = apply_sensor_batch(data['device'], data.get('crop'), appended)
+    return jsonify(summary), 202 if summary['accepted'] else 200
+
+def apply_sensor_batch(device, crop, appended):
+    """Alerts and live dashboard updates for readings this process has just stored"""
+    sensor_alerts.set_crop(device, crop)
+    alerts = sensor_alerts.evaluate(device, appended)
+    sensor_broadcaster.publish(sensor_snapshot(metrics=appended))
+    for alert in alerts:
+        sensor_broadcaster.publish_event('alert', alert)
+    return alerts
+
+def on_peer_sensor_batch(device, crop, metric, times, values):
+    """A batch another worker ingested (and archived): same alerts and broadcast, no second archive write"""
+    appended = sensor_store.replicate(device, {metric: (times, values)})
+    if appended:
+        apply_sensor_batch(device, crop, appended)
+
+sensor_peers = SensorPeers(Config.SENSOR_PEER_DIR, on_peer_sensor_batch) if Config.SENSOR_PEER_DIR else None
+if sensor_peers is not None:
+    sensor_peers.start()  # gunicorn.conf.py rebinds in each worker when the app is preloaded
+
+def sensor_snapshot(device=None, metrics=None):
+    """Dashboard JSON ({'soil_health': {...}, 'aquafarm': {...}}) from the newest readings"""
     import random
-    import time
     
-    # Generate realistic dummy data
-    sensor_data = {
-        'soil_health': {
-            'soil_moisture': {
-                'value': round(35 + random.uniform(-10, 15), 1),
-                'unit': '%',
-                'status': 'normal',
-                'timestamp': int(time.time())
-            },
-            'soil_ph': {
-                'value': round(6.0 + random.uniform(-0.8, 1.5), 1),
-                'unit': '',
-                'status': 'normal',
-                'timestamp': int(time.time())
-            },
-            'soil_temperature': {
-                'value': round(22 + random.uniform(-5, 8), 1),
-                'unit': '°C',
-                'status': 'normal',
-                'timestamp': int(time.time())
-            }
-        },
-        'aquafarm': {
-            'water_ph': {
-                'value': round(7.0 + random.uniform(-0.5, 0.8), 1),
-                'unit': '',
-                'status': 'normal',
-                'timestamp': int(time.time())
-            },
-            'turbidity': {
-                'value': round(2.0 + random.uniform(0, 3.0), 1),
-                'unit': 'NTU',
-                'status': 'normal',
-                'timestamp': int(time.time())
-            },
-            'salinity_ec': {
-                'value': round(1.0 + random.uniform(-0.3, 0.8), 1),
-                'unit': 'mS/cm',
-                'status': 'normal',
-                'timestamp': int(time.time())
-            }
+    sensor_data = {'soil_health': {}, 'aquafarm': {}}
+    for metric, (section, unit) in SENSOR_METRICS.items():
+        if metrics is not None and metric not in metrics:
+            continue
+        latest = sensor_store.latest(metric, device)
+        if latest is not None:
+            source, timestamp, value = latest
+            status = sensor_alerts.status(source, metric) or sensor_alerts.classify(metric, value)
+        elif Config.SENSOR_DEMO_DATA:
+            centre, low, high = DEMO_SENSOR_RANGES[metric]
+            timestamp, value = time.time(), centre + random.uniform(low, high)
+            status = sensor_alerts.classify(metric, value)
+        else:
+            continue
+        sensor_data[section][metric] = {
+            'value': round(value, 1),
+            'unit': unit,
+            'status': status,
+            'timestamp': int(timestamp),
+            'simulated': latest is None
         }
+    return sensor_data
+
+# One fan-out for all open dashboards; each update carries only the metrics that changed
+sensor_broadcaster = SensorBroadcaster(
+    sensor_snapshot,
+    heartbeat=Config.SENSOR_STREAM_HEARTBEAT,
+    max_pending=Config.SENSOR_STREAM_MAX_PENDING,
+    max_subscribers=Config.SENSOR_STREAM_MAX_CLIENTS,
+    refresh=Config.SENSOR_STREAM_REFRESH
+)
+
+# Add API endpoint for real-time sensor data
+@app.route('/api/sensor-data')
+def get_sensor_data():
+    """API endpoint to get current sensor readings (polling fallback for the dashboard)"""
+    return jsonify(sensor_snapshot(request.args.get('device')))
+
+@app.route('/api/sensor-history')
+def sensor_history():
+    """Downsampled history: ?metric=soil_ph&device=esp32-01&range=7d&resolution=1h[&format=arrow]"""
+    metric = request.args.get('metric', '')
+    if metric not in SENSOR_METRICS:
+        return jsonify({'error': f"metric must be one of: {', '.join(SENSOR_METRICS)}"}), 400
+    device = request.args.get('device')
+    if not device:
+        latest = sensor_store.latest(metric)
+        device = latest[0] if latest else None
+    if not device:
+        return jsonify({'error': 'No device has reported this metric yet'}), 404
+
+    try:
+        end = float(request.args.get('end', time.time()))
+        start = float(request.args['start']) if 'start' in request.args else end - parse_duration(request.args.get('range', '24h'))
+    except SensorValidationError as e:
+        return jsonify({'error': str(e)}), 400
+    except ValueError:
+        return jsonify({'error': 'start and end must be epoch seconds'}), 400
+    if not (math.isfinite(start) and math.isfinite(end)):
+        return jsonify({'error': 'start and end must be finite epoch seconds'}), 400
+    if end <= start:
+        return jsonify({'error': 'end must be after start'}), 400
+    try:
+        # Never return more than SENSOR_HISTORY_MAX_POINTS buckets, whatever resolution was asked for
+        resolution = auto_resolution(end - start, Config.SENSOR_HISTORY_MAX_POINTS)
+        if request.args.get('resolution', 'auto') != 'auto':
+            resolution = max(resolution, int(parse_duration(request.args['resolution'])))
+    except (SensorValidationError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+
+    columns, source, resolution = sensor_store.history(device, metric, start, end, resolution)
+    meta = {'device': device, 'metric': metric, 'unit': SENSOR_METRICS[metric][1], 'start': int(start),
+            'end': int(end), 'resolution': resolution, 'source': source, 'buckets': len(columns['t'])}
+
+    wants_arrow = (request.args.get('format') == 'arrow'
+                   or 'application/vnd.apache.arrow.stream' in request.headers.get('Accept', ''))
+    if wants_arrow:
+        try:
+            import pyarrow as pa
+        except ImportError:
+            return jsonify({'error': 'Arrow output needs pyarrow installed; use format=json'}), 406
+        table = pa.table(columns).replace_schema_metadata({k: str(v) for k, v in meta.items()})
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return Response(sink.getvalue().to_pybytes(), mimetype='application/vnd.apache.arrow.stream')
+
+    meta['columns'] = {
+        name: (values.tolist() if values.dtype.kind in 'iu' else np.round(values.astype(np.float64), 3).tolist())
+        for name, values in columns.items()
     }
-    
-    return jsonify(sensor_data)
+    return jsonify(meta)
+
+@app.route('/api/sensor-alerts')
+def get_sensor_alerts():
+    """Active threshold/anomaly alerts plus recent raised/cleared events (?device= filters)"""
+    alerts = sensor_alerts.alerts()
+    device = request.args.get('device')
+    if device:
+        alerts = {kind: [a for a in items if a['device'] == device] for kind, items in alerts.items()}
+    return jsonify(alerts)
+
+@app.route('/api/sensor-stream')
+def sensor_stream():
+    """Server-Sent Events: a snapshot, then changed metrics and alerts as devices report, plus heartbeats"""
+    if not Config.SENSOR_STREAM_ENABLED:
+        return jsonify({'error': 'Live updates are disabled - poll /api/sensor-data instead'}), 503
+    subscriber = sensor_broadcaster.subscribe()
+    if subscriber is None:
+        return jsonify({'error': 'Too many live dashboards - poll /api/sensor-data instead'}), 503
+    response = Response(stream_with_context(sensor_broadcaster.stream(subscriber)), mimetype='text/event-stream',
+                        headers={'X-Accel-Buffering': 'no', 'Cache-Control': 'no-cache'})
+    # Also covers clients that disconnect before the first frame is sent
+    response.call_on_close(lambda: sensor_broadcaster.unsubscribe(subscriber))
+    return response
 
 
 #-------------------------------------------------------------------------------------------------------------
 
+APP_IMPORT_SECONDS = round(time.perf_counter() - APP_IMPORT_STARTED, 4)
+print(f"⏱️ App imported in {APP_IMPORT_SECONDS:.2f}s (heavy subsystems load on demand)")
+warm_up(Config.WARMUP_SUBSYSTEMS)
+setup_multilingual_llm()  # registers every endpoint so the monitor probes them all
+llm_monitor.start()
+if Config.TTS_PRERENDER:
+    tts_service.prerender(fixed_tts_phrases())
+
 if __name__ == '__main__':
     print(f"🌱 AGROX AI Starting...")
     print(f"📊 Database: {len(classes)} diseases loaded")
-    print(f"🤖 LLM Status: {'Available' if LLM_AVAILABLE else 'Offline'}")
+    print(f"🤖 LLM Status: {'Available' if llm_available() else 'Offline'} (monitored in the background)")
     app.run(debug=True, host='0.0.0.0', port=5000)
@@ -0,0 +1,130 @@
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class ASRWorkerPool:
+    """Queue for Whisper requests that batches several utterances per pipeline call.
+
+    ``get_pipeline`` returns the (lazily loaded) transformers ASR pipeline. Inputs
+    are anything the pipeline accepts - ideally ``{'raw': float32 array,
+    'sampling_rate': 16000}`` so nothing has to be decoded again.
+    """
+
+    def __init__(self, get_pipeline, max_batch_size=4, max_wait_ms=50, workers=1):
+        self.get_pipeline = get_pipeline
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, max_wait_ms / 1000.0)
+        self.workers = max(1, int(workers))
+        self._queue = queue.Queue()
+        self._threads = []
+        self._lock = threading.Lock()
+        self._metrics_lock = threading.Lock()
+        self._latencies = deque(maxlen=500)
+        self._metrics = {
+            'requests': 0,
+            'batches': 0,
+            'errors': 0,
+            'audio_seconds': 0.0,
+            'total_queue_wait_ms': 0.0,
+            'max_queue_wait_ms': 0.0,
+            'total_inference_ms': 0.0,
+        }
+
+    def _ensure_workers(self):
+        if len(self._threads) == self.workers:
+            return
+        with self._lock:
+            while len(self._threads) < self.workers:
+                thread = threading.Thread(target=self._run, name=f'asr-worker-{len(self._threads)}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def submit(self, audio):
+        future = Future()
+        self._ensure_workers()
+        self._queue.put((audio, future, time.perf_counter()))
+        return future
+
+    def transcribe(self, audio, timeout=None):
+        """Blocking transcription; returns the pipeline result dict"""
+        return self.submit(audio).result(timeout=timeout)
+
+    def _collect(self):
+        items = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(items) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                items.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return items
+
+    def _run(self):
+        while True:
+            items = self._collect()
+            started = time.perf_counter()
+            waits = [(started - enqueued) * 1000.0 for _, _, enqueued in items]
+            inputs = [audio for audio, _, _ in items]
+            failed = False
+            try:
+                pipe = self.get_pipeline()
+                if len(inputs) == 1:
+                    results = [pipe(inputs[0])]
+                else:
+                    results = list(pipe(inputs, batch_size=len(inputs)))
+                finished = time.perf_counter()
+                for (_, future, enqueued), result in zip(items, results):
+                    future.set_result(result)
+                    self._latencies.append((finished - enqueued) * 1000.0)
+            except Exception as e:
+                print(f"❌ ASR batch error: {e}")
+                failed = True
+                for _, future, _ in items:
+                    if not future.done():
+                        future.set_exception(e)
+            self._record(inputs, waits, (time.perf_counter() - started) * 1000.0, failed)
+
+    def _record(self, inputs, waits, inference_ms, failed):
+        seconds = sum(
+            len(a['raw']) / a.get('sampling_rate', 16000)
+            for a in inputs if isinstance(a, dict) and 'raw' in a
+        )
+        with self._metrics_lock:
+            m = self._metrics
+            m['requests'] += len(inputs)
+            m['batches'] += 1
+            m['errors'] += int(failed)
+            m['audio_seconds'] += seconds
+            m['total_queue_wait_ms'] += sum(waits)
+            m['max_queue_wait_ms'] = max(m['max_queue_wait_ms'], max(waits))
+            m['total_inference_ms'] += inference_ms
+
+    def metrics(self):
+        """Queue depth, batch sizes and latency percentiles"""
+        with self._metrics_lock:
+            m = dict(self._metrics)
+        latencies = np.array(self._latencies) if self._latencies else None
+        m['queue_depth'] = self._queue.qsize()
+        m['avg_batch_size'] = round(m['requests'] / m['batches'], 2) if m['batches'] else 0.0
+        m['avg_queue_wait_ms'] = round(m['total_queue_wait_ms'] / m['requests'], 2) if m['requests'] else 0.0
+        m['avg_inference_ms_per_batch'] = round(m['total_inference_ms'] / m['batches'], 2) if m['batches'] else 0.0
+        m['latency_ms_p50'] = round(float(np.percentile(latencies, 50)), 2) if latencies is not None else None
+        m['latency_ms_p95'] = round(float(np.percentile(latencies, 95)), 2) if latencies is not None else None
+        m['audio_seconds'] = round(m['audio_seconds'], 2)
+        m['total_queue_wait_ms'] = round(m['total_queue_wait_ms'], 2)
+        m['max_queue_wait_ms'] = round(m['max_queue_wait_ms'], 2)
+        m['total_inference_ms'] = round(m['total_inference_ms'], 2)
+        m['config'] = {
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000.0,
+            'workers': self.workers,
+        }
+        return m
@@ -0,0 +1,194 @@
+import io
+import subprocess
+import threading
+import time
+import wave
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+
+class AudioDecodeError(ValueError):
+    """Upload could not be decoded as audio"""
+
+
+def _decode_wav(data, sample_rate):
+    with wave.open(io.BytesIO(data)) as wav:
+        channels = wav.getnchannels()
+        width = wav.getsampwidth()
+        rate = wav.getframerate()
+        frames = wav.readframes(wav.getnframes())
+
+    if width == 1:
+        audio = (np.frombuffer(frames, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    elif width == 2:
+        audio = np.frombuffer(frames, dtype='<i2').astype(np.float32) / 32768.0
+    elif width == 4:
+        audio = np.frombuffer(frames, dtype='<i4').astype(np.float32) / 2147483648.0
+    else:
+        raise AudioDecodeError(f"unsupported WAV sample width {width}")
+
+    if channels > 1:
+        audio = audio.reshape(-1, channels).mean(axis=1)
+    if rate != sample_rate:
+        # Linear resampling is plenty for speech recognition input
+        target = np.arange(0, len(audio) * sample_rate / rate) * (rate / sample_rate)
+        audio = np.interp(target, np.arange(len(audio)), audio).astype(np.float32)
+    return audio
+
+
+def _decode_ffmpeg(data, sample_rate):
+    """WebM/Opus/OGG/MP3/... through an ffmpeg pipe - no temp files"""
+    command = [
+        'ffmpeg', '-hide_banner', '-loglevel', 'error',
+        '-i', 'pipe:0',
+        '-ac', '1', '-ar', str(sample_rate),
+        '-f', 'f32le', 'pipe:1',
+    ]
+    try:
+        proc = subprocess.run(command, input=data, stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=30)
+    except FileNotFoundError:
+        raise AudioDecodeError("ffmpeg is required to decode compressed audio")
+    if proc.returncode != 0:
+        raise AudioDecodeError(proc.stderr.decode('utf-8', 'replace').strip() or "ffmpeg failed")
+    return np.frombuffer(proc.stdout, dtype=np.float32)
+
+
+def decode_audio(data, sample_rate=SAMPLE_RATE):
+    """Decode uploaded audio bytes into a mono float32 waveform at sample_rate"""
+    if not data:
+        raise AudioDecodeError("empty audio")
+    if data[:4] == b'RIFF' and data[8:12] == b'WAVE':
+        try:
+            return _decode_wav(data, sample_rate)
+        except (wave.Error, EOFError):
+            pass  # e.g. float WAV - let ffmpeg handle it
+    return _decode_ffmpeg(data, sample_rate)
+
+
+def frame_energy(audio, sample_rate=SAMPLE_RATE, frame_ms=30):
+    """RMS energy per non-overlapping frame (vectorised)"""
+    frame = max(1, int(sample_rate * frame_ms / 1000))
+    usable = len(audio) - len(audio) % frame
+    if usable == 0:
+        return np.zeros(0, dtype=np.float32), frame
+    frames = audio[:usable].reshape(-1, frame)
+    return np.sqrt(np.einsum('ij,ij->i', frames, frames) / frame), frame
+
+
+def split_at_pauses(audio, target_seconds, sample_rate=SAMPLE_RATE, frame_ms=30, search=0.5):
+    """(start, end) sample ranges of about ``target_seconds`` each, cut at the quietest
+    frame near each target so slices end in a pause rather than mid-word.
+
+    Each cut is searched for between ``(1 - search)`` and ``(1 + search)`` times
+    the target length; a slice is never longer than that window.
+    """
+    energy, frame = frame_energy(audio, sample_rate, frame_ms)
+    target = max(1, int(target_seconds * sample_rate / frame))
+    lo_off, hi_off = max(1, int(target * (1 - search))), max(1, int(target * (1 + search)))
+    bounds, start = [], 0
+    while len(energy) - start > hi_off:
+        window = energy[start + lo_off:start + hi_off + 1]
+        # Of the (near-)quietest frames, take the one closest to the target length
+        quiet = np.flatnonzero(window <= window.min() * 1.5 + 1e-6)
+        cut = start + lo_off + int(quiet[np.argmin(np.abs(quiet + lo_off - target))])
+        bounds.append((start * frame, cut * frame))
+        start = cut
+    bounds.append((start * frame, len(audio)))
+    return bounds
+
+
+class VoiceActivityGate:
+    """Cheap pre-Whisper check: reject silent/too-short audio and trim the rest.
+
+    Frame energies are computed once; the threshold adapts to the recording's
+    noise floor (a quiet room vs. a field with wind), never going below
+    ``energy_threshold``. The floor is only trusted when the clip has quiet
+    frames well below its loud ones - in continuous speech the 10th percentile
+    is speech, not noise, so such clips fall back to ``energy_threshold``.
+    """
+
+    def __init__(self, sample_rate=SAMPLE_RATE, frame_ms=30, energy_threshold=0.01,
+                 noise_factor=3.0, min_speech_seconds=0.3, padding_ms=150):
+        self.sample_rate = sample_rate
+        self.frame_ms = frame_ms
+        self.energy_threshold = energy_threshold
+        self.noise_factor = noise_factor
+        self.min_speech_seconds = min_speech_seconds
+        self.padding_ms = padding_ms
+        self._lock = threading.Lock()
+        self._metrics = {
+            'checked': 0,
+            'accepted': 0,
+            'rejected': {},
+            'audio_seconds_in': 0.0,
+            'audio_seconds_to_asr': 0.0,
+            'gate_ms_total': 0.0,
+        }
+
+    def check(self, audio):
+        """Return (trimmed audio or None, info); None means 'do not run Whisper'"""
+        started = time.perf_counter()
+        duration = len(audio) / self.sample_rate
+        trimmed, reason, speech_seconds = None, None, 0.0
+
+        if duration < self.min_speech_seconds:
+            reason = 'too_short'
+        else:
+            energy, frame = frame_energy(audio, self.sample_rate, self.frame_ms)
+            floor, peak = (np.percentile(energy, (10, 90)) if energy.size else (0.0, 0.0))
+            # Peak/floor contrast: without it there is no noise floor to learn from
+            adaptive = floor * self.noise_factor if peak >= floor * self.noise_factor else 0.0
+            threshold = max(self.energy_threshold, adaptive)
+            voiced = np.flatnonzero(energy >= threshold)
+            speech_seconds = voiced.size * frame / self.sample_rate
+            if voiced.size == 0:
+                reason = 'silent'
+            elif speech_seconds < self.min_speech_seconds:
+                reason = 'too_little_speech'
+            else:
+                pad = int(self.sample_rate * self.padding_ms / 1000)
+                start = max(0, voiced[0] * frame - pad)
+                end = min(len(audio), (voiced[-1] + 1) * frame + pad)
+                trimmed = audio[start:end]
+
+        elapsed_ms = (time.perf_counter() - started) * 1000.0
+        info = {
+            'duration': round(duration, 3),
+            'speech_seconds': round(speech_seconds, 3),
+            'asr_seconds': round(len(trimmed) / self.sample_rate, 3) if trimmed is not None else 0.0,
+            'rejected': reason,
+            'gate_ms': round(elapsed_ms, 3),
+        }
+        self._record(info)
+        return trimmed, info
+
+    def _record(self, info):
+        with self._lock:
+            m = self._metrics
+            m['checked'] += 1
+            if info['rejected']:
+                m['rejected'][info['rejected']] = m['rejected'].get(info['rejected'], 0) + 1
+            else:
+                m['accepted'] += 1
+            m['audio_seconds_in'] += info['duration']
+            m['audio_seconds_to_asr'] += info['asr_seconds']
+            m['gate_ms_total'] += info['gate_ms']
+
+    def metrics(self, asr_ms_per_audio_second=None):
+        """Counters plus the Whisper time saved by rejecting and trimming"""
+        with self._lock:
+            m = dict(self._metrics)
+            m['rejected'] = dict(m['rejected'])
+        skipped = m['audio_seconds_in'] - m['audio_seconds_to_asr']
+        m['audio_seconds_skipped'] = round(skipped, 2)
+        m['audio_seconds_in'] = round(m['audio_seconds_in'], 2)
+        m['audio_seconds_to_asr'] = round(m['audio_seconds_to_asr'], 2)
+        # The old path ran Whisper twice on every recording that came back empty
+        m['whisper_passes_avoided'] = 2 * sum(m['rejected'].values())
+        m['avg_gate_ms'] = round(m['gate_ms_total'] / m['checked'], 4) if m['checked'] else 0.0
+        m['gate_ms_total'] = round(m['gate_ms_total'], 3)
+        if asr_ms_per_audio_second:
+            m['estimated_asr_ms_saved'] = round(skipped * asr_ms_per_audio_second, 1)
+        return m
@@ -0,0 +1,197 @@
+import contextlib
+import fcntl
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+MIME_TYPES = {
+    '.wav': 'audio/wav',
+    '.mp3': 'audio/mpeg',
+    '.ogg': 'audio/ogg',
+    '.webm': 'audio/webm',
+}
+
+_NAME = re.compile(r'^([0-9a-f]{40})(\.[a-z0-9]+)$')
+
+
+class AudioStore:
+    """One content-addressed directory for generated audio.
+
+    Files are named ``<sha1 key><ext>`` where the key identifies the content
+    (for TTS, a hash of text + voice), so a name never points at different
+    audio and can be served with a strong ETag. Files not used for ``ttl``
+    seconds are removed, and the least recently used ones go once the directory
+    grows past ``max_bytes``. GC runs at most every ``gc_interval`` seconds,
+    piggybacking on get/put, and after every put.
+
+    Several worker processes share the directory, so the directory is the
+    source of truth: a use is recorded in the file's mtime, and GC rebuilds the
+    index from the directory under a flock before evicting, so the TTL and size
+    cap cover every worker's files and a file another worker just used is not
+    the one that goes.
+    """
+
+    def __init__(self, root, max_bytes=64 * 1024 * 1024, ttl=7 * 24 * 3600, gc_interval=300):
+        self.root = root
+        self.max_bytes = max(0, int(max_bytes))
+        self.ttl = ttl
+        self.gc_interval = gc_interval
+        self._lock = threading.Lock()
+        self._index = OrderedDict()  # key -> [path, size, last used], least recently used first
+        self._bytes = 0
+        self._last_gc = 0.0
+        self._stats = {'hits': 0, 'misses': 0, 'stored': 0, 'evicted_size': 0, 'evicted_ttl': 0}
+        os.makedirs(root, exist_ok=True)
+        self.gc()
+
+    def _scan(self):
+        """Rebuild the index from the directory, taking each file's mtime as its last use"""
+        entries = []
+        for name in os.listdir(self.root):
+            match = _NAME.match(name)
+            if not match or match.group(2) not in MIME_TYPES:
+                continue
+            path = os.path.join(self.root, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, match.group(1), path, stat.st_size))
+        with self._lock:
+            self._index = OrderedDict((key, [path, size, mtime]) for mtime, key, path, size in sorted(entries))
+            self._bytes = sum(size for _, _, _, size in entries)
+
+    @contextlib.contextmanager
+    def exclusive(self, name, wait=False):
+        """flock on ``<name>.lock`` in the store; without ``wait``, yields False while another process holds it"""
+        fd = os.open(os.path.join(self.root, name + '.lock'), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX if wait else fcntl.LOCK_EX | fcntl.LOCK_NB)
+                held = True
+            except BlockingIOError:
+                held = False
+            yield held
+        finally:
+            os.close(fd)
+
+    def temp_path(self, key, ext):
+        """Scratch path in the store directory, so put() is an atomic rename"""
+        return os.path.join(self.root, f".{key}.{threading.get_ident()}{ext}")
+
+    def get(self, key):
+        """Path of a stored artifact, or None"""
+        self.maybe_gc()
+        with self._lock:
+            entry = self._index.get(key)
+            # Not indexed here yet may still mean another worker stored it since our last scan
+            path = entry[0] if entry else self._on_disk(key)
+            if path and self._touch(key, path):
+                self._stats['hits'] += 1
+                return path
+            if entry:
+                self._forget(key)  # removed by another worker's GC
+            self._stats['misses'] += 1
+        return None
+
+    def put(self, key, src_path, ext):
+        """Move ``src_path`` into the store under ``key`` and return the final path"""
+        if ext not in MIME_TYPES:
+            raise ValueError(f"unsupported audio type {ext}")
+        path = os.path.join(self.root, key + ext)
+        os.replace(src_path, path)
+        with self._lock:
+            self._touch(key, path)
+            self._stats['stored'] += 1
+        # Other workers' puts only show up in a scan, so the size cap is enforced from the directory
+        self.gc()
+        return path
+
+    def lookup(self, filename):
+        """(path, mimetype, etag) for a public file name, or None"""
+        match = _NAME.match(os.path.basename(filename))
+        if not match or match.group(2) not in MIME_TYPES:
+            return None
+        key, ext = match.groups()
+        path = os.path.join(self.root, key + ext)
+        with self._lock:
+            if not self._touch(key, path):
+                return None
+        return path, MIME_TYPES[ext], key
+
+    def _on_disk(self, key):
+        for ext in MIME_TYPES:
+            path = os.path.join(self.root, key + ext)
+            if os.path.isfile(path):
+                return path
+        return None
+
+    def _touch(self, key, path):
+        """Record a use in the index and in the file's mtime, which other workers' GC goes by"""
+        try:
+            os.utime(path)
+            size = os.path.getsize(path)
+        except OSError:
+            return False
+        if key in self._index:
+            self._forget(key)
+        self._index[key] = [path, size, time.time()]
+        self._bytes += size
+        return True
+
+    def _forget(self, key):
+        _, size, _ = self._index.pop(key)
+        self._bytes -= size
+
+    def _remove(self, key):
+        path = self._index[key][0]
+        self._forget(key)
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+    def _evict_size(self):
+        while self._bytes > self.max_bytes and len(self._index) > 1:
+            self._remove(next(iter(self._index)))
+            self._stats['evicted_size'] += 1
+
+    def maybe_gc(self):
+        if time.monotonic() - self._last_gc >= self.gc_interval:
+            self.gc()
+
+    def gc(self):
+        """Drop expired artifacts, enforce the size cap and clear abandoned scratch files"""
+        self._last_gc = time.monotonic()
+        with self.exclusive('gc', wait=True):
+            self._scan()
+            now = time.time()
+            with self._lock:
+                expired = [key for key, (_, _, used) in self._index.items() if now - used > self.ttl]
+                for key in expired:
+                    self._remove(key)
+                self._stats['evicted_ttl'] += len(expired)
+                self._evict_size()
+        for name in os.listdir(self.root):
+            if not name.startswith('.'):
+                continue
+            path = os.path.join(self.root, name)
+            try:
+                if now - os.path.getmtime(path) > 3600:
+                    os.unlink(path)
+            except OSError:
+                pass
+        return len(expired)
+
+    def stats(self):
+        with self._lock:
+            s = dict(self._stats)
+            s['files'] = len(self._index)
+            s['bytes'] = self._bytes
+        s['disk_mb'] = round(s['bytes'] / (1024 * 1024), 2)
+        s['max_mb'] = round(self.max_bytes / (1024 * 1024), 2)
+        s['ttl_seconds'] = self.ttl
+        s['path'] = self.root
+        return s
@@ -0,0 +1,52 @@
+"""Per-request latency: model.predict vs the traced predict function.
+
+    python bench_predict.py --runs 200
+"""
+import argparse
+import time
+
+import numpy as np
+
+from config import Config
+from inference import CompiledKerasModel
+
+
+def time_calls(fn, batch, runs):
+    fn(batch)  # warm-up
+    samples = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        fn(batch)
+        samples.append((time.perf_counter() - t0) * 1000.0)
+    return np.array(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark single-request classifier latency")
+    parser.add_argument('--model', default='model/plant_disease_model.h5')
+    parser.add_argument('--runs', type=int, default=100)
+    parser.add_argument('--batch-size', type=int, default=1)
+    args = parser.parse_args()
+
+    from tensorflow.keras.models import load_model
+
+    model = load_model(args.model)
+    compiled = CompiledKerasModel(model, image_size=Config.IMAGE_SIZE, warmup_batch_sizes=(args.batch_size,))
+
+    width, height = Config.IMAGE_SIZE
+    batch = np.random.default_rng(0).random((args.batch_size, height, width, 3), dtype=np.float32)
+
+    baseline = time_calls(lambda x: model.predict(x, verbose=0), batch, args.runs)
+    traced = time_calls(compiled.predict, batch, args.runs)
+
+    diff = np.abs(model.predict(batch, verbose=0) - compiled.predict(batch)).max()
+
+    print(f"{'path':<16} {'p50 ms':>8} {'p95 ms':>8} {'mean ms':>8}")
+    for name, s in (('model.predict', baseline), ('traced', traced)):
+        print(f"{name:<16} {np.percentile(s, 50):>8.2f} {np.percentile(s, 95):>8.2f} {s.mean():>8.2f}")
+    saved = np.percentile(baseline, 50) - np.percentile(traced, 50)
+    print(f"⏱️ Saved {saved:.2f} ms per request at p50 (max output difference {diff:.2e})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+"""Sensor archive vs one SQLite row per reading: write throughput, size and range-scan latency.
+
+    python bench_sensor_archive.py --series 50 --hours 24
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+
+import numpy as np
+
+from sensor_archive import SensorArchive
+
+# Rough centre / drift / sensor resolution per metric, like the ESP32 nodes report them
+METRIC_SHAPES = {
+    'soil_moisture': (45.0, 0.05, 0.1),
+    'soil_ph': (6.5, 0.002, 0.01),
+    'soil_temperature': (24.0, 0.01, 0.1),
+    'water_ph': (7.2, 0.002, 0.01),
+    'turbidity': (1.5, 0.01, 0.01),
+    'salinity_ec': (1.1, 0.001, 0.01),
+}
+
+
+def synthetic_series(rng, metric, start, seconds):
+    """1 Hz readings with a few ms of clock jitter and a slow random walk quantised to the sensor's resolution"""
+    centre, drift, step = METRIC_SHAPES[metric]
+    times = start + np.arange(seconds) + rng.integers(-5, 6, seconds) / 1000.0
+    values = centre + np.cumsum(rng.normal(0, drift, seconds))
+    return times, (np.round(values / step) * step).astype(np.float32)
+
+
+def sqlite_store(path):
+    db = sqlite3.connect(path)
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA synchronous=NORMAL")
+    db.execute("CREATE TABLE readings (device TEXT, metric TEXT, ts REAL, value REAL)")
+    db.execute("CREATE INDEX readings_series_ts ON readings (device, metric, ts)")
+    return db
+
+
+def write_batches(data, batch, archive, db):
+    """Feed both stores ESP32-sized batches, round-robin across series; returns seconds spent in each"""
+    archive_seconds = sqlite_seconds = 0.0
+    length = len(next(iter(data.values()))[0])
+    for offset in range(0, length, batch):
+        for (device, metric), (times, values) in data.items():
+            t, v = times[offset:offset + batch], values[offset:offset + batch]
+            started = time.perf_counter()
+            archive.append(device, metric, t, v)
+            archive_seconds += time.perf_counter() - started
+            started = time.perf_counter()
+            db.executemany("INSERT INTO readings VALUES (?, ?, ?, ?)",
+                           zip([device] * len(t), [metric] * len(t), t.tolist(), v.tolist()))
+            db.commit()
+            sqlite_seconds += time.perf_counter() - started
+    started = time.perf_counter()
+    archive.flush()
+    archive_seconds += time.perf_counter() - started
+    return archive_seconds, sqlite_seconds
+
+
+def time_scans(scan, queries):
+    samples = []
+    for query in queries:
+        started = time.perf_counter()
+        scan(*query)
+        samples.append((time.perf_counter() - started) * 1000.0)
+    return np.array(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the compressed sensor archive against SQLite rows")
+    parser.add_argument('--series', type=int, default=24, help='(device, metric) series to simulate')
+    parser.add_argument('--hours', type=float, default=12, help='hours of 1 Hz readings per series')
+    parser.add_argument('--batch', type=int, default=60, help='readings per ingest batch')
+    parser.add_argument('--block-size', type=int, default=4096)
+    parser.add_argument('--scans', type=int, default=50)
+    parser.add_argument('--window', default='1h', choices=('1m', '1h', '6h'), help='range scan length')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    start = 1.7e9
+    seconds = int(args.hours * 3600)
+    metrics = list(METRIC_SHAPES)
+    data = {}
+    for i in range(args.series):
+        metric = metrics[i % len(metrics)]
+        data[(f"esp32-{i // len(metrics):02d}", metric)] = synthetic_series(rng, metric, start, seconds)
+    points = args.series * seconds
+
+    with tempfile.TemporaryDirectory() as root:
+        archive = SensorArchive(os.path.join(root, 'archive'), block_size=args.block_size)
+        db_path = os.path.join(root, 'readings.db')
+        db = sqlite_store(db_path)
+        archive_seconds, sqlite_seconds = write_batches(data, args.batch, archive, db)
+        db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        sqlite_bytes = os.path.getsize(db_path)
+        archive_bytes = archive.stats()['disk_mb'] * 1024 * 1024
+
+        window = {'1m': 60, '1h': 3600, '6h': 21600}[args.window]
+        keys = list(data)
+        queries = []
+        for _ in range(args.scans):
+            device, metric = keys[rng.integers(len(keys))]
+            lo = start + rng.uniform(0, max(seconds - window, 1))
+            queries.append((device, metric, lo, lo + window))
+
+        def sqlite_scan(device, metric, lo, hi):
+            rows = db.execute("SELECT ts, value FROM readings WHERE device = ? AND metric = ? AND ts >= ? AND ts < ?",
+                              (device, metric, lo, hi)).fetchall()
+            return np.array(rows, dtype=np.float64).reshape(-1, 2)
+
+        archive_scans = time_scans(archive.scan, queries)
+        sqlite_scans = time_scans(sqlite_scan, queries)
+
+        device, metric, lo, hi = queries[0]
+        times, values = archive.scan(device, metric, lo, hi)
+        rows = sqlite_scan(device, metric, lo, hi)
+        assert len(times) == len(rows) and np.allclose(values, rows[:, 1].astype(np.float32)), "stores disagree"
+
+        stats = archive.stats()
+        archive.close()
+        db.close()
+
+    print(f"{points:,} readings ({args.series} series x {args.hours:g} h at 1 Hz), batches of {args.batch}, "
+          f"{args.window} scans")
+    print(f"{'store':<10} {'write/s':>12} {'MB':>8} {'B/reading':>10} {'scan p50 ms':>12} {'scan p95 ms':>12}")
+    for name, elapsed, size, scans in (('archive', archive_seconds, archive_bytes, archive_scans),
+                                       ('sqlite', sqlite_seconds, sqlite_bytes, sqlite_scans)):
+        print(f"{name:<10} {points / elapsed:>12,.0f} {size / 1048576:>8.2f} {size / points:>10.2f} "
+              f"{np.percentile(scans, 50):>12.3f} {np.percentile(scans, 95):>12.3f}")
+    print(f"📦 Archive compression ratio {stats['compression_ratio']}x vs 12-byte in-memory readings, "
+          f"{sqlite_bytes / archive_bytes:.1f}x smaller than SQLite")
+
+
+if __name__ == '__main__':
+    main()
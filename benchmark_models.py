@@ -0,0 +1,114 @@
+"""Accuracy vs latency comparison of classifier exports.
+
+    python benchmark_models.py --data data/leaves \
+        model/plant_disease_model.h5 model/plant_disease_model.float16.tflite
+
+--data is a folder with one sub-folder per class, named like the entries in
+model/class_indices.txt (e.g. Tomato___Late_blight) or the disease_info keys
+(Tomato__Late_blight); names are matched ignoring case and punctuation.
+"""
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from config import Config
+from export_model import IMAGE_EXTENSIONS
+from inference import load_classifier_model
+from labels import fit_temperature, label_key, load_class_indices
+from preprocessing import decode_image, image_to_tensor
+
+
+def load_dataset(folder, limit=None):
+    indices = {label_key(name): idx for idx, name in enumerate(load_class_indices(Config.CLASS_INDICES_PATH))}
+    images, labels, skipped = [], [], []
+    for entry in sorted(os.listdir(folder)):
+        class_dir = os.path.join(folder, entry)
+        if not os.path.isdir(class_dir):
+            continue
+        if label_key(entry) not in indices:
+            skipped.append(entry)
+            continue
+        files = sorted(f for f in os.listdir(class_dir) if f.lower().endswith(IMAGE_EXTENSIONS))
+        for name in files[:limit]:
+            images.append(image_to_tensor(decode_image(os.path.join(class_dir, name), Config.IMAGE_SIZE))[0])
+            labels.append(indices[label_key(entry)])
+    if skipped:
+        print(f"⚠️ Skipped unknown class folders: {', '.join(skipped)}")
+    return np.stack(images), np.array(labels)
+
+
+def benchmark(path, images, labels, batch_size, runs):
+    started = time.perf_counter()
+    model = load_classifier_model(path)
+    load_s = time.perf_counter() - started
+
+    # Warm-up, then single-image latency (the /detect path)
+    model.predict(images[:1], verbose=0)
+    latencies = []
+    for i in range(min(runs, len(images))):
+        t0 = time.perf_counter()
+        model.predict(images[i:i + 1], verbose=0)
+        latencies.append((time.perf_counter() - t0) * 1000.0)
+
+    # Batched throughput + predictions for accuracy
+    preds = []
+    t0 = time.perf_counter()
+    for i in range(0, len(images), batch_size):
+        preds.append(np.asarray(model.predict(images[i:i + batch_size], verbose=0)))
+    batch_s = time.perf_counter() - t0
+    probs = np.concatenate(preds, axis=0)
+
+    return {
+        'model': path,
+        'size_mb': round(os.path.getsize(path) / 1e6, 2),
+        'load_s': round(load_s, 2),
+        'accuracy': round(float(np.mean(probs.argmax(axis=1) == labels)), 4),
+        'latency_ms_p50': round(float(np.percentile(latencies, 50)), 2),
+        'latency_ms_p95': round(float(np.percentile(latencies, 95)), 2),
+        'throughput_ips': round(len(images) / batch_s, 1),
+    }, probs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare classifier exports on labelled leaf images")
+    parser.add_argument('models', nargs='+', help=".h5 / .tflite / .onnx files; the first is the reference")
+    parser.add_argument('--data', required=True, help="Folder with one sub-folder of images per class")
+    parser.add_argument('--limit', type=int, help="Max images per class")
+    parser.add_argument('--batch-size', type=int, default=Config.INFERENCE_MAX_BATCH_SIZE)
+    parser.add_argument('--runs', type=int, default=50, help="Single-image latency samples")
+    parser.add_argument('--json', help="Also write results to this file")
+    parser.add_argument('--fit-temperature', action='store_true',
+                        help="Fit CALIBRATION_TEMPERATURE on the first model's predictions")
+    args = parser.parse_args()
+
+    images, labels = load_dataset(args.data, args.limit)
+    print(f"📊 {len(images)} images across {len(set(labels.tolist()))} classes")
+
+    results, reference = [], None
+    for path in args.models:
+        result, probs = benchmark(path, images, labels, args.batch_size, args.runs)
+        if reference is None:
+            reference = probs.argmax(axis=1)
+            if args.fit_temperature:
+                temperature, nll = fit_temperature(probs, labels)
+                print(f"🌡️ CALIBRATION_TEMPERATURE={temperature:.2f} (NLL {nll:.4f})")
+        result['agreement'] = round(float(np.mean(probs.argmax(axis=1) == reference)), 4)
+        results.append(result)
+
+    header = f"{'model':<48} {'MB':>7} {'acc':>7} {'agree':>7} {'p50 ms':>8} {'p95 ms':>8} {'img/s':>8}"
+    print(header)
+    print('-' * len(header))
+    for r in results:
+        print(f"{r['model']:<48} {r['size_mb']:>7} {r['accuracy']:>7} {r['agreement']:>7} "
+              f"{r['latency_ms_p50']:>8} {r['latency_ms_p95']:>8} {r['throughput_ips']:>8}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
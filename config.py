@@ -1,4 +1,5 @@
 import os
+import tempfile
 
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'agrox-ai-secret-key-2025'
@@ -6,7 +7,142 @@ class Config:
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
     
     # Model configuration
-    MODEL_PATH = 'models/plant_disease_model.h5'
+    # .h5 runs on TensorFlow; point at an export from export_model.py (.tflite / .onnx) for the lean CPU runtimes
+    MODEL_PATH = os.environ.get('MODEL_PATH', 'model/plant_disease_model.h5')
+    INFERENCE_THREADS = int(os.environ.get('INFERENCE_THREADS', 0)) or None
+    # Serve .h5 models through a traced tf.function instead of model.predict (see bench_predict.py)
+    COMPILED_PREDICT = os.environ.get('COMPILED_PREDICT', 'true').lower() in ('1', 'true', 'yes')
     IMAGE_SIZE = (224, 224)  # Adjust based on your model
+    # Output index -> class name for MODEL_PATH; re-read when it changes (retrained model deployed)
+    CLASS_INDICES_PATH = os.environ.get('CLASS_INDICES_PATH', 'model/class_indices.txt')
+    LABEL_RELOAD_INTERVAL = float(os.environ.get('LABEL_RELOAD_INTERVAL', 5))
+
+    # Whisper ASR: model size trades accuracy for throughput (tiny / base / small); ASR_MODEL overrides
+    ASR_MODEL_SIZE = os.environ.get('ASR_MODEL_SIZE', 'base')
+    ASR_MODEL = os.environ.get('ASR_MODEL') or f'openai/whisper-{ASR_MODEL_SIZE}'
+    ASR_MAX_BATCH_SIZE = int(os.environ.get('ASR_MAX_BATCH_SIZE', 4))
+    ASR_MAX_WAIT_MS = float(os.environ.get('ASR_MAX_WAIT_MS', 50))
+    ASR_WORKERS = int(os.environ.get('ASR_WORKERS', 1))
+    # Voice activity gate in front of Whisper: silent or too-short recordings are rejected
+    VAD_ENERGY_THRESHOLD = float(os.environ.get('VAD_ENERGY_THRESHOLD', 0.01))
+    VAD_MIN_SPEECH_SECONDS = float(os.environ.get('VAD_MIN_SPEECH_SECONDS', 0.3))
+
+    # Model-host mode: when set, workers forward inference to `python model_host.py`
+    # listening on this Unix socket path (or host:port) instead of loading models themselves
+    MODEL_HOST_ADDRESS = os.environ.get('MODEL_HOST_ADDRESS')
+    MODEL_HOST_AUTHKEY = os.environ.get('MODEL_HOST_AUTHKEY')  # required; requests are pickled, keep it secret
+
+    # Heavy subsystems load on first use; list any to warm up in the background at startup
+    # (comma separated: classifier, whisper_asr, tts, audio_playback)
+    WARMUP_SUBSYSTEMS = [s.strip() for s in os.environ.get('WARMUP_SUBSYSTEMS', '').split(',') if s.strip()]
+
+    # Prediction output: top-k alternatives, temperature scaling (fit with benchmark_models.py
+    # --fit-temperature) and when to flag a diagnosis as uncertain
+    TOP_K = int(os.environ.get('TOP_K', 3))
+    CALIBRATION_TEMPERATURE = float(os.environ.get('CALIBRATION_TEMPERATURE', 1.0))
+    UNCERTAIN_CONFIDENCE = float(os.environ.get('UNCERTAIN_CONFIDENCE', 0.5))
+    UNCERTAIN_MARGIN = float(os.environ.get('UNCERTAIN_MARGIN', 0.15))
+
+    # Uploads are decoded in memory; set to keep a copy in UPLOAD_FOLDER (written in the background)
+    PERSIST_UPLOADS = os.environ.get('PERSIST_UPLOADS', 'false').lower() in ('1', 'true', 'yes')
+
+    # Micro-batching for /detect: collect up to N images or wait at most M ms
+    INFERENCE_MAX_BATCH_SIZE = int(os.environ.get('INFERENCE_MAX_BATCH_SIZE', 8))
+    INFERENCE_MAX_WAIT_MS = float(os.environ.get('INFERENCE_MAX_WAIT_MS', 10))
+
+    # Prediction cache keyed on decoded pixels (set PREDICTION_CACHE_PATH for a restart-safe disk tier)
+    PREDICTION_CACHE_SIZE = int(os.environ.get('PREDICTION_CACHE_SIZE', 1024))
+    PREDICTION_CACHE_TTL = int(os.environ.get('PREDICTION_CACHE_TTL', 7 * 24 * 3600))
+    PREDICTION_CACHE_PATH = os.environ.get('PREDICTION_CACHE_PATH')
+    PREDICTION_CACHE_PHASH_DISTANCE = int(os.environ.get('PREDICTION_CACHE_PHASH_DISTANCE', 0))  # 0 = exact matches only
+
+    # Streaming voice pipeline (/voice-query/stream): audio is transcribed in slices of this length
+    VOICE_STREAM_CHUNK_SECONDS = float(os.environ.get('VOICE_STREAM_CHUNK_SECONDS', 8))
+
+    # Bulk detection API (/api/detect/batch)
+    BATCH_DETECT_MAX_IMAGES = int(os.environ.get('BATCH_DETECT_MAX_IMAGES', 500))
+    BATCH_DETECT_WORKERS = int(os.environ.get('BATCH_DETECT_WORKERS', 4))
+    BATCH_DETECT_MAX_UNCOMPRESSED_MB = int(os.environ.get('BATCH_DETECT_MAX_UNCOMPRESSED_MB', 200))  # zip contents, checked before unzipping
+
+    # Text-to-speech: long-lived pyttsx3 engines; audio is cached in the audio store below
+    TTS_ENGINES = int(os.environ.get('TTS_ENGINES', 1))
+    TTS_VOICE = os.environ.get('TTS_VOICE')  # pyttsx3 voice id; default system voice
+    TTS_RATE = int(os.environ.get('TTS_RATE', 150))
+    TTS_VOLUME = float(os.environ.get('TTS_VOLUME', 0.8))
+    TTS_PRERENDER = os.environ.get('TTS_PRERENDER', 'true').lower() in ('1', 'true', 'yes')
+
+    # Generated audio (served from /audio/<file>): one content-addressed directory with TTL + size GC
+    AUDIO_STORE_DIR = os.environ.get('AUDIO_STORE_DIR', os.path.join(tempfile.gettempdir(), 'agrox_audio'))
+    AUDIO_STORE_MAX_MB = int(os.environ.get('AUDIO_STORE_MAX_MB', 256))
+    AUDIO_STORE_TTL = int(os.environ.get('AUDIO_STORE_TTL', 7 * 24 * 3600))
+    AUDIO_STORE_GC_INTERVAL = int(os.environ.get('AUDIO_STORE_GC_INTERVAL', 300))
     
+    # Ollama endpoints and the shared client (keep-alive pool, per-server concurrency limit, wait queue)
+    OLLAMA_URL = os.environ.get('OLLAMA_URL', 'http://127.0.0.1:11434/api/generate')
+    OLLAMA_TAMIL_URL = os.environ.get('OLLAMA_TAMIL_URL', 'http://127.0.0.1:11435/api/generate')
+    LLM_POOL_SIZE = int(os.environ.get('LLM_POOL_SIZE', 8))
+    LLM_MAX_CONCURRENCY = int(os.environ.get('LLM_MAX_CONCURRENCY', 2))  # match OLLAMA_NUM_PARALLEL
+    LLM_MAX_QUEUE = int(os.environ.get('LLM_MAX_QUEUE', 16))
+    LLM_QUEUE_TIMEOUT = float(os.environ.get('LLM_QUEUE_TIMEOUT', 30))
+    LLM_READ_TIMEOUT = float(os.environ.get('LLM_READ_TIMEOUT', 100))
+
+    # LLM health: background probes; N consecutive failures open an endpoint's circuit
+    # (requests fail over to database answers) and it is re-probed after the reset time
+    LLM_HEALTH_INTERVAL = float(os.environ.get('LLM_HEALTH_INTERVAL', 5))
+    LLM_PROBE_TIMEOUT = float(os.environ.get('LLM_PROBE_TIMEOUT', 2))
+    LLM_BREAKER_FAILURES = int(os.environ.get('LLM_BREAKER_FAILURES', 3))
+    LLM_BREAKER_RESET_SECONDS = float(os.environ.get('LLM_BREAKER_RESET_SECONDS', 15))
+
+    # /chat answer cache keyed on (disease context, normalised question); set CHAT_CACHE_SIMILARITY
+    # (e.g. 0.7) to also serve answers to close paraphrases, CHAT_CACHE_PATH to keep answers across restarts
+    CHAT_CACHE_SIZE = int(os.environ.get('CHAT_CACHE_SIZE', 2048))
+    CHAT_CACHE_TTL = int(os.environ.get('CHAT_CACHE_TTL', 7 * 24 * 3600))
+    CHAT_CACHE_PATH = os.environ.get('CHAT_CACHE_PATH')
+    CHAT_CACHE_SIMILARITY = float(os.environ.get('CHAT_CACHE_SIMILARITY', 0.0))  # 0 = exact matches only
+
+    # Retrieval for /chat: passages from disease_info plus any .txt/.md notes in KNOWLEDGE_DIR
+    KNOWLEDGE_DIR = os.environ.get('KNOWLEDGE_DIR', 'knowledge')
+    RAG_TOP_K = int(os.environ.get('RAG_TOP_K', 4))
+    RAG_MAX_TOKENS = int(os.environ.get('RAG_MAX_TOKENS', 200))  # Ollama num_predict cap
+
+    # IoT sensor ingestion (/api/sensor-data/ingest): in-memory ring buffer per (device, metric)
+    SENSOR_BUFFER_CAPACITY = int(os.environ.get('SENSOR_BUFFER_CAPACITY', 10000))  # readings per series
+    SENSOR_MAX_BATCH = int(os.environ.get('SENSOR_MAX_BATCH', 5000))
+    SENSOR_MAX_CLOCK_SKEW = float(os.environ.get('SENSOR_MAX_CLOCK_SKEW', 3600))  # reject readings further ahead
+    # Precomputed min/max/sum/count/last buckets per series: resolution seconds -> buckets kept
+    SENSOR_ROLLUPS = {
+        60: int(os.environ.get('SENSOR_ROLLUP_MINUTES', 2 * 1440)),   # 2 days of 1-minute buckets
+        3600: int(os.environ.get('SENSOR_ROLLUP_HOURS', 90 * 24)),    # 90 days of hourly buckets
+        86400: int(os.environ.get('SENSOR_ROLLUP_DAYS', 2 * 365)),    # 2 years of daily buckets
+    }
+    # Every accepted reading, Gorilla-compressed into fixed-size blocks (see bench_sensor_archive.py)
+    SENSOR_ARCHIVE_DIR = os.environ.get('SENSOR_ARCHIVE_DIR')
+    SENSOR_ARCHIVE_BLOCK_SIZE = int(os.environ.get('SENSOR_ARCHIVE_BLOCK_SIZE', 4096))  # bytes, fixed once created
+    SENSOR_ARCHIVE_FLUSH_INTERVAL = float(os.environ.get('SENSOR_ARCHIVE_FLUSH_INTERVAL', 30))
+    # Readings one history query may decode from the archive; beyond that, blocks are sampled evenly
+    SENSOR_ARCHIVE_MAX_SCAN_POINTS = int(os.environ.get('SENSOR_ARCHIVE_MAX_SCAN_POINTS', 1000000))
+    SENSOR_HISTORY_MAX_POINTS = int(os.environ.get('SENSOR_HISTORY_MAX_POINTS', 1000))
+    SENSOR_INGEST_TOKEN = os.environ.get('SENSOR_INGEST_TOKEN')  # required as X-Device-Token when set
+    # Simulated readings for metrics no device has reported yet (demo installs without ESP32 nodes);
+    # off by default so random values never sit next to real readings - entries are tagged "simulated"
+    SENSOR_DEMO_DATA = os.environ.get('SENSOR_DEMO_DATA', 'false').lower() in ('1', 'true', 'yes')
+
+    # Live dashboard push (/api/sensor-stream, Server-Sent Events). Every open stream holds a worker thread,
+    # so run gunicorn with threaded or gevent workers (gunicorn.conf.py) and keep MAX_CLIENTS well below
+    # the threads per worker; past the cap, or with SENSOR_STREAM_ENABLED off, dashboards poll instead
+    SENSOR_STREAM_ENABLED = os.environ.get('SENSOR_STREAM_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    SENSOR_STREAM_HEARTBEAT = float(os.environ.get('SENSOR_STREAM_HEARTBEAT', 15))
+    SENSOR_STREAM_MAX_PENDING = int(os.environ.get('SENSOR_STREAM_MAX_PENDING', 32))  # per connection, then resync
+    SENSOR_STREAM_MAX_CLIENTS = int(os.environ.get('SENSOR_STREAM_MAX_CLIENTS', 16))  # per worker process
+    SENSOR_STREAM_REFRESH = float(os.environ.get('SENSOR_STREAM_REFRESH', 5))  # re-publish changes, seconds
+    # Directory of per-worker Unix sockets that relay ingested batches to the other workers' dashboards;
+    # gunicorn.conf.py sets one per server, leave unset for a single process
+    SENSOR_PEER_DIR = os.environ.get('SENSOR_PEER_DIR')
+
+    # Server-side sensor alerts: threshold rules (per metric, per crop) plus EWMA z-score anomaly detection
+    SENSOR_RULES_PATH = os.environ.get('SENSOR_RULES_PATH')  # optional JSON overriding the built-in ranges
+    SENSOR_EWMA_ALPHA = float(os.environ.get('SENSOR_EWMA_ALPHA', 0.1))
+    SENSOR_ZSCORE_THRESHOLD = float(os.environ.get('SENSOR_ZSCORE_THRESHOLD', 4.0))
+    SENSOR_ANOMALY_WARMUP = int(os.environ.get('SENSOR_ANOMALY_WARMUP', 20))  # readings before anomalies are flagged
+
     # Add more configuration as needed for IoT, Voice, etc.
@@ -0,0 +1,45 @@
+import re
+import unicodedata
+import zlib
+
+import numpy as np
+
+_WORD = re.compile(r'[^\W_]+', re.UNICODE)
+
+
+def normalize_text(text):
+    """Lower-case, NFKC-normalised words joined by single spaces (Tamil script preserved)"""
+    text = unicodedata.normalize('NFKC', text or '').lower()
+    return ' '.join(_WORD.findall(text))
+
+
+class HashingEmbedder:
+    """Dependency-free sentence vectors from hashed character n-grams.
+
+    Robust to the small spelling and word-order differences between farmer
+    questions ("dosage of captan?" vs "captan dosage") and stable across
+    restarts (crc32, not the salted built-in hash), so stored vectors stay
+    comparable. Any callable ``text -> 1-D vector`` can be used instead.
+    """
+
+    def __init__(self, dim=512, ngram_range=(3, 5)):
+        self.dim = int(dim)
+        self.ngram_range = ngram_range
+
+    def __call__(self, text):
+        return self.embed(text)
+
+    def embed(self, text):
+        vector = np.zeros(self.dim, dtype=np.float32)
+        lo, hi = self.ngram_range
+        for word in normalize_text(text).split():
+            padded = f" {word} "
+            for n in range(lo, hi + 1):
+                for i in range(max(1, len(padded) - n + 1)):
+                    h = zlib.crc32(padded[i:i + n].encode('utf-8'))
+                    vector[h % self.dim] += 1.0 if h & 0x80000000 else -1.0
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def embed_many(self, texts):
+        return np.stack([self.embed(t) for t in texts]) if texts else np.zeros((0, self.dim), dtype=np.float32)
@@ -0,0 +1,113 @@
+"""Export the Keras plant-disease CNN to a lean CPU runtime.
+
+    python export_model.py --format tflite --quantize float16
+    python export_model.py --format tflite --quantize int8 --calibration-dir data/leaves
+    python export_model.py --format onnx
+
+Point Config.MODEL_PATH (env MODEL_PATH) at the output file to serve it, and use
+benchmark_models.py to compare accuracy and latency against the original .h5.
+"""
+import argparse
+import os
+import random
+
+import numpy as np
+
+from config import Config
+from preprocessing import decode_image, image_to_tensor
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif')
+
+
+def list_images(folder):
+    paths = []
+    for root, _, files in os.walk(folder):
+        paths.extend(os.path.join(root, f) for f in files if f.lower().endswith(IMAGE_EXTENSIONS))
+    return sorted(paths)
+
+
+def representative_dataset(folder, samples=200):
+    """Calibration images for int8 quantisation"""
+    paths = list_images(folder)
+    random.Random(0).shuffle(paths)
+
+    def generator():
+        for path in paths[:samples]:
+            yield [image_to_tensor(decode_image(path, Config.IMAGE_SIZE))]
+    return generator
+
+
+def export_tflite(model, output, quantize='none', calibration_dir=None):
+    import tensorflow as tf
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    if quantize == 'float16':
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.target_spec.supported_types = [tf.float16]
+    elif quantize == 'dynamic':
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    elif quantize == 'int8':
+        if not calibration_dir:
+            raise SystemExit("int8 quantisation needs --calibration-dir with sample leaf images")
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.representative_dataset = representative_dataset(calibration_dir)
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        converter.inference_input_type = tf.int8
+        converter.inference_output_type = tf.int8
+
+    with open(output, 'wb') as f:
+        f.write(converter.convert())
+
+
+def export_onnx(model, output, quantize='none'):
+    import tensorflow as tf
+    try:
+        import tf2onnx
+    except ImportError:
+        raise SystemExit("ONNX export needs tf2onnx: pip install tf2onnx onnxruntime")
+
+    height, width = Config.IMAGE_SIZE[1], Config.IMAGE_SIZE[0]
+    spec = (tf.TensorSpec((None, height, width, 3), tf.float32, name='input'),)
+    tf2onnx.convert.from_keras(model, input_signature=spec, opset=13, output_path=output)
+
+    if quantize == 'int8' or quantize == 'dynamic':
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+        quantized = output.replace('.onnx', '.int8.onnx')
+        quantize_dynamic(output, quantized, weight_type=QuantType.QInt8)
+        os.replace(quantized, output)
+    elif quantize == 'float16':
+        import onnx
+        from onnxconverter_common import float16
+        onnx.save(float16.convert_float_to_float16(onnx.load(output), keep_io_types=True), output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the disease classifier for CPU serving")
+    parser.add_argument('--model', default='model/plant_disease_model.h5', help="Source Keras model")
+    parser.add_argument('--format', choices=['tflite', 'onnx'], default='tflite')
+    parser.add_argument('--quantize', choices=['none', 'dynamic', 'float16', 'int8'], default='none')
+    parser.add_argument('--calibration-dir', help="Folder of leaf images for int8 calibration")
+    parser.add_argument('--output', help="Output path (default: next to the source model)")
+    args = parser.parse_args()
+
+    from tensorflow.keras.models import load_model
+
+    suffix = '' if args.quantize == 'none' else f'.{args.quantize}'
+    output = args.output or os.path.splitext(args.model)[0] + f'{suffix}.{args.format}'
+
+    print(f"Loading {args.model}...")
+    model = load_model(args.model)
+
+    if args.format == 'tflite':
+        export_tflite(model, output, args.quantize, args.calibration_dir)
+    else:
+        export_onnx(model, output, args.quantize)
+
+    src_mb = os.path.getsize(args.model) / 1e6
+    out_mb = os.path.getsize(output) / 1e6
+    print(f"✅ Exported {output} ({out_mb:.1f} MB, {src_mb:.1f} MB source)")
+    print(f"   Serve it with: MODEL_PATH={output}")
+
+
+if __name__ == '__main__':
+    main()
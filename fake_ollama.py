@@ -0,0 +1,105 @@
+"""Minimal stand-in for an Ollama server, for exercising the chat paths without a GPU.
+
+    python fake_ollama.py --port 11434 --token-delay 0.05
+    OLLAMA_URL=http://127.0.0.1:11434/api/generate python app.py
+
+Serves /api/version and /api/generate (streaming and non-streaming). Every
+generation is counted; GET /stats shows how many actually ran, which makes
+request coalescing and concurrency limits easy to check.
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_REPLY = ("Spray early in the morning and wear gloves. "
+                 "Repeat after ten days if symptoms continue. "
+                 "Remove badly infected leaves to slow the spread.")
+
+
+class FakeOllama(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, like the real server
+    reply = DEFAULT_REPLY
+    token_delay = 0.0
+    lock = threading.Lock()
+    stats = {'generations': 0, 'active': 0, 'max_active': 0}
+
+    def log_message(self, fmt, *args):
+        pass
+
+    def _json(self, body, status=200):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == '/api/version':
+            self._json({'version': '0.0.0-fake'})
+        elif self.path == '/stats':
+            with self.lock:
+                self._json(dict(self.stats))
+        else:
+            self._json({'error': 'not found'}, 404)
+
+    def do_POST(self):
+        if self.path != '/api/generate':
+            return self._json({'error': 'not found'}, 404)
+        payload = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        with self.lock:
+            self.stats['generations'] += 1
+            self.stats['active'] += 1
+            self.stats['max_active'] = max(self.stats['max_active'], self.stats['active'])
+        try:
+            tokens = [word + ' ' for word in self.reply.split()]
+            if payload.get('stream', True):
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/x-ndjson')
+                self.end_headers()
+                for token in tokens:
+                    time.sleep(self.token_delay)
+                    self.wfile.write(json.dumps({'response': token, 'done': False}).encode('utf-8') + b'\n')
+                    self.wfile.flush()
+                self.wfile.write(json.dumps({'response': '', 'done': True}).encode('utf-8') + b'\n')
+                self.close_connection = True  # no Content-Length: end of body is end of connection
+            else:
+                time.sleep(self.token_delay * len(tokens))
+                self._json({'model': payload.get('model'), 'response': ''.join(tokens).strip(), 'done': True})
+        finally:
+            with self.lock:
+                self.stats['active'] -= 1
+
+
+def serve(port=11434, token_delay=0.0, reply=DEFAULT_REPLY):
+    """Run a fake server on 127.0.0.1:port in a daemon thread and return it"""
+    handler = type('Handler', (FakeOllama,), {
+        'reply': reply,
+        'token_delay': token_delay,
+        'lock': threading.Lock(),
+        'stats': {'generations': 0, 'active': 0, 'max_active': 0},
+    })
+    server = ThreadingHTTPServer(('127.0.0.1', port), handler)
+    threading.Thread(target=server.serve_forever, name='fake-ollama', daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Ollama server for local testing")
+    parser.add_argument('--port', type=int, default=11434)
+    parser.add_argument('--token-delay', type=float, default=0.05, help="Seconds per generated token")
+    parser.add_argument('--reply', default=DEFAULT_REPLY)
+    args = parser.parse_args()
+
+    server = serve(args.port, args.token_delay, args.reply)
+    print(f"🧪 Fake Ollama listening on http://127.0.0.1:{args.port}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+"""Gunicorn settings, picked up automatically by ``gunicorn app:app`` from this directory.
+
+Live dashboards (/api/sensor-stream) keep a request open for as long as the page
+is, so sync workers would be used up by a handful of browsers and starve
+/detect and /chat. Threaded workers give each stream its own thread;
+SENSOR_STREAM_MAX_CLIENTS caps streams per worker below the thread count.
+"""
+import os
+import tempfile
+
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')  # or 'gevent'
+threads = int(os.environ.get('GUNICORN_THREADS', 32))
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+
+# Workers relay sensor batches to each other through per-process sockets here (see SensorPeers)
+os.environ.setdefault('SENSOR_PEER_DIR', os.path.join(tempfile.gettempdir(), f"agrox-sensor-peers-{os.getpid()}"))
+
+
+def _loaded_app():
+    """The app module if it was preloaded into this process (master, or a worker forked from it)"""
+    import sys
+    return sys.modules.get('app')
+
+
+def when_ready(server):
+    app = _loaded_app()
+    if app is not None and app.sensor_peers is not None:
+        # preload_app imported the app here; the master serves no dashboards, so it must not take batches
+        app.sensor_peers.stop()
+
+
+def post_fork(server, worker):
+    app = _loaded_app()
+    if app is None:
+        return  # not preloaded: the worker starts all of this when it imports the app
+    if app.sensor_peers is not None:
+        # Bind at boot, not on the first request, so every worker sees every batch from the start
+        app.sensor_peers.start()
+    # Threads started in the master are not running here
+    app.llm_monitor.start()
@@ -0,0 +1,238 @@
+import threading
+import queue
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class BatchInferenceEngine:
+    """Micro-batching front for the disease classifier.
+
+    Callers submit preprocessed tensors; a single worker thread collects up to
+    ``max_batch_size`` images (or waits at most ``max_wait_ms``) and runs one
+    batched forward pass, then hands each caller back its own rows.
+    """
+
+    def __init__(self, predict_fn, max_batch_size=8, max_wait_ms=10):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, max_wait_ms / 1000.0)
+        self._queue = queue.Queue()
+        self._carry = None  # request that did not fit the previous batch
+        self._worker = None
+        self._lock = threading.Lock()
+        self._metrics_lock = threading.Lock()
+        self._metrics = {
+            'requests': 0,
+            'batches': 0,
+            'images': 0,
+            'errors': 0,
+            'last_batch_size': 0,
+            'max_batch_size_seen': 0,
+            'total_queue_wait_ms': 0.0,
+            'max_queue_wait_ms': 0.0,
+            'batch_size_histogram': {},
+        }
+
+    def _ensure_worker(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name='batch-inference', daemon=True)
+                self._worker.start()
+
+    def submit(self, tensor):
+        """Queue a tensor of shape (n, H, W, C) or (H, W, C); returns a Future"""
+        tensor = np.asarray(tensor, dtype=np.float32)
+        if tensor.ndim == 3:
+            tensor = tensor[np.newaxis, ...]
+        future = Future()
+        self._ensure_worker()
+        self._queue.put((tensor, future, time.perf_counter()))
+        return future
+
+    def predict(self, tensor, timeout=None):
+        """Blocking helper mirroring ``model.predict`` for a single request"""
+        return self.submit(tensor).result(timeout=timeout)
+
+    def _collect(self):
+        first, self._carry = self._carry or self._queue.get(), None
+        items = [first]
+        count = first[0].shape[0]
+        deadline = time.perf_counter() + self.max_wait
+        while count < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if count + item[0].shape[0] > self.max_batch_size:
+                # Never exceed max_batch_size (traced/fixed-shape models); it leads the next batch
+                self._carry = item
+                break
+            items.append(item)
+            count += item[0].shape[0]
+        return items, count
+
+    def _predict(self, batch):
+        """predict_fn over slices of at most max_batch_size (a single request may be larger)"""
+        if batch.shape[0] <= self.max_batch_size:
+            return np.asarray(self.predict_fn(batch))
+        return np.concatenate([np.asarray(self.predict_fn(batch[i:i + self.max_batch_size]))
+                               for i in range(0, batch.shape[0], self.max_batch_size)], axis=0)
+
+    def _run(self):
+        while True:
+            items, count = self._collect()
+            started = time.perf_counter()
+            waits = [(started - enqueued) * 1000.0 for _, _, enqueued in items]
+
+            try:
+                batch = items[0][0] if len(items) == 1 else np.concatenate([t for t, _, _ in items], axis=0)
+                preds = self._predict(batch)
+                offset = 0
+                for tensor, future, _ in items:
+                    n = tensor.shape[0]
+                    future.set_result(preds[offset:offset + n])
+                    offset += n
+                failed = False
+            except Exception as e:
+                print(f"❌ Batch inference error: {e}")
+                for _, future, _ in items:
+                    if not future.done():
+                        future.set_exception(e)
+                failed = True
+
+            self._record(len(items), count, waits, failed)
+
+    def _record(self, requests, images, waits, failed):
+        with self._metrics_lock:
+            m = self._metrics
+            m['requests'] += requests
+            m['batches'] += 1
+            m['images'] += images
+            m['errors'] += int(failed)
+            m['last_batch_size'] = images
+            m['max_batch_size_seen'] = max(m['max_batch_size_seen'], images)
+            m['total_queue_wait_ms'] += sum(waits)
+            m['max_queue_wait_ms'] = max(m['max_queue_wait_ms'], max(waits))
+            hist = m['batch_size_histogram']
+            hist[images] = hist.get(images, 0) + 1
+
+    def metrics(self):
+        """Snapshot of batch-size and queue-wait counters"""
+        with self._metrics_lock:
+            m = dict(self._metrics)
+            m['batch_size_histogram'] = {str(k): v for k, v in sorted(m['batch_size_histogram'].items())}
+        m['queue_depth'] = self._queue.qsize()
+        m['avg_batch_size'] = round(m['images'] / m['batches'], 2) if m['batches'] else 0.0
+        m['avg_queue_wait_ms'] = round(m['total_queue_wait_ms'] / m['requests'], 3) if m['requests'] else 0.0
+        m['total_queue_wait_ms'] = round(m['total_queue_wait_ms'], 3)
+        m['max_queue_wait_ms'] = round(m['max_queue_wait_ms'], 3)
+        m['config'] = {
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000.0,
+        }
+        return m
+
+
+class TFLiteModel:
+    """Keras-compatible ``predict`` over a TFLite interpreter (float or int8)"""
+
+    def __init__(self, path, num_threads=None):
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            import tensorflow as tf
+            Interpreter = tf.lite.Interpreter
+        self.path = path
+        self.interpreter = Interpreter(model_path=path, num_threads=num_threads)
+        self.interpreter.allocate_tensors()
+        self._input = self.interpreter.get_input_details()[0]
+        self._output = self.interpreter.get_output_details()[0]
+        self._batch = int(self._input['shape'][0])
+        self._lock = threading.Lock()
+
+    def _resize(self, batch_size):
+        if batch_size != self._batch:
+            shape = list(self._input['shape'])
+            shape[0] = batch_size
+            self.interpreter.resize_tensor_input(self._input['index'], shape)
+            self.interpreter.allocate_tensors()
+            self._input = self.interpreter.get_input_details()[0]
+            self._output = self.interpreter.get_output_details()[0]
+            self._batch = batch_size
+
+    def predict(self, batch, verbose=0):
+        batch = np.asarray(batch, dtype=np.float32)
+        with self._lock:
+            self._resize(batch.shape[0])
+            dtype = self._input['dtype']
+            if dtype != np.float32:
+                scale, zero_point = self._input['quantization']
+                info = np.iinfo(dtype)
+                batch = np.clip(np.round(batch / scale + zero_point), info.min, info.max).astype(dtype)
+            self.interpreter.set_tensor(self._input['index'], batch)
+            self.interpreter.invoke()
+            preds = self.interpreter.get_tensor(self._output['index'])
+            if preds.dtype != np.float32:
+                scale, zero_point = self._output['quantization']
+                preds = (preds.astype(np.float32) - zero_point) * scale
+            return preds.copy()
+
+
+class OnnxModel:
+    """Keras-compatible ``predict`` over an onnxruntime CPU session"""
+
+    def __init__(self, path, num_threads=None):
+        import onnxruntime as ort
+        options = ort.SessionOptions()
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.path = path
+        self.session = ort.InferenceSession(path, options, providers=['CPUExecutionProvider'])
+        self._input_name = self.session.get_inputs()[0].name
+
+    def predict(self, batch, verbose=0):
+        batch = np.asarray(batch, dtype=np.float32)
+        return self.session.run(None, {self._input_name: batch})[0]
+
+
+class CompiledKerasModel:
+    """Keras model behind a traced ``tf.function`` with a fixed input signature.
+
+    ``model.predict`` builds a data adapter, progress bar and callback list on
+    every call; this traces the forward pass once for (batch, H, W, 3) float32
+    inputs and calls it directly.
+    """
+
+    def __init__(self, model, image_size=(224, 224), warmup_batch_sizes=(1,)):
+        import tensorflow as tf
+        self.model = model
+        self._tf = tf
+        spec = tf.TensorSpec((None, image_size[1], image_size[0], 3), tf.float32)
+        self._forward = tf.function(lambda x: model(x, training=False), input_signature=[spec])
+        for n in warmup_batch_sizes:
+            self.predict(np.zeros((n, image_size[1], image_size[0], 3), dtype=np.float32))
+
+    def predict(self, batch, verbose=0):
+        batch = np.asarray(batch, dtype=np.float32)
+        return self._forward(self._tf.constant(batch)).numpy()
+
+
+def load_classifier_model(path, num_threads=None, compiled=True, image_size=(224, 224), warmup_batch_sizes=(1,)):
+    """Load the classifier for the runtime implied by the file extension"""
+    ext = path.rsplit('.', 1)[-1].lower()
+    if ext == 'tflite':
+        return TFLiteModel(path, num_threads=num_threads)
+    if ext == 'onnx':
+        return OnnxModel(path, num_threads=num_threads)
+    from tensorflow.keras.models import load_model
+    model = load_model(path)
+    if compiled:
+        return CompiledKerasModel(model, image_size=image_size, warmup_batch_sizes=warmup_batch_sizes)
+    return model
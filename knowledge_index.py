@@ -0,0 +1,109 @@
+import os
+import threading
+import time
+from collections import deque
+from typing import NamedTuple
+
+import numpy as np
+
+from labels import display_name, label_key
+
+DOCUMENT_EXTENSIONS = ('.txt', '.md')
+
+
+class Passage(NamedTuple):
+    id: str
+    source: str
+    disease: str  # disease_info key, or '' for general agronomy notes
+    text: str
+
+
+def disease_passages(disease_info):
+    """Split every disease record into short, separately retrievable passages"""
+    for key, info in disease_info.items():
+        name = display_name(key)
+        yield Passage(f"{key}#treatment", 'disease_info', key,
+                      f"{name} treatment: {info['treatment']}. Pesticide: {info['pesticide']}, "
+                      f"dosage {info['dosage']}, cost about {info['cost']}.")
+        yield Passage(f"{key}#steps", 'disease_info', key,
+                      f"{name} application steps: " + '; '.join(info['steps']) + '.')
+        yield Passage(f"{key}#timing", 'disease_info', key,
+                      f"{name} timing: {info['timing']}. Safety: {info['safety']}")
+        yield Passage(f"{key}#prevention", 'disease_info', key,
+                      f"{name} prevention: {info['prevention']}.")
+
+
+def document_passages(folder, max_chars=600):
+    """Paragraph-sized passages from the .txt/.md agronomy notes in ``folder``"""
+    if not folder or not os.path.isdir(folder):
+        return
+    for name in sorted(os.listdir(folder)):
+        if not name.lower().endswith(DOCUMENT_EXTENSIONS):
+            continue
+        with open(os.path.join(folder, name), encoding='utf-8') as f:
+            paragraphs = [p.strip() for p in f.read().split('\n\n') if p.strip()]
+        chunk, index = '', 0
+        for paragraph in paragraphs:
+            if chunk and len(chunk) + len(paragraph) > max_chars:
+                yield Passage(f"{name}#{index}", name, '', chunk)
+                chunk, index = '', index + 1
+            chunk = f"{chunk}\n{paragraph}" if chunk else paragraph
+        if chunk:
+            yield Passage(f"{name}#{index}", name, '', chunk)
+
+
+class KnowledgeIndex:
+    """In-memory embedding index over disease records and agronomy notes.
+
+    Passage vectors are computed once into a single (N, dim) matrix, so a search
+    is one query embedding plus one matrix-vector product. When the farmer's
+    disease is known, its own passages always come first and the rest is filled
+    from the general notes only - another disease's dosage never reaches the prompt.
+    """
+
+    def __init__(self, passages, embed):
+        self.passages = tuple(passages)
+        self.embed = embed
+        texts = [p.text for p in self.passages]
+        if hasattr(embed, 'embed_many'):
+            self.matrix = np.asarray(embed.embed_many(texts), dtype=np.float32)
+        else:
+            self.matrix = np.stack([np.asarray(embed(t), dtype=np.float32) for t in texts])
+        self._diseases = np.array([label_key(p.disease) for p in self.passages])
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=500)
+
+    def __len__(self):
+        return len(self.passages)
+
+    def search(self, query, k=4, disease=None):
+        """Top-k (passage, score) pairs for a question, best first"""
+        started = time.perf_counter()
+        scores = self.matrix @ np.asarray(self.embed(query), dtype=np.float32)
+        own = self._diseases == label_key(disease) if disease else None
+        if own is not None and own.any():
+            candidates = (np.flatnonzero(own), np.flatnonzero(self._diseases == label_key('')))
+        else:
+            candidates = (np.arange(len(scores)),)
+        top = []
+        for pool in candidates:
+            take = min(k - len(top), len(pool))
+            if take <= 0:
+                break
+            best = pool[np.argpartition(-scores[pool], take - 1)[:take]]
+            top.extend(best[np.argsort(-scores[best])].tolist())
+        results = [(self.passages[i], float(scores[i])) for i in top]
+        with self._lock:
+            self._latencies.append((time.perf_counter() - started) * 1000.0)
+        return results
+
+    def metrics(self):
+        with self._lock:
+            latencies = np.array(self._latencies) if self._latencies else None
+        return {
+            'passages': len(self.passages),
+            'sources': sorted({p.source for p in self.passages}),
+            'searches_recorded': 0 if latencies is None else len(latencies),
+            'search_ms_p50': round(float(np.percentile(latencies, 50)), 4) if latencies is not None else None,
+            'search_ms_p95': round(float(np.percentile(latencies, 95)), 4) if latencies is not None else None,
+        }
@@ -0,0 +1,202 @@
+import ast
+import hashlib
+import os
+import re
+import threading
+import time
+from types import MappingProxyType
+from typing import NamedTuple
+
+import numpy as np
+
+
+# LabelIndex.reload outcomes
+RELOADED, UNCHANGED, FAILED = 'reloaded', 'unchanged', 'failed'
+
+
+class LabelIndexError(ValueError):
+    """class_indices.txt does not line up with the disease database"""
+
+
+def label_key(name):
+    """Naming-scheme independent key: 'Apple___Apple_scab' and 'Apple__Apple_scab' match"""
+    return re.sub(r'[^a-z0-9]', '', name.lower())
+
+
+def display_name(key):
+    """'Tomato__Late_blight' -> 'Tomato → Late_blight'"""
+    return key.replace("__", " → ").replace("_(", " (")
+
+
+def freeze_info(info):
+    return MappingProxyType({k: tuple(v) if isinstance(v, list) else v for k, v in info.items()})
+
+
+class LabelEntry(NamedTuple):
+    index: int
+    key: str
+    display_name: str
+    info: MappingProxyType
+
+
+class LabelTable:
+    """Immutable index -> (key, display name, disease info) table for the classifier outputs"""
+
+    def __init__(self, keys, info_lookup):
+        self.entries = tuple(
+            LabelEntry(i, key, display_name(key), freeze_info(info_lookup(key)))
+            for i, key in enumerate(keys)
+        )
+        self.by_key = MappingProxyType({e.key: e for e in self.entries})
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __getitem__(self, index):
+        return self.entries[index]
+
+    def top_k(self, probs, k=3, temperature=1.0):
+        """Top-k (entry, calibrated probability) pairs, highest first"""
+        probs = calibrate(probs, temperature)
+        if probs.shape[-1] != len(self.entries):
+            raise LabelIndexError(f"model returned {probs.shape[-1]} classes, label index has {len(self.entries)}")
+        k = min(k, probs.shape[-1])
+        top = np.argpartition(-probs, k - 1)[:k]
+        top = top[np.argsort(-probs[top])]
+        return [(self.entries[i], float(probs[i])) for i in top]
+
+
+def calibrate(probs, temperature=1.0):
+    """Temperature-scale a softmax output (T > 1 softens overconfident predictions)"""
+    probs = np.asarray(probs, dtype=np.float64).ravel()
+    if temperature == 1.0:
+        return probs
+    logits = np.log(np.clip(probs, 1e-12, 1.0)) / temperature
+    logits -= logits.max()
+    scaled = np.exp(logits)
+    return scaled / scaled.sum()
+
+
+def fit_temperature(probs, labels, grid=None):
+    """Temperature minimising negative log-likelihood on held-out predictions"""
+    probs = np.clip(np.asarray(probs, dtype=np.float64), 1e-12, 1.0)
+    logits = np.log(probs)
+    labels = np.asarray(labels)
+    best_t, best_nll = 1.0, np.inf
+    for t in (grid if grid is not None else np.linspace(0.5, 5.0, 46)):
+        scaled = logits / t
+        scaled -= scaled.max(axis=1, keepdims=True)
+        log_norm = np.log(np.exp(scaled).sum(axis=1))
+        nll = float(np.mean(log_norm - scaled[np.arange(len(labels)), labels]))
+        if nll < best_nll:
+            best_t, best_nll = float(t), nll
+    return best_t, best_nll
+
+
+def load_class_indices(path):
+    """Parse class_indices.txt ({'Apple___Apple_scab': 0, ...}) into output-ordered names"""
+    with open(path, encoding='utf-8') as f:
+        mapping = ast.literal_eval(f.read().strip())
+    if not isinstance(mapping, dict) or not mapping:
+        raise LabelIndexError(f"{path}: expected a non-empty {{name: index}} dict")
+    indices = sorted(mapping.values())
+    if indices != list(range(len(mapping))):
+        raise LabelIndexError(f"{path}: indices must be unique and contiguous from 0")
+    names = [None] * len(mapping)
+    for name, idx in mapping.items():
+        names[idx] = name
+    return names
+
+
+def file_digest(path):
+    """Short content hash of class_indices.txt - the same in every process for the same mapping"""
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()[:16]
+
+
+def build_label_table(path, disease_keys, info_lookup):
+    """Map every model output index to its disease record, or raise LabelIndexError"""
+    known = {}
+    for key in disease_keys:
+        known.setdefault(label_key(key), key)
+
+    names = load_class_indices(path)
+    keys, missing, seen = [], [], {}
+    for idx, name in enumerate(names):
+        key = known.get(label_key(name))
+        if key is None:
+            missing.append(f"{idx}:{name}")
+        elif key in seen:
+            missing.append(f"{idx}:{name} (same record as index {seen[key]})")
+        else:
+            seen[key] = idx
+            keys.append(key)
+    if missing:
+        raise LabelIndexError(f"{path}: no matching disease record for " + ', '.join(missing))
+    return LabelTable(keys, info_lookup)
+
+
+class LabelIndex:
+    """Validated label table that follows class_indices.txt on disk.
+
+    The file is checked at most every ``check_interval`` seconds; when it changes
+    the table is rebuilt and swapped in atomically and ``on_reload`` runs (e.g. to
+    reload the model). A broken file keeps the previous table.
+    """
+
+    def __init__(self, path, disease_keys, info_lookup, on_reload=None, check_interval=5.0):
+        self.path = path
+        self.disease_keys = disease_keys
+        self.info_lookup = info_lookup
+        self.on_reload = on_reload
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._mtime = os.path.getmtime(path)
+        self._checked_at = time.monotonic()
+        self.table = build_label_table(path, disease_keys, info_lookup)
+        self.digest = file_digest(path)
+        self.version = 1
+        self.last_error = None
+
+    def maybe_reload(self):
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return False
+        self._checked_at = now
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return False
+        return mtime != self._mtime and self.reload() == RELOADED
+
+    def reload(self):
+        """RELOADED, UNCHANGED (same content) or FAILED (previous table kept, see ``last_error``)"""
+        with self._lock:
+            try:
+                mtime = os.path.getmtime(self.path)
+                table = build_label_table(self.path, self.disease_keys, self.info_lookup)
+                digest = file_digest(self.path)
+            except (OSError, SyntaxError, ValueError) as e:
+                self.last_error = str(e)
+                print(f"❌ Label index reload failed, keeping version {self.version}: {e}")
+                return FAILED
+            self._mtime = mtime
+            self.last_error = None
+            if digest == self.digest:
+                return UNCHANGED  # touched but unchanged
+            self.digest = digest
+            self.table = table
+            self.version += 1
+        print(f"🔄 Label index reloaded: {len(table)} classes (version {self.version})")
+        if self.on_reload:
+            self.on_reload(table)
+        return RELOADED
+
+    def status(self):
+        return {
+            'path': self.path,
+            'classes': len(self.table),
+            'version': self.version,
+            'digest': self.digest,
+            'last_error': self.last_error,
+        }
@@ -0,0 +1,129 @@
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+
+# name -> LazyResource, in registration order (used for the startup report)
+REGISTRY = OrderedDict()
+
+
+class LazyResource:
+    """Thread-safe, load-once wrapper around an expensive subsystem.
+
+    ``loader`` is called with the resource itself so it can time its phases:
+
+        def load_classifier(res):
+            with res.phase('import'):
+                from tensorflow.keras.models import load_model
+            with res.phase('load'):
+                return load_model(path)
+    """
+
+    def __init__(self, name, loader, retry_after=30.0, max_retry_after=900.0):
+        self.name = name
+        self.loader = loader
+        # A failed load is retried on the next get() after a backoff that doubles per failure
+        self.retry_after = retry_after
+        self.max_retry_after = max_retry_after
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._value = None
+        self._failures = 0
+        self._retry_at = 0.0
+        self.timings = OrderedDict()
+        self.error = None
+        self.loaded_at = None
+        REGISTRY[name] = self
+
+    @property
+    def loaded(self):
+        return self._loaded
+
+    @contextmanager
+    def phase(self, label):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[label] = round(time.perf_counter() - started, 4)
+
+    def _due(self):
+        return not self._loaded or (self.error is not None and time.monotonic() >= self._retry_at)
+
+    def get(self):
+        """Load on first use; concurrent callers wait for the same load"""
+        if not self._due():
+            return self._value
+        with self._lock:
+            if self._due():
+                print(f"⏳ Loading {self.name}..." if not self._failures else
+                      f"🔄 Retrying {self.name} (attempt {self._failures + 1})...")
+                started = time.perf_counter()
+                try:
+                    self._value = self.loader(self)
+                    self.error = None
+                    self._failures = 0
+                except Exception as e:
+                    self._value = None
+                    self.error = str(e)
+                    self._failures += 1
+                    backoff = min(self.retry_after * 2 ** (self._failures - 1), self.max_retry_after)
+                    self._retry_at = time.monotonic() + backoff
+                self.timings['total'] = round(time.perf_counter() - started, 4)
+                self.loaded_at = time.time()
+                self._loaded = True
+                if self.error is None:
+                    print(f"✅ {self.name} ready in {self.timings['total']:.2f}s")
+                else:
+                    print(f"❌ Error loading {self.name}: {self.error} (retrying in {backoff:.0f}s)")
+        return self._value
+
+    def reset(self):
+        """Drop the loaded value so the next get() loads again"""
+        with self._lock:
+            self._loaded = False
+            self._value = None
+            self.error = None
+            self._failures = 0
+            self.timings = OrderedDict()
+
+    def peek(self):
+        """Current value without triggering a load"""
+        return self._value if self._loaded else None
+
+    def report(self):
+        return {
+            'loaded': self._loaded,
+            'available': self._loaded and self._value is not None,
+            'seconds': dict(self.timings),
+            'error': self.error,
+            'failures': self._failures,
+            'retry_in_seconds': round(max(0.0, self._retry_at - time.monotonic()), 1) if self.error else None,
+        }
+
+
+def warm_up(names, background=True):
+    """Load the named subsystems now (in a daemon thread by default)"""
+    resources = [REGISTRY[n] for n in names if n in REGISTRY]
+    unknown = [n for n in names if n not in REGISTRY]
+    if unknown:
+        print(f"⚠️ Unknown warm-up subsystems: {', '.join(unknown)}")
+
+    def run():
+        for res in resources:
+            res.get()
+
+    if not resources:
+        return None
+    if background:
+        thread = threading.Thread(target=run, name='warm-up', daemon=True)
+        thread.start()
+        return thread
+    run()
+    return None
+
+
+def startup_report():
+    """Import and load cost of every registered subsystem"""
+    return OrderedDict((name, res.report()) for name, res in REGISTRY.items())
@@ -0,0 +1,217 @@
+import json
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from urllib.parse import urlsplit
+
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+
+from llm_health import CircuitBreaker
+
+
+class LLMBusyError(RuntimeError):
+    """Endpoint is at its concurrency limit and the wait queue is full (or timed out)"""
+
+
+class LLMUnavailableError(RuntimeError):
+    """Endpoint's circuit breaker is open - answer from the database instead"""
+
+
+class LLMStatusError(RuntimeError):
+    """Ollama answered with a non-200 status"""
+
+    def __init__(self, status_code):
+        super().__init__(f"LLM service error (Status: {status_code})")
+        self.status_code = status_code
+
+
+def is_endpoint_failure(error):
+    """Whether an error says the server is unhealthy (5xx, timeout, connection) rather than the request being bad"""
+    if isinstance(error, LLMStatusError):
+        return error.status_code >= 500
+    return isinstance(error, (requests.exceptions.Timeout, requests.exceptions.ConnectionError))
+
+
+class LLMEndpoint:
+    """Keep-alive connection pool, concurrency limit and circuit breaker for one Ollama server"""
+
+    def __init__(self, base_url, pool_size=8, max_concurrency=4, max_queue=16, breaker=None):
+        self.base_url = base_url
+        self.breaker = breaker or CircuitBreaker(base_url)
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.max_queue = max(0, int(max_queue))
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(pool_size, self.max_concurrency))
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+        self._lock = threading.Lock()
+        self._waiting = 0
+        self._active = 0
+        self._latencies = deque(maxlen=500)
+        self._metrics = {'requests': 0, 'streams': 0, 'coalesced': 0, 'rejected': 0, 'errors': 0, 'short_circuited': 0}
+
+    def acquire(self, timeout):
+        """Take a generation slot, waiting at most ``timeout`` seconds behind other requests"""
+        if not self.breaker.allow():
+            with self._lock:
+                self._metrics['short_circuited'] += 1
+            raise LLMUnavailableError(f"{self.base_url} is unavailable ({self.breaker.last_error})")
+        with self._lock:
+            if self._waiting >= self.max_queue and self._active >= self.max_concurrency:
+                self._metrics['rejected'] += 1
+                raise LLMBusyError(f"{self.base_url}: {self._active} generations running, {self._waiting} queued")
+            self._waiting += 1
+        acquired = self._slots.acquire(timeout=timeout)
+        with self._lock:
+            self._waiting -= 1
+            if not acquired:
+                self._metrics['rejected'] += 1
+                raise LLMBusyError(f"{self.base_url}: no free slot after {timeout:.0f}s")
+            self._active += 1
+
+    def release(self):
+        with self._lock:
+            self._active -= 1
+        self._slots.release()
+
+    def record(self, kind, latency_ms=None, failed=False, error=None):
+        if error is not None and is_endpoint_failure(error):
+            self.breaker.record_failure(error)
+        elif kind != 'coalesced' and (error is None or isinstance(error, LLMStatusError)):
+            # A 4xx (missing model, bad request) still means the server is up; it must not open the circuit
+            self.breaker.record_success()
+        with self._lock:
+            self._metrics[kind] += 1
+            self._metrics['errors'] += int(failed)
+            if latency_ms is not None and not failed:
+                self._latencies.append(latency_ms)
+
+    def metrics(self):
+        with self._lock:
+            m = dict(self._metrics)
+            m['active'] = self._active
+            m['waiting'] = self._waiting
+            latencies = np.array(self._latencies) if self._latencies else None
+        m['latency_ms_p50'] = round(float(np.percentile(latencies, 50)), 1) if latencies is not None else None
+        m['latency_ms_p95'] = round(float(np.percentile(latencies, 95)), 1) if latencies is not None else None
+        m['config'] = {'max_concurrency': self.max_concurrency, 'max_queue': self.max_queue}
+        return m
+
+
+class LLMClient:
+    """Pooled Ollama client shared by every chat path.
+
+    One ``LLMEndpoint`` (session + slot limit) per server, keyed by scheme and
+    host, so the English chat, the voice assistant and /chat all reuse the same
+    keep-alive connections. Identical non-streaming requests that are already
+    in flight are coalesced: followers wait for the leader's answer instead of
+    starting another generation.
+    """
+
+    def __init__(self, pool_size=8, max_concurrency=4, max_queue=16, queue_timeout=10.0,
+                 connect_timeout=5.0, read_timeout=100.0, failure_threshold=3, reset_timeout=15.0):
+        self.pool_size = pool_size
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.timeout = (connect_timeout, read_timeout)
+        self._endpoints = {}
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def endpoint(self, url):
+        parts = urlsplit(url)
+        base = f"{parts.scheme}://{parts.netloc}"
+        with self._lock:
+            endpoint = self._endpoints.get(base)
+            if endpoint is None:
+                endpoint = self._endpoints[base] = LLMEndpoint(
+                    base, self.pool_size, self.max_concurrency, self.max_queue,
+                    CircuitBreaker(base, self.failure_threshold, self.reset_timeout))
+        return endpoint
+
+    def endpoints(self):
+        with self._lock:
+            return list(self._endpoints.values())
+
+    def generate(self, url, payload):
+        """POST a non-streaming generate request and return Ollama's JSON body"""
+        payload = dict(payload, stream=False)
+        endpoint = self.endpoint(url)
+        key = url + '\0' + json.dumps(payload, sort_keys=True, ensure_ascii=False)
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+        if not leader:
+            endpoint.record('coalesced')
+            return future.result(timeout=self.queue_timeout + self.timeout[1])
+
+        try:
+            future.set_result(self._post(endpoint, url, payload))
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+        return future.result()
+
+    def _post(self, endpoint, url, payload):
+        endpoint.acquire(self.queue_timeout)
+        started = time.perf_counter()
+        error = None
+        try:
+            response = endpoint.session.post(url, json=payload, timeout=self.timeout)
+            if response.status_code != 200:
+                raise LLMStatusError(response.status_code)
+            return response.json()
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            endpoint.release()
+            endpoint.record('requests', (time.perf_counter() - started) * 1000.0, error is not None, error)
+
+    def stream(self, url, payload):
+        """Yield response tokens as Ollama generates them (holds one slot until done)"""
+        payload = dict(payload, stream=True)
+        endpoint = self.endpoint(url)
+        endpoint.acquire(self.queue_timeout)
+        started = time.perf_counter()
+        error = None
+        try:
+            with endpoint.session.post(url, json=payload, stream=True, timeout=self.timeout) as response:
+                if response.status_code != 200:
+                    raise LLMStatusError(response.status_code)
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    if chunk.get('response'):
+                        yield chunk['response']
+                    if chunk.get('done'):
+                        break
+        except GeneratorExit:
+            raise  # client went away mid-answer; the connection is simply closed
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            endpoint.release()
+            endpoint.record('streams', (time.perf_counter() - started) * 1000.0, error is not None, error)
+
+    def metrics(self):
+        with self._lock:
+            endpoints = dict(self._endpoints)
+            inflight = len(self._inflight)
+        return {
+            'inflight_unique_prompts': inflight,
+            'endpoints': {base: e.metrics() for base, e in endpoints.items()},
+        }
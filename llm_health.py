@@ -0,0 +1,143 @@
+import os
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker for one LLM endpoint.
+
+    ``failure_threshold`` consecutive failures open the circuit: callers are
+    refused immediately instead of waiting for a connection error. After
+    ``reset_timeout`` seconds one trial call (a health probe or a real request)
+    is let through; success closes the circuit, failure re-opens it.
+    """
+
+    def __init__(self, name, failure_threshold=3, reset_timeout=15.0):
+        self.name = name
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.reset_timeout = reset_timeout
+        self.state = 'closed'
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_at = 0.0
+        self._latencies = deque(maxlen=200)
+        self.last_error = None
+        self.last_success_at = None
+        self.times_opened = 0
+
+    def allow(self):
+        """True if a call may go to the endpoint now (cheap; no I/O)"""
+        if self.state == 'closed':
+            return True
+        now = time.monotonic()
+        with self._lock:
+            if self.state == 'open' and now - self._opened_at >= self.reset_timeout:
+                self.state = 'half_open'
+                self._trial_at = now
+                return True
+            # A trial that never reported back (e.g. a stream abandoned early) must not wedge the breaker
+            if self.state == 'half_open' and now - self._trial_at >= self.reset_timeout:
+                self._trial_at = now
+                return True
+            return self.state == 'closed'
+
+    def record_success(self, latency_ms=None):
+        with self._lock:
+            if self.state != 'closed':
+                print(f"✅ LLM endpoint {self.name} is back")
+            self.state = 'closed'
+            self._failures = 0
+            self.last_success_at = time.time()
+            if latency_ms is not None:
+                self._latencies.append(latency_ms)
+
+    def record_failure(self, error):
+        with self._lock:
+            self._failures += 1
+            self.last_error = str(error)
+            if self.state == 'half_open' or (self.state == 'closed' and self._failures >= self.failure_threshold):
+                if self.state == 'closed':
+                    print(f"⚠️ LLM endpoint {self.name} unavailable, failing over to database answers: {error}")
+                self.state = 'open'
+                self._opened_at = time.monotonic()
+                self.times_opened += 1
+
+    def status(self):
+        with self._lock:
+            latencies = np.array(self._latencies) if self._latencies else None
+            status = {
+                'state': self.state,
+                'consecutive_failures': self._failures,
+                'times_opened': self.times_opened,
+                'last_error': self.last_error,
+                'last_success_at': self.last_success_at,
+            }
+        status['probe_ms_p50'] = round(float(np.percentile(latencies, 50)), 1) if latencies is not None else None
+        status['probe_ms_p95'] = round(float(np.percentile(latencies, 95)), 1) if latencies is not None else None
+        return status
+
+
+class LLMHealthMonitor:
+    """Background prober for every endpoint registered with an ``LLMClient``.
+
+    Closed endpoints are pinged every ``interval`` seconds (so an Ollama that
+    dies is noticed before a farmer's request hits it); open ones are probed once
+    their breaker goes half-open (so an Ollama started after the app is picked up
+    without a restart).
+    """
+
+    def __init__(self, client, interval=5.0, probe_timeout=2.0, probe_path='/api/version'):
+        self.client = client
+        self.interval = interval
+        self.probe_timeout = probe_timeout
+        self.probe_path = probe_path
+        self.probes = 0
+        self._stop = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start probing in this process; per pid, since a thread started before a fork does not run in the child"""
+        with self._lock:
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name='llm-health', daemon=True)
+                self._thread.start()
+        return self._thread
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            for endpoint in self.client.endpoints():
+                breaker = endpoint.breaker
+                if breaker.state == 'closed' or breaker.allow():
+                    self.probe(endpoint)
+            self._stop.wait(self.interval)
+
+    def probe(self, endpoint):
+        started = time.perf_counter()
+        self.probes += 1
+        try:
+            response = endpoint.session.get(endpoint.base_url + self.probe_path, timeout=self.probe_timeout)
+            if response.status_code != 200:
+                raise RuntimeError(f"status {response.status_code}")
+        except Exception as e:
+            endpoint.breaker.record_failure(e)
+            return False
+        endpoint.breaker.record_success((time.perf_counter() - started) * 1000.0)
+        return True
+
+    def status(self):
+        return {
+            'monitor_running': self._thread is not None and self._thread.is_alive(),
+            'probes': self.probes,
+            'interval_seconds': self.interval,
+            'endpoints': {e.base_url: e.breaker.status() for e in self.client.endpoints()},
+        }
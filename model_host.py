@@ -0,0 +1,212 @@
+"""Model-host mode: one process owns the Keras CNN and Whisper pipeline.
+
+Run the host next to the web tier:
+
+    MODEL_HOST_ADDRESS=/tmp/agrox-model-host.sock MODEL_HOST_AUTHKEY=<secret> python model_host.py
+
+and start the Flask/gunicorn workers with the same MODEL_HOST_ADDRESS and
+MODEL_HOST_AUTHKEY (required: requests are pickled, so only share the key with
+processes you trust, and prefer a Unix socket over host:port). Workers
+then skip TensorFlow/transformers entirely and forward predict/transcribe calls
+over a local socket, so memory no longer grows with the worker count.
+"""
+import os
+import threading
+import time
+from multiprocessing.connection import Listener, Client
+
+import numpy as np
+
+from config import Config
+from asr_pool import ASRWorkerPool
+from inference import BatchInferenceEngine, load_classifier_model
+from lazy_loader import LazyResource, startup_report
+
+
+def parse_address(address):
+    """'host:port' -> TCP tuple, anything else is a Unix socket path"""
+    if ':' in address and not address.startswith('/'):
+        host, port = address.rsplit(':', 1)
+        return (host or '127.0.0.1', int(port))
+    return address
+
+
+def host_authkey():
+    # Requests are pickled, so the key is all that stands between the socket and code execution
+    if not Config.MODEL_HOST_AUTHKEY:
+        raise RuntimeError("MODEL_HOST_AUTHKEY must be set (a long random secret shared by the host and "
+                           "the web workers) to use model-host mode")
+    return Config.MODEL_HOST_AUTHKEY.encode('utf-8')
+
+
+class ModelHostClient:
+    """Thread-safe client; each worker thread keeps its own connection"""
+
+    def __init__(self, address, authkey=None):
+        self.address = parse_address(address)
+        self.authkey = authkey or host_authkey()
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = Client(self.address, authkey=self.authkey)
+            self._local.conn = conn
+        return conn
+
+    def call(self, op, payload=None):
+        for attempt in range(2):
+            try:
+                conn = self._connection()
+                conn.send((op, payload))
+                status, result = conn.recv()
+                break
+            except (EOFError, OSError) as e:
+                self._local.conn = None
+                if attempt == 1:
+                    raise RuntimeError(f"Model host unreachable at {self.address}: {e}")
+        if status != 'ok':
+            raise RuntimeError(f"Model host error: {result}")
+        return result
+
+
+class RemoteModel:
+    """Stand-in for the Keras model that forwards predict() to the host"""
+
+    def __init__(self, client):
+        self.client = client
+
+    def predict(self, batch, verbose=0):
+        return self.client.call('predict', np.asarray(batch, dtype=np.float32))
+
+
+class RemoteASR:
+    """Stand-in for the transformers ASR pipeline"""
+
+    def __init__(self, client):
+        self.client = client
+
+    @staticmethod
+    def _portable(item):
+        if isinstance(item, str):
+            # Paths are relative to the worker, so ship the bytes instead
+            with open(item, 'rb') as f:
+                return f.read()
+        return item
+
+    def __call__(self, inputs, batch_size=None):
+        if isinstance(inputs, list):
+            return self.client.call('transcribe', [self._portable(i) for i in inputs])
+        return self.client.call('transcribe', self._portable(inputs))
+
+
+def load_local_classifier(res):
+    # .h5/.keras -> TensorFlow, .tflite -> TFLite interpreter, .onnx -> onnxruntime
+    with res.phase('load'):
+        return load_classifier_model(
+            Config.MODEL_PATH,
+            num_threads=Config.INFERENCE_THREADS,
+            compiled=Config.COMPILED_PREDICT,
+            image_size=Config.IMAGE_SIZE,
+            warmup_batch_sizes=(1, Config.INFERENCE_MAX_BATCH_SIZE)
+        )
+
+
+def load_local_asr(res):
+    with res.phase('import'):
+        from transformers import pipeline
+    with res.phase('load'):
+        return pipeline("automatic-speech-recognition", model=Config.ASR_MODEL, framework="pt")
+
+
+def serve(address, authkey=None):
+    """Run the model host until interrupted"""
+    classifier = LazyResource('classifier', load_local_classifier)
+    asr = LazyResource('whisper_asr', load_local_asr)
+
+    # Requests from all workers share one batching queue
+    engine = BatchInferenceEngine(
+        lambda batch: classifier.get().predict(batch, verbose=0),
+        max_batch_size=Config.INFERENCE_MAX_BATCH_SIZE,
+        max_wait_ms=Config.INFERENCE_MAX_WAIT_MS
+    )
+
+    def get_asr():
+        pipe = asr.get()
+        if pipe is None:
+            raise RuntimeError(f"whisper_asr not available: {asr.error}")
+        return pipe
+
+    asr_pool = ASRWorkerPool(
+        get_asr,
+        max_batch_size=Config.ASR_MAX_BATCH_SIZE,
+        max_wait_ms=Config.ASR_MAX_WAIT_MS,
+        workers=Config.ASR_WORKERS
+    )
+
+    labels = {'digest': None}
+
+    def handle(op, payload):
+        if op == 'reload':
+            # Sent by every worker that sees class_indices.txt change; only the first one reloads
+            if payload == labels['digest']:
+                return {'reloaded': False}
+            labels['digest'] = payload
+            classifier.reset()
+            print(f"🔄 Model host: labels changed ({payload}), classifier will reload")
+            return {'reloaded': True}
+        if op == 'predict':
+            if classifier.get() is None:
+                raise RuntimeError(f"classifier not available: {classifier.error}")
+            return engine.predict(payload)
+        if op == 'transcribe':
+            if isinstance(payload, list):
+                futures = [asr_pool.submit(item) for item in payload]
+                return [f.result() for f in futures]
+            return asr_pool.transcribe(payload)
+        if op == 'ping':
+            return {'pid': os.getpid(), 'time': time.time()}
+        if op == 'stats':
+            return {'subsystems': startup_report(), 'inference': engine.metrics(), 'asr': asr_pool.metrics()}
+        raise ValueError(f"unknown op {op!r}")
+
+    def serve_connection(conn):
+        with conn:
+            while True:
+                try:
+                    op, payload = conn.recv()
+                except (EOFError, OSError):
+                    return
+                try:
+                    conn.send(('ok', handle(op, payload)))
+                except Exception as e:
+                    conn.send(('error', f"{type(e).__name__}: {e}"))
+
+    authkey = authkey or host_authkey()
+    parsed = parse_address(address)
+    if isinstance(parsed, str) and os.path.exists(parsed):
+        os.unlink(parsed)
+
+    for name in Config.WARMUP_SUBSYSTEMS or ['classifier']:
+        if name == 'classifier':
+            classifier.get()
+        elif name == 'whisper_asr':
+            asr.get()
+
+    with Listener(parsed, authkey=authkey) as listener:
+        if isinstance(parsed, str):
+            os.chmod(parsed, 0o600)  # only the user running the web workers may connect
+        print(f"🧠 Model host listening on {address} (pid {os.getpid()})")
+        while True:
+            try:
+                conn = listener.accept()
+            except KeyboardInterrupt:
+                break
+            except Exception as e:
+                print(f"❌ Model host accept error: {e}")
+                continue
+            threading.Thread(target=serve_connection, args=(conn,), daemon=True).start()
+
+
+if __name__ == '__main__':
+    serve(Config.MODEL_HOST_ADDRESS or '/tmp/agrox-model-host.sock')
@@ -0,0 +1,158 @@
+import hashlib
+import sqlite3
+import threading
+import time
+import os
+from collections import OrderedDict
+
+import numpy as np
+
+
+def perceptual_hash(tensor):
+    """64-bit difference hash of a (1, H, W, 3) or (H, W, 3) image tensor"""
+    pixels = np.asarray(tensor)
+    if pixels.ndim == 4:
+        pixels = pixels[0]
+    gray = pixels.mean(axis=2)
+    rows = np.linspace(0, gray.shape[0] - 1, 8).astype(int)
+    cols = np.linspace(0, gray.shape[1] - 1, 9).astype(int)
+    grid = gray[np.ix_(rows, cols)]
+    bits = (grid[:, 1:] > grid[:, :-1]).ravel()
+    return int(np.packbits(bits).view('>u8')[0])
+
+
+class PredictionCache:
+    """Content-addressed cache of class-probability vectors.
+
+    Entries are keyed on a hash of the decoded pixels (plus a namespace such as
+    the model path, so a retrained model never serves stale results). An optional
+    perceptual hash catches near-duplicates (re-compressed WhatsApp copies), and an
+    optional SQLite file keeps entries across restarts.
+    """
+
+    def __init__(self, max_entries=1024, ttl_seconds=86400, disk_path=None,
+                 phash_max_distance=0, namespace=''):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl = ttl_seconds
+        self.phash_max_distance = int(phash_max_distance)
+        self.namespace = namespace.encode('utf-8')
+        self._entries = OrderedDict()  # key -> (probs, expires_at, phash)
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'near_hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0}
+        self._db = None
+        if disk_path:
+            self._open_disk(disk_path)
+
+    def _open_disk(self, disk_path):
+        try:
+            os.makedirs(os.path.dirname(disk_path) or '.', exist_ok=True)
+            self._db = sqlite3.connect(disk_path, check_same_thread=False)
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS predictions '
+                '(key TEXT PRIMARY KEY, phash TEXT, probs BLOB, expires_at REAL, namespace TEXT)'
+            )
+            columns = [row[1] for row in self._db.execute('PRAGMA table_info(predictions)')]
+            if 'namespace' not in columns:
+                self._db.execute('ALTER TABLE predictions ADD COLUMN namespace TEXT')
+            self._db.execute('DELETE FROM predictions WHERE expires_at < ?', (time.time(),))
+            self._db.commit()
+            # Only this model/label mapping's entries: restored ones also take part in near-duplicate matching
+            rows = self._db.execute(
+                'SELECT key, phash, probs, expires_at FROM predictions WHERE namespace = ? '
+                'ORDER BY expires_at DESC LIMIT ?',
+                (self.namespace.decode('utf-8'), self.max_entries)
+            ).fetchall()
+            for key, phash, probs, expires_at in reversed(rows):
+                self._entries[key] = (np.frombuffer(probs, dtype=np.float32), expires_at, int(phash, 16))
+            print(f"✅ Prediction cache: {len(rows)} entries restored from {disk_path}")
+        except sqlite3.Error as e:
+            print(f"❌ Prediction cache disk tier disabled: {e}")
+            self._db = None
+
+    def fingerprint(self, tensor):
+        """Return (content key, perceptual hash) for a preprocessed image tensor"""
+        pixels = np.ascontiguousarray(tensor)
+        digest = hashlib.blake2b(self.namespace, digest_size=20)
+        digest.update(pixels.tobytes())
+        phash = perceptual_hash(pixels) if self.phash_max_distance > 0 else 0
+        return digest.hexdigest(), phash
+
+    def get(self, fingerprint):
+        """Cached probability vector for a fingerprint, or None"""
+        key, phash = fingerprint
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[1] >= now:
+                    self._entries.move_to_end(key)
+                    self._stats['hits'] += 1
+                    return entry[0]
+                del self._entries[key]
+
+            if self.phash_max_distance > 0:
+                for other_key, (probs, expires_at, other_phash) in reversed(self._entries.items()):
+                    if expires_at >= now and bin(phash ^ other_phash).count('1') <= self.phash_max_distance:
+                        self._entries.move_to_end(other_key)
+                        self._stats['near_hits'] += 1
+                        return probs
+
+            if self._db is not None:
+                row = self._db.execute(
+                    'SELECT probs, expires_at FROM predictions WHERE key = ?', (key,)
+                ).fetchone()
+                if row is not None and row[1] >= now:
+                    probs = np.frombuffer(row[0], dtype=np.float32)
+                    self._insert(key, probs, row[1], phash)
+                    self._stats['disk_hits'] += 1
+                    return probs
+
+            self._stats['misses'] += 1
+            return None
+
+    def put(self, fingerprint, probs):
+        key, phash = fingerprint
+        probs = np.asarray(probs, dtype=np.float32).copy()
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._insert(key, probs, expires_at, phash)
+            if self._db is not None:
+                try:
+                    self._db.execute(
+                        'INSERT OR REPLACE INTO predictions VALUES (?, ?, ?, ?, ?)',
+                        (key, format(phash, '016x'), probs.tobytes(), expires_at, self.namespace.decode('utf-8'))
+                    )
+                    self._db.commit()
+                except sqlite3.Error as e:
+                    print(f"Prediction cache write error: {e}")
+
+    def _insert(self, key, probs, expires_at, phash):
+        self._entries[key] = (probs, expires_at, phash)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats['evictions'] += 1
+
+    def clear(self, namespace=None, disk=True):
+        """Drop every entry, e.g. after the model changes.
+
+        With ``disk=False`` the shared disk tier is left alone: entries there are
+        keyed by namespace, so other processes' entries never match a new namespace.
+        """
+        with self._lock:
+            self._entries.clear()
+            if namespace is not None:
+                self.namespace = namespace.encode('utf-8')
+            if disk and self._db is not None:
+                self._db.execute('DELETE FROM predictions')
+                self._db.commit()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+        hits = stats['hits'] + stats['near_hits'] + stats['disk_hits']
+        lookups = hits + stats['misses']
+        stats['hit_rate'] = round(hits / lookups, 4) if lookups else 0.0
+        stats['disk_tier'] = self._db is not None
+        return stats
@@ -0,0 +1,48 @@
+import io
+import base64
+import threading
+
+import numpy as np
+from PIL import Image
+
+
+_local = threading.local()
+
+
+def get_image_buffer(target_size=(224, 224)):
+    """Per-thread reusable (1, H, W, 3) float32 input buffer"""
+    shape = (1, target_size[1], target_size[0], 3)
+    buf = getattr(_local, 'buffer', None)
+    if buf is None or buf.shape != shape:
+        buf = np.empty(shape, dtype=np.float32)
+        _local.buffer = buf
+    return buf
+
+
+def decode_image(data, target_size=(224, 224)):
+    """Decode raw image bytes into an RGB PIL image resized for the model"""
+    img = Image.open(io.BytesIO(data) if isinstance(data, (bytes, bytearray, memoryview)) else data)
+    if img.mode != 'RGB':
+        img = img.convert('RGB')
+    if img.size != tuple(target_size):
+        # Nearest matches keras.preprocessing.image.load_img's default
+        img = img.resize(tuple(target_size), Image.NEAREST)
+    return img
+
+
+def image_to_tensor(img, out=None):
+    """Scale an RGB image to [0, 1] float32 in a single vectorised pass"""
+    pixels = np.asarray(img, dtype=np.uint8)
+    if out is None:
+        out = np.empty((1,) + pixels.shape, dtype=np.float32)
+    np.divide(pixels, np.float32(255.0), out=out[0])
+    return out
+
+
+def thumbnail_data_uri(img, max_size=(224, 224), quality=80):
+    """Small inline JPEG for the result page, so nothing has to hit disk"""
+    thumb = img.copy()
+    thumb.thumbnail(max_size)
+    buf = io.BytesIO()
+    thumb.save(buf, format='JPEG', quality=quality)
+    return 'data:image/jpeg;base64,' + base64.b64encode(buf.getvalue()).decode('ascii')
@@ -0,0 +1,167 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from embeddings import normalize_text
+
+# Context fields that shape the chat prompt; anything else in the request is ignored
+CONTEXT_FIELDS = ('disease_name', 'treatment', 'pesticide', 'cost')
+
+
+def context_key(context):
+    """Stable key for the disease context a question was asked about"""
+    context = context or {}
+    fields = {f: str(context.get(f, '')).strip() for f in CONTEXT_FIELDS}
+    return hashlib.blake2b(json.dumps(fields, sort_keys=True).encode('utf-8'), digest_size=10).hexdigest()
+
+
+class ResponseCache:
+    """Chat answers keyed on (disease context, normalised question).
+
+    Exact lookups hit on the normalised question text. With ``embed`` and a
+    ``similarity`` threshold in (0, 1], a miss falls back to the most similar
+    cached question *for the same disease context* (cosine similarity of the
+    embeddings). Entries expire after ``ttl_seconds``, the least recently used go
+    past ``max_entries``, and an optional SQLite file keeps them across restarts.
+    """
+
+    def __init__(self, max_entries=2048, ttl_seconds=7 * 86400, disk_path=None,
+                 embed=None, similarity=0.0, namespace=''):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl = ttl_seconds
+        self.embed = embed if similarity > 0 else None
+        self.similarity = float(similarity)
+        self.namespace = namespace
+        self._entries = OrderedDict()  # key -> (response, expires_at, context, vector)
+        self._by_context = {}  # context -> set of keys, for similarity search
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'similar_hits': 0, 'misses': 0, 'evictions': 0}
+        self._db = None
+        if disk_path:
+            self._open_disk(disk_path)
+
+    def _open_disk(self, disk_path):
+        try:
+            os.makedirs(os.path.dirname(disk_path) or '.', exist_ok=True)
+            self._db = sqlite3.connect(disk_path, check_same_thread=False)
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS chat_responses '
+                '(key TEXT PRIMARY KEY, context TEXT, question TEXT, response TEXT, expires_at REAL)'
+            )
+            self._db.execute('DELETE FROM chat_responses WHERE expires_at < ?', (time.time(),))
+            self._db.commit()
+            rows = self._db.execute(
+                'SELECT key, context, question, response, expires_at FROM chat_responses '
+                'ORDER BY expires_at DESC LIMIT ?', (self.max_entries,)
+            ).fetchall()
+            for key, context, question, response, expires_at in reversed(rows):
+                self._insert(key, response, expires_at, context, self._vector(question))
+            print(f"✅ Chat cache: {len(rows)} answers restored from {disk_path}")
+        except sqlite3.Error as e:
+            print(f"❌ Chat cache disk tier disabled: {e}")
+            self._db = None
+
+    def _context(self, context):
+        # The namespace (model name) is part of the context so a new model never matches old answers
+        return f"{self.namespace}:{context_key(context)}"
+
+    def _key(self, context, question):
+        raw = f"{context}\0{question}".encode('utf-8')
+        return hashlib.blake2b(raw, digest_size=20).hexdigest()
+
+    def _vector(self, question):
+        return np.asarray(self.embed(question), dtype=np.float32) if self.embed else None
+
+    def get(self, context, question):
+        """(cached answer, match info) or None"""
+        ctx = self._context(context)
+        normalized = normalize_text(question)
+        key = self._key(ctx, normalized)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] >= now:
+                self._entries.move_to_end(key)
+                self._stats['hits'] += 1
+                return entry[0], {'match': 'exact'}
+            if entry is not None:
+                self._remove(key)
+            candidates = [k for k in self._by_context.get(ctx, ()) if self._entries[k][1] >= now]
+
+        if self.embed and candidates:
+            vector = self._vector(normalized)
+            with self._lock:
+                candidates = [k for k in candidates if k in self._entries]
+                if candidates:
+                    scores = np.stack([self._entries[k][3] for k in candidates]) @ vector
+                    best = int(np.argmax(scores))
+                    if scores[best] >= self.similarity:
+                        self._entries.move_to_end(candidates[best])
+                        self._stats['similar_hits'] += 1
+                        return self._entries[candidates[best]][0], {
+                            'match': 'similar', 'similarity': round(float(scores[best]), 4)}
+
+        with self._lock:
+            self._stats['misses'] += 1
+        return None
+
+    def put(self, context, question, response):
+        ctx = self._context(context)
+        normalized = normalize_text(question)
+        key = self._key(ctx, normalized)
+        vector = self._vector(normalized)
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._insert(key, response, expires_at, ctx, vector)
+            if self._db is not None:
+                try:
+                    self._db.execute(
+                        'INSERT OR REPLACE INTO chat_responses VALUES (?, ?, ?, ?, ?)',
+                        (key, ctx, normalized, response, expires_at)
+                    )
+                    self._db.commit()
+                except sqlite3.Error as e:
+                    print(f"Chat cache write error: {e}")
+
+    def _insert(self, key, response, expires_at, ctx, vector):
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (response, expires_at, ctx, vector)
+        self._by_context.setdefault(ctx, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+            self._stats['evictions'] += 1
+
+    def _remove(self, key):
+        _, _, ctx, _ = self._entries.pop(key)
+        keys = self._by_context.get(ctx)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_context[ctx]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_context.clear()
+            if self._db is not None:
+                self._db.execute('DELETE FROM chat_responses')
+                self._db.commit()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+            stats['contexts'] = len(self._by_context)
+        hits = stats['hits'] + stats['similar_hits']
+        lookups = hits + stats['misses']
+        stats['hit_rate'] = round(hits / lookups, 4) if lookups else 0.0
+        stats['similarity_threshold'] = self.similarity if self.embed else None
+        stats['disk_tier'] = self._db is not None
+        return stats
@@ -0,0 +1,192 @@
+import json
+import math
+import threading
+from collections import deque
+
+# Ranges the dashboard used to evaluate in the browser (sensorConfigs in iot_dashboard.html)
+DEFAULT_RULES = {
+    'soil_moisture': {'optimal': (40, 70), 'acceptable': (25, 85)},
+    'soil_ph': {'optimal': (6.0, 7.5), 'acceptable': (5.5, 8.0)},
+    'soil_temperature': {'optimal': (18, 28), 'acceptable': (10, 35)},
+    'water_ph': {'optimal': (6.8, 7.6), 'acceptable': (6.2, 8.0)},
+    'turbidity': {'optimal': (0, 2), 'acceptable': (0, 5)},
+    'salinity_ec': {'optimal': (0.8, 1.5), 'acceptable': (0.5, 2.0)},
+}
+
+# Per-crop overrides for the crops in the disease database; unspecified metrics use the defaults
+CROP_RULES = {
+    'tomato': {
+        'soil_ph': {'optimal': (6.2, 6.8), 'acceptable': (5.5, 7.5)},
+        'soil_moisture': {'optimal': (60, 80), 'acceptable': (40, 90)},
+        'soil_temperature': {'optimal': (20, 30), 'acceptable': (15, 35)},
+    },
+    'potato': {
+        'soil_ph': {'optimal': (5.0, 6.0), 'acceptable': (4.8, 6.5)},
+        'soil_moisture': {'optimal': (60, 80), 'acceptable': (45, 90)},
+        'soil_temperature': {'optimal': (15, 20), 'acceptable': (10, 25)},
+    },
+    'apple': {
+        'soil_ph': {'optimal': (6.0, 7.0), 'acceptable': (5.5, 7.5)},
+    },
+    'grape': {
+        'soil_ph': {'optimal': (5.5, 6.5), 'acceptable': (5.0, 7.5)},
+    },
+    'corn': {
+        'soil_ph': {'optimal': (5.8, 7.0), 'acceptable': (5.5, 7.5)},
+        'soil_temperature': {'optimal': (18, 30), 'acceptable': (10, 35)},
+    },
+    'pepper': {
+        'soil_ph': {'optimal': (6.0, 6.8), 'acceptable': (5.5, 7.0)},
+        'soil_temperature': {'optimal': (21, 29), 'acceptable': (15, 32)},
+    },
+}
+
+def load_rules(path=None):
+    """(default rules, crop rules), optionally overridden by a JSON file
+    ``{"default": {metric: {"optimal": [lo, hi], "acceptable": [lo, hi]}}, "crops": {crop: {...}}}``"""
+    default = {m: dict(r) for m, r in DEFAULT_RULES.items()}
+    crops = {c: {m: dict(r) for m, r in rules.items()} for c, rules in CROP_RULES.items()}
+    if path:
+        with open(path, encoding='utf-8') as f:
+            overrides = json.load(f)
+        for metric, rule in overrides.get('default', {}).items():
+            default.setdefault(metric, {}).update({k: tuple(v) for k, v in rule.items()})
+        for crop, rules in overrides.get('crops', {}).items():
+            for metric, rule in rules.items():
+                crops.setdefault(crop.lower(), {}).setdefault(metric, {}).update({k: tuple(v) for k, v in rule.items()})
+    return default, crops
+
+
+class EWMADetector:
+    """Exponentially weighted mean/variance with a z-score test, updated one reading at a time"""
+
+    __slots__ = ('alpha', 'z_threshold', 'warmup', 'mean', 'var', 'n')
+
+    def __init__(self, alpha=0.1, z_threshold=4.0, warmup=20):
+        self.alpha = alpha
+        self.z_threshold = z_threshold
+        self.warmup = warmup
+        self.mean = 0.0
+        self.var = 0.0
+        self.n = 0
+
+    def update(self, value):
+        """z-score of ``value`` against the history before it (0.0 while warming up)"""
+        if self.n == 0:
+            self.mean, self.n = value, 1
+            return 0.0
+        diff = value - self.mean
+        std = math.sqrt(self.var)
+        z = diff / std if self.n >= self.warmup and std > 1e-9 else 0.0
+        # West's incremental EWMA variance
+        incr = self.alpha * diff
+        self.mean += incr
+        self.var = (1 - self.alpha) * (self.var + diff * incr)
+        self.n += 1
+        return z
+
+
+class SensorAlertEngine:
+    """Evaluates threshold rules and anomaly detectors once per ingested reading.
+
+    Statuses use the dashboard's vocabulary (optimal / normal / warning).
+    Alerts are deduplicated per (device, metric, kind): one ``raised`` event when
+    a condition starts and one ``cleared`` event when it ends, however many
+    readings arrive in between.
+    """
+
+    def __init__(self, rules_path=None, alpha=0.1, z_threshold=4.0, warmup=20, history=200):
+        self.default_rules, self.crop_rules = load_rules(rules_path)
+        self.alpha = alpha
+        self.z_threshold = z_threshold
+        self.warmup = warmup
+        self._crops = {}  # device -> crop
+        self._detectors = {}  # (device, metric) -> EWMADetector
+        self._status = {}  # (device, metric) -> status
+        self._active = {}  # (device, metric, kind) -> alert
+        self._recent = deque(maxlen=history)
+        self._lock = threading.Lock()
+        self._stats = {'readings': 0, 'raised': 0, 'cleared': 0}
+
+    def set_crop(self, device, crop):
+        if crop:
+            with self._lock:
+                self._crops[device] = str(crop).strip().lower()
+
+    def rule(self, metric, crop=None):
+        return self.crop_rules.get(crop or '', {}).get(metric) or self.default_rules.get(metric)
+
+    def classify(self, metric, value, crop=None):
+        """Threshold status for one value"""
+        rule = self.rule(metric, crop)
+        if rule is None:
+            return 'normal'
+        lo, hi = rule['optimal']
+        if lo <= value <= hi:
+            return 'optimal'
+        lo, hi = rule['acceptable']
+        return 'normal' if lo <= value <= hi else 'warning'
+
+    def evaluate(self, device, appended):
+        """Run every new reading through rules + detectors; returns alert events (raised/cleared)"""
+        events = []
+        with self._lock:
+            crop = self._crops.get(device)
+            for metric, (times, values) in appended.items():
+                detector = self._detectors.get((device, metric))
+                if detector is None:
+                    detector = self._detectors[(device, metric)] = EWMADetector(
+                        self.alpha, self.z_threshold, self.warmup)
+                rule = self.rule(metric, crop)
+                status = None
+                for ts, value in zip(times.tolist(), values.tolist()):
+                    threshold = self.classify(metric, value, crop)
+                    mean = detector.mean
+                    z = detector.update(value)
+                    anomaly = abs(z) >= self.z_threshold
+                    events += self._transition(
+                        device, metric, 'threshold', threshold == 'warning', ts, value,
+                        lambda: f"outside the acceptable range {rule['acceptable'][0]}-{rule['acceptable'][1]}")
+                    events += self._transition(
+                        device, metric, 'anomaly', anomaly, ts, value,
+                        lambda: f"unusual reading (z = {z:+.1f} vs recent average {mean:.2f})")
+                    status = 'warning' if anomaly else threshold
+                if status is not None:
+                    self._status[(device, metric)] = status
+                self._stats['readings'] += len(values)
+        return events
+
+    def _transition(self, device, metric, kind, active, ts, value, message):
+        """Raise or clear one (device, metric, kind) alert; ``message`` is only built for a new alert"""
+        key = (device, metric, kind)
+        current = self._active.get(key)
+        if active and current is None:
+            alert = {'state': 'raised', 'device': device, 'metric': metric, 'kind': kind,
+                     'value': round(value, 3), 'timestamp': int(ts), 'message': message(),
+                     'crop': self._crops.get(device)}
+            self._active[key] = alert
+            self._stats['raised'] += 1
+        elif not active and current is not None:
+            del self._active[key]
+            alert = dict(current, state='cleared', value=round(value, 3), timestamp=int(ts))
+            self._stats['cleared'] += 1
+        else:
+            return []
+        self._recent.append(alert)
+        return [alert]
+
+    def status(self, device, metric):
+        return self._status.get((device, metric))
+
+    def alerts(self):
+        """Active alerts and the most recent raised/cleared events, newest first"""
+        with self._lock:
+            return {'active': list(self._active.values()), 'recent': list(reversed(self._recent))}
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['active'] = len(self._active)
+            stats['devices_with_crop'] = len(self._crops)
+        stats['z_threshold'] = self.z_threshold
+        return stats
@@ -0,0 +1,484 @@
+import contextlib
+import fcntl
+import json
+import mmap
+import os
+import threading
+import time
+from bisect import bisect_left, bisect_right
+
+import numpy as np
+
+# Fixed block header; the rest of the block holds five bit sections:
+# timestamp control codes, timestamp payloads, value control codes, value windows, value payloads
+BLOCK_HEADER = np.dtype([
+    ('series', '<u4'),
+    ('count', '<u4'),
+    ('t_first', '<i8'),   # epoch milliseconds
+    ('t_last', '<i8'),
+    ('v_first', '<u4'),   # float32 bit pattern
+    ('sections', '<u2', (5,)),  # byte length of each section
+    ('reserved', '<u2'),
+])
+
+# Delta-of-delta classes: control code is unary (c ones then a zero), payload is zigzag in TS_WIDTHS[c] bits
+TS_WIDTHS = np.array([0, 7, 9, 12, 64], dtype=np.int64)
+
+VALUE_SAME, VALUE_REUSE, VALUE_NEW = 0, 1, 2
+
+
+def read_generation(lock_fd):
+    """Write counter kept in the first 8 bytes of archive.lock"""
+    data = os.pread(lock_fd, 8, 0)
+    return int.from_bytes(data, 'little') if len(data) == 8 else 0
+
+
+def pack_fields(values, widths):
+    """Concatenate big-endian bit fields (``widths[i]`` low bits of ``values[i]``) into bytes"""
+    values = np.asarray(values, dtype=np.uint64)
+    widths = np.asarray(widths, dtype=np.int64)
+    total = int(widths.sum())
+    if total == 0:
+        return b''
+    idx = np.repeat(np.arange(len(widths)), widths)
+    pos = np.arange(total) - np.repeat(np.cumsum(widths) - widths, widths)
+    shift = (widths[idx] - 1 - pos).astype(np.uint64)
+    return np.packbits(((values[idx] >> shift) & np.uint64(1)).astype(np.uint8)).tobytes()
+
+
+def unpack_fields(data, widths):
+    """Inverse of ``pack_fields``; zero-width fields decode as 0"""
+    widths = np.asarray(widths, dtype=np.int64)
+    out = np.zeros(len(widths), dtype=np.uint64)
+    used = widths > 0
+    if not used.any():
+        return out
+    w = widths[used]
+    total = int(w.sum())
+    bits = np.unpackbits(np.frombuffer(data, dtype=np.uint8), count=total).astype(np.uint64)
+    starts = np.cumsum(w) - w
+    idx = np.repeat(np.arange(len(w)), w)
+    shift = (w[idx] - 1 - (np.arange(total) - starts[idx])).astype(np.uint64)
+    out[used] = np.add.reduceat(bits << shift, starts)
+    return out
+
+
+def unary_codes(data, n):
+    """First ``n`` unary codes (count of ones before each zero) from a control section"""
+    if n == 0:
+        return np.zeros(0, dtype=np.int64)
+    zeros = np.flatnonzero(np.unpackbits(np.frombuffer(data, dtype=np.uint8)) == 0)[:n]
+    return np.diff(np.r_[-1, zeros]) - 1
+
+
+def _bit_length(x):
+    """Bit length of each uint64 below 2**53 (0 for 0)"""
+    return np.frexp(x.astype(np.float64))[1].astype(np.int64)
+
+
+def encode_timestamps(ts):
+    """Per-point (control, control width, payload, payload width) for points 1..n-1"""
+    delta = np.diff(ts)
+    dod = np.diff(np.r_[np.int64(0), delta])
+    zz = ((dod << 1) ^ (dod >> 63)).view(np.uint64)
+    cls = np.searchsorted(np.array([1, 1 << 7, 1 << 9, 1 << 12], dtype=np.uint64), zz, side='right')
+    ctrl = ((np.int64(1) << cls) - 1) << 1
+    return ctrl.astype(np.uint64), cls + 1, zz, TS_WIDTHS[cls]
+
+
+def encode_values(bits):
+    """Gorilla XOR encoding of float32 bit patterns for points 1..n-1.
+
+    Returns (codes, window, payload, payload width); ``window`` is the 10-bit
+    leading-zeros/length pair, only written for VALUE_NEW points.
+    """
+    x = (bits[1:] ^ bits[:-1]).astype(np.uint64)
+    n = len(x)
+    lead = 32 - _bit_length(x)
+    trail = _bit_length(x & (~x + np.uint64(1))) - 1
+    codes = np.zeros(n, dtype=np.int64)
+    use_lead = np.zeros(n, dtype=np.int64)
+    use_trail = np.zeros(n, dtype=np.int64)
+    # The stored window only changes when a value does not fit it - a sequential decision
+    stored_lead = stored_trail = -1
+    for i in np.flatnonzero(x).tolist():
+        li, ti = int(lead[i]), int(trail[i])
+        if stored_lead >= 0 and li >= stored_lead and ti >= stored_trail:
+            codes[i] = VALUE_REUSE
+        else:
+            codes[i] = VALUE_NEW
+            stored_lead, stored_trail = li, ti
+        use_lead[i], use_trail[i] = stored_lead, stored_trail
+    length = np.where(codes > 0, 32 - use_lead - use_trail, 0)
+    window = (use_lead << 5) | np.maximum(length - 1, 0)
+    payload = x >> np.maximum(use_trail, 0).astype(np.uint64)
+    return codes, window.astype(np.uint64), payload, length
+
+
+def encode_block(series, ts, bits, block_size):
+    """Encode as many leading points as fit one block; returns (block bytes, points used)"""
+    capacity = (block_size - BLOCK_HEADER.itemsize - 5) * 8  # each section may end with a partial byte
+    # Every point after the first costs at least two bits, so never look further than this
+    n = min(len(ts), capacity // 2 + 1)
+    ts, bits = ts[:n], bits[:n]
+    t_ctrl, t_ctrl_w, t_pay, t_pay_w = encode_timestamps(ts)
+    codes, window, v_pay, v_pay_w = encode_values(bits)
+    cost = t_ctrl_w + t_pay_w + codes + 1 + np.where(codes == VALUE_NEW, 10, 0) + v_pay_w
+    n = 1 + int(np.searchsorted(np.cumsum(cost), capacity, side='right'))
+    m = n - 1
+    new = codes[:m] == VALUE_NEW
+    sections = (
+        pack_fields(t_ctrl[:m], t_ctrl_w[:m]),
+        pack_fields(t_pay[:m], t_pay_w[:m]),
+        pack_fields(((np.int64(1) << codes[:m]) - 1) << 1, codes[:m] + 1),
+        pack_fields(window[:m][new], np.full(int(new.sum()), 10)),
+        pack_fields(v_pay[:m], v_pay_w[:m]),
+    )
+    header = np.zeros(1, dtype=BLOCK_HEADER)
+    header['series'], header['count'] = series, n
+    header['t_first'], header['t_last'] = ts[0], ts[n - 1]
+    header['v_first'] = bits[0]
+    header['sections'] = [len(s) for s in sections]
+    block = header.tobytes() + b''.join(sections)
+    return block + bytes(block_size - len(block)), n
+
+
+def decode_block(block):
+    """(timestamps in ms as int64, values as float32) for one block"""
+    header = np.frombuffer(block, dtype=BLOCK_HEADER, count=1)[0]
+    n = int(header['count'])
+    m = n - 1
+    offsets = np.r_[0, np.cumsum(header['sections'])] + BLOCK_HEADER.itemsize
+    sections = [block[offsets[i]:offsets[i + 1]] for i in range(5)]
+
+    cls = unary_codes(sections[0], m)
+    zz = unpack_fields(sections[1], TS_WIDTHS[cls])
+    dod = (zz >> np.uint64(1)).view(np.int64) ^ -(zz & np.uint64(1)).view(np.int64)
+    ts = np.int64(header['t_first']) + np.r_[np.int64(0), np.cumsum(np.cumsum(dod))]
+
+    codes = unary_codes(sections[2], m)
+    new = codes == VALUE_NEW
+    window = unpack_fields(sections[3], np.full(int(new.sum()), 10)).astype(np.int64)
+    lead, length = window >> 5, (window & 31) + 1
+    nonzero = codes > 0
+    wid = (np.cumsum(new) - 1)[nonzero]  # a reused window is the most recent new one
+    meaningful = unpack_fields(sections[4], length[wid])
+    x = np.zeros(m, dtype=np.uint64)
+    x[nonzero] = meaningful << (32 - lead[wid] - length[wid]).astype(np.uint64)
+    bits = np.bitwise_xor.accumulate(np.r_[np.uint64(header['v_first']), x])
+    return ts, bits.astype(np.uint32).view(np.float32)
+
+
+class SensorArchive:
+    """Compressed, append-only long-term tier for (device, metric) sensor series.
+
+    Readings are packed Gorilla-style (delta-of-delta timestamps, XOR'd float32
+    values) into fixed-size blocks in one memory-mapped file; a per-series block
+    index (first/last timestamp) means a range scan only decodes the blocks it
+    overlaps. The newest, still-filling block of each series stays in memory and
+    is written out by ``flush``, which a background thread runs every
+    ``flush_interval`` seconds while there is unflushed data; a flushed partial
+    block is read back as-is after a restart.
+
+    Several processes (gunicorn workers) may share one directory: series ids and
+    new blocks are allocated under an exclusive ``flock`` on ``archive.lock``,
+    which also holds a write generation so readers notice blocks written by the
+    others and rebuild their index.
+    """
+
+    def __init__(self, root, block_size=4096, flush_interval=30.0):
+        self.root = root
+        self.flush_interval = flush_interval
+        os.makedirs(root, exist_ok=True)
+        self._meta_path = os.path.join(root, 'series.json')
+        self._data_path = os.path.join(root, 'blocks.dat')
+        self._lock_path = os.path.join(root, 'archive.lock')
+        self.block_size = block_size
+        self._series = []  # id -> [device, metric]
+        self._ids = {}
+        self._fd = os.open(self._data_path, os.O_RDWR | os.O_CREAT, 0o644)
+        self._map = None
+        self._index = {}  # series id -> ([t_first], [running max of t_last], [block number]) in t_first order
+        self._open = {}  # series id -> [times ms, value bits, reserved block number, size hint]
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._dirty = False
+        self._flusher_pid = None
+        self._stats = {'appended': 0, 'sealed_blocks': 0, 'flushes': 0, 'scans': 0, 'blocks_decoded': 0,
+                       'index_reloads': 0}
+        with self._file_lock(fcntl.LOCK_SH) as lock_fd:
+            self._load_meta()
+            self._generation = read_generation(lock_fd)
+            self._blocks = os.fstat(self._fd).st_size // self.block_size
+            self._load_index()
+
+    @contextlib.contextmanager
+    def _file_lock(self, operation):
+        """flock on archive.lock through a fresh descriptor, so threads of one process exclude each other too"""
+        fd = os.open(self._lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, operation)
+            yield fd
+        finally:
+            os.close(fd)
+
+    def _load_meta(self):
+        if os.path.exists(self._meta_path):
+            with open(self._meta_path, encoding='utf-8') as f:
+                meta = json.load(f)
+            self.block_size = meta['block_size']
+            self._series = meta['series']
+            self._ids = {tuple(key): i for i, key in enumerate(self._series)}
+
+    def _load_index(self):
+        """Rebuild the block index from the headers on disk, minus our own still-open blocks"""
+        self._index = {}
+        if not self._blocks:
+            return
+        headers = np.ndarray((self._blocks,), dtype=BLOCK_HEADER, buffer=self._mapped(),
+                             strides=(self.block_size,))
+        live = headers['count'] > 0
+        live[np.array([p[2] for p in self._open.values() if p[2] is not None], dtype=np.int64)] = False
+        block_nos = np.flatnonzero(live)
+        series, t_first, t_last = (headers[name][block_nos] for name in ('series', 't_first', 't_last'))
+        order = np.lexsort((t_first, series))
+        block_nos, series, t_first, t_last = block_nos[order], series[order], t_first[order], t_last[order]
+        edges = np.flatnonzero(np.r_[True, series[1:] != series[:-1]]) if len(series) else []
+        for sid, first, last, nos in zip(series[edges].tolist(), np.split(t_first, edges[1:]),
+                                         np.split(t_last, edges[1:]), np.split(block_nos, edges[1:])):
+            # Blocks of one series from different processes can overlap; the running max keeps bisect valid
+            self._index[sid] = (first.tolist(), np.maximum.accumulate(last).tolist(), nos.tolist())
+
+    def _refresh(self):
+        """Pick up blocks other processes wrote since we last looked (caller holds ``_lock``)"""
+        with self._file_lock(fcntl.LOCK_SH) as lock_fd:
+            generation = read_generation(lock_fd)
+            if generation == self._generation:
+                return
+            self._blocks = os.fstat(self._fd).st_size // self.block_size
+            self._load_index()
+            self._generation = generation
+            self._stats['index_reloads'] += 1
+
+    def _index_block(self, sid, t_first, t_last, block_no):
+        first, last, block_nos = self._index.setdefault(sid, ([], [], []))
+        i = bisect_right(first, t_first)
+        first.insert(i, t_first)
+        last.insert(i, t_last)
+        block_nos.insert(i, block_no)
+        if i:
+            last[i] = max(last[i], last[i - 1])
+        for j in range(i + 1, len(last)):
+            if last[j] >= last[i]:
+                break
+            last[j] = last[i]
+
+    def _mapped(self):
+        """Read-only map of blocks.dat, remapped once the file has grown"""
+        size = self._blocks * self.block_size
+        if self._map is None or len(self._map) < size:
+            # The old map is left to the garbage collector: a scan may still be reading it
+            self._map = mmap.mmap(self._fd, size, access=mmap.ACCESS_READ)
+        return self._map
+
+    def _series_id(self, device, metric):
+        sid = self._ids.get((device, metric))
+        if sid is None:
+            with self._file_lock(fcntl.LOCK_EX):
+                self._load_meta()  # another process may have registered it, or others, since
+                sid = self._ids.get((device, metric))
+                if sid is None:
+                    sid = self._ids[(device, metric)] = len(self._series)
+                    self._series.append([device, metric])
+                    self._save_meta()
+        return sid
+
+    def _save_meta(self):
+        tmp = f"{self._meta_path}.{os.getpid()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'block_size': self.block_size, 'series': self._series}, f)
+        os.replace(tmp, self._meta_path)
+
+    def _write(self, block_no, block):
+        """Write a block over ``block_no`` (ours) or as a new block at the end of the file"""
+        with self._file_lock(fcntl.LOCK_EX) as lock_fd:
+            generation = read_generation(lock_fd)
+            if block_no is None:
+                block_no = os.fstat(self._fd).st_size // self.block_size
+            os.pwrite(self._fd, block, block_no * self.block_size)
+            os.pwrite(lock_fd, (generation + 1).to_bytes(8, 'little'), 0)
+            if generation == self._generation:
+                # Nobody else wrote in between, so our index is still complete
+                self._generation = generation + 1
+            self._blocks = max(self._blocks, block_no + 1)
+        return block_no
+
+    def append(self, device, metric, times, values):
+        """Queue sorted readings (epoch seconds, float32 values); full blocks are written straight away"""
+        ts = np.round(np.asarray(times, dtype=np.float64) * 1000.0).astype(np.int64)
+        bits = np.asarray(values, dtype=np.float32).view(np.uint32)
+        if len(ts) == 0:
+            return
+        with self._lock:
+            sid = self._series_id(device, metric)
+            pending = self._open.get(sid)
+            if pending is None:
+                pending = self._open[sid] = [ts[:0], bits[:0], None, 256]
+            pending[0] = np.concatenate((pending[0], ts))
+            pending[1] = np.concatenate((pending[1], bits))
+            self._stats['appended'] += len(ts)
+            self._dirty = True
+            if len(pending[0]) >= pending[3]:
+                self._seal(sid, pending)
+            # Started on first use (and per pid) so it survives gunicorn forking a preloaded app
+            if self._flusher_pid != os.getpid():
+                self._flusher_pid = os.getpid()
+                threading.Thread(target=self._flush_loop, name='sensor-archive-flush', daemon=True).start()
+
+    def _seal(self, sid, pending):
+        """Write every full block at the front of ``pending``; returns the encoded remainder"""
+        while True:
+            block, n = encode_block(sid, pending[0], pending[1], self.block_size)
+            if n == len(pending[0]):
+                pending[3] = max(pending[3], int(n * 1.25))
+                return block
+            block_no = self._write(pending[2], block)
+            self._index_block(sid, int(pending[0][0]), int(pending[0][n - 1]), block_no)
+            pending[0], pending[1], pending[2], pending[3] = pending[0][n:], pending[1][n:], None, n
+            self._stats['sealed_blocks'] += 1
+            if len(pending[0]) == 0:
+                return None
+
+    def _flush_loop(self):
+        while self._fd is not None:
+            time.sleep(max(self.flush_interval - (time.monotonic() - self._last_flush), 0.05))
+            try:
+                self.maybe_flush()
+            except OSError as e:
+                if self._fd is not None:
+                    print(f"❌ Sensor archive flush failed: {e}")
+
+    def maybe_flush(self):
+        if self._dirty and time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """Persist the partially filled block of every series"""
+        with self._lock:
+            if self._fd is None:
+                return
+            for sid, pending in self._open.items():
+                if len(pending[0]):
+                    block = self._seal(sid, pending)
+                    if block is not None:
+                        pending[2] = self._write(pending[2], block)
+            self._dirty = False
+            self._last_flush = time.monotonic()
+            self._stats['flushes'] += 1
+            fd = self._fd
+        # Outside the lock: appends and scans carry on while the disk catches up
+        os.fsync(fd)
+
+    def close(self):
+        if self._fd is None:
+            return
+        self.flush()
+        with self._lock:
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+            os.close(self._fd)
+            self._fd = None
+
+    def scan(self, device, metric, start=None, end=None):
+        """(times in epoch seconds, float32 values) with start <= t < end, oldest first"""
+        chunks = list(self.chunks(device, metric, start, end)[0])
+        if not chunks:
+            return np.zeros(0), np.zeros(0, dtype=np.float32)
+        ts = np.concatenate([c[0] for c in chunks])
+        values = np.concatenate([c[1] for c in chunks])
+        if len(chunks) > 1:
+            # Blocks written by different processes may interleave in time
+            order = np.argsort(ts, kind='stable')
+            ts, values = ts[order], values[order]
+        return ts, values
+
+    def chunks(self, device, metric, start=None, end=None, max_points=None):
+        """(iterator of (times, values) per block, fraction of blocks decoded) for start <= t < end.
+
+        Blocks are copied and decoded a batch at a time outside the lock, so a
+        caller can fold them into buckets without holding the whole range in
+        memory. Past ``max_points`` readings only an evenly spaced subset of the
+        blocks is decoded.
+        """
+        start_ms = None if start is None else int(np.ceil(start * 1000.0))
+        end_ms = None if end is None else int(np.ceil(end * 1000.0))
+        with self._lock:
+            self._refresh()
+            sid = self._ids.get((device, metric))
+            if sid is None and os.path.exists(self._meta_path):
+                self._load_meta()  # perhaps registered by another process
+                sid = self._ids.get((device, metric))
+            if sid is None:
+                return iter(()), 1.0
+            t_first, t_last, block_nos = self._index.get(sid, ([], [], []))
+            lo = 0 if start_ms is None else bisect_left(t_last, start_ms)
+            hi = len(block_nos) if end_ms is None else bisect_left(t_first, end_ms)
+            refs = block_nos[lo:hi]
+            mapped = self._mapped() if refs else None
+            fraction = 1.0
+            if max_points and refs:
+                total = sum(int(np.frombuffer(mapped, dtype='<u4', count=1, offset=n * self.block_size + 4)[0])
+                            for n in refs)
+                if total > max_points:
+                    step = -(-total // max_points)
+                    refs, fraction = refs[::step], 1.0 / step
+            pending = self._open.get(sid)
+            if pending is not None and len(pending[0]):
+                pending = (pending[0].copy(), pending[1].view(np.float32).copy())
+            else:
+                pending = None
+            self._stats['scans'] += 1
+            self._stats['blocks_decoded'] += len(refs)
+        return self._decode(refs, mapped, pending, start_ms, end_ms), fraction
+
+    def _decode(self, refs, mapped, pending, start_ms, end_ms, batch=64):
+        for i in range(0, len(refs), batch):
+            # Only the copy waits for another process rewriting a partial block
+            with self._file_lock(fcntl.LOCK_SH):
+                raw = [mapped[n * self.block_size:(n + 1) * self.block_size] for n in refs[i:i + batch]]
+            for block in raw:
+                yield self._clip(*decode_block(block), start_ms, end_ms)
+        if pending is not None:
+            yield self._clip(*pending, start_ms, end_ms)
+
+    @staticmethod
+    def _clip(ts, values, start_ms, end_ms):
+        keep = np.ones(len(ts), dtype=bool)
+        if start_ms is not None:
+            keep &= ts >= start_ms
+        if end_ms is not None:
+            keep &= ts < end_ms
+        return ts[keep] / 1000.0, values[keep]
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            archived = 0
+            self._refresh()
+            if self._blocks:
+                headers = np.ndarray((self._blocks,), dtype=BLOCK_HEADER, buffer=self._mapped(),
+                                     strides=(self.block_size,))
+                archived = int(headers['count'].sum())
+            open_points = sum(len(p[0]) for p in self._open.values())
+            stats['series'] = len(self._series)
+            stats['blocks'] = self._blocks
+        disk_bytes = stats['blocks'] * self.block_size
+        stats['block_size'] = self.block_size
+        stats['points_on_disk'] = archived
+        stats['points_in_open_blocks'] = open_points
+        stats['disk_mb'] = round(disk_bytes / (1024 * 1024), 2)
+        stats['bytes_per_point'] = round(disk_bytes / archived, 3) if archived else None
+        # Against the 12 bytes/reading (float64 time + float32 value) of the in-memory ring buffers
+        stats['compression_ratio'] = round(archived * 12 / disk_bytes, 2) if archived else None
+        return stats
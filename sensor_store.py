@@ -0,0 +1,473 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+# metric -> (dashboard section, unit); order matches iot_dashboard.html
+SENSOR_METRICS = OrderedDict([
+    ('soil_moisture', ('soil_health', '%')),
+    ('soil_ph', ('soil_health', '')),
+    ('soil_temperature', ('soil_health', '°C')),
+    ('water_ph', ('aquafarm', '')),
+    ('turbidity', ('aquafarm', 'NTU')),
+    ('salinity_ec', ('aquafarm', 'mS/cm')),
+])
+
+
+# Candidate bucket sizes (seconds) for automatic history resolution
+NICE_RESOLUTIONS = (1, 5, 10, 30, 60, 300, 900, 1800, 3600, 10800, 21600, 43200, 86400, 604800)
+
+_DURATION_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400, 'w': 604800, 'y': 365 * 86400}
+
+
+class SensorValidationError(ValueError):
+    """Ingested batch or history query is malformed"""
+
+
+def parse_duration(text):
+    """'90' / '30s' / '5m' / '24h' / '7d' / '1y' -> seconds"""
+    text = str(text).strip().lower()
+    unit = _DURATION_UNITS.get(text[-1:]) if text else None
+    try:
+        seconds = float(text[:-1]) * unit if unit else float(text)
+    except ValueError:
+        raise SensorValidationError(f"bad duration {text!r} (use e.g. 30s, 5m, 24h, 7d)")
+    if not math.isfinite(seconds) or seconds <= 0:
+        raise SensorValidationError(f"duration must be positive, got {text!r}")
+    return seconds
+
+
+def auto_resolution(span, max_points):
+    """Smallest nice bucket size that keeps ``span`` within ``max_points`` buckets"""
+    for res in NICE_RESOLUTIONS:
+        if span / res <= max_points:
+            return res
+    return int(math.ceil(span / max_points))
+
+
+class RingBuffer:
+    """Fixed-capacity (timestamp, value) series; the oldest readings are overwritten.
+
+    Timestamps are float64 epoch seconds, values float32 - 12 bytes per reading.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = max(1, int(capacity))
+        self.times = np.zeros(self.capacity, dtype=np.float64)
+        self.values = np.zeros(self.capacity, dtype=np.float32)
+        self.head = 0  # next write position
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def nbytes(self):
+        return self.times.nbytes + self.values.nbytes
+
+    def extend(self, times, values):
+        """Append readings (already sorted and newer than ``last()``)"""
+        n = len(times)
+        if n >= self.capacity:
+            times, values, n = times[-self.capacity:], values[-self.capacity:], self.capacity
+        first = min(n, self.capacity - self.head)
+        self.times[self.head:self.head + first] = times[:first]
+        self.values[self.head:self.head + first] = values[:first]
+        if first < n:
+            self.times[:n - first] = times[first:]
+            self.values[:n - first] = values[first:]
+        self.head = (self.head + n) % self.capacity
+        self.count = min(self.capacity, self.count + n)
+
+    def last(self):
+        """(timestamp, value) of the newest reading, or None - O(1)"""
+        if self.count == 0:
+            return None
+        i = (self.head - 1) % self.capacity
+        return float(self.times[i]), float(self.values[i])
+
+    def series(self):
+        """Chronological copies of (times, values)"""
+        if self.count < self.capacity:
+            return self.times[:self.count].copy(), self.values[:self.count].copy()
+        return (np.concatenate((self.times[self.head:], self.times[:self.head])),
+                np.concatenate((self.values[self.head:], self.values[:self.head])))
+
+    def covers(self, start):
+        """Whether readings back to ``start`` are still held (nothing overwritten yet, or old enough)"""
+        return self.count < self.capacity or start is None or self.times[self.head] <= start
+
+    def oldest(self):
+        if self.count == 0:
+            return None
+        return float(self.times[self.head if self.count == self.capacity else 0])
+
+    def window(self, start=None, end=None):
+        """Readings with start <= t < end (binary search on the chronological view)"""
+        times, values = self.series()
+        lo = 0 if start is None else int(np.searchsorted(times, start, side='left'))
+        hi = len(times) if end is None else int(np.searchsorted(times, end, side='left'))
+        return times[lo:hi], values[lo:hi]
+
+
+class RollupSeries:
+    """Per-bucket min/max/sum/count/last for one series at a fixed resolution (seconds).
+
+    Kept in a ring of ``capacity`` buckets and updated incrementally on ingest,
+    so it outlives the raw ring buffer: a year of hourly buckets is 8760 rows.
+    """
+
+    COLUMNS = (('start', np.float64), ('min', np.float32), ('max', np.float32),
+               ('sum', np.float64), ('count', np.int64), ('last', np.float32))
+
+    def __init__(self, resolution, capacity):
+        self.resolution = resolution
+        self.capacity = max(1, int(capacity))
+        self.columns = {name: np.zeros(self.capacity, dtype=dtype) for name, dtype in self.COLUMNS}
+        self.head = 0
+        self.count = 0
+
+    @property
+    def nbytes(self):
+        return sum(c.nbytes for c in self.columns.values())
+
+    def add(self, times, values):
+        """Fold sorted readings (newer than anything already added) into the buckets"""
+        buckets = bucketize(np.floor(times / self.resolution) * self.resolution,
+                            values, values, values.astype(np.float64), np.ones(len(values), dtype=np.int64), values)
+        c = self.columns
+        if self.count:
+            newest = (self.head - 1) % self.capacity
+            if buckets['start'][0] == c['start'][newest]:
+                c['min'][newest] = min(c['min'][newest], buckets['min'][0])
+                c['max'][newest] = max(c['max'][newest], buckets['max'][0])
+                c['sum'][newest] += buckets['sum'][0]
+                c['count'][newest] += buckets['count'][0]
+                c['last'][newest] = buckets['last'][0]
+                buckets = {k: v[1:] for k, v in buckets.items()}
+        n = len(buckets['start'])
+        if n == 0:
+            return
+        if n > self.capacity:
+            buckets, n = {k: v[-self.capacity:] for k, v in buckets.items()}, self.capacity
+        first = min(n, self.capacity - self.head)
+        for name, column in c.items():
+            column[self.head:self.head + first] = buckets[name][:first]
+            if first < n:
+                column[:n - first] = buckets[name][first:]
+        self.head = (self.head + n) % self.capacity
+        self.count = min(self.capacity, self.count + n)
+
+    def covers(self, start):
+        """Whether buckets back to ``start`` are still held (nothing evicted yet, or old enough)"""
+        return self.count < self.capacity or start is None or self.columns['start'][self.head] <= start
+
+    def oldest(self):
+        if self.count == 0:
+            return None
+        return float(self.columns['start'][self.head if self.count == self.capacity else 0])
+
+    def window(self, start=None, end=None):
+        """Chronological bucket columns for start <= t < end, including the bucket that contains ``start``"""
+        if self.count < self.capacity:
+            cols = {k: v[:self.count] for k, v in self.columns.items()}
+        else:
+            cols = {k: np.concatenate((v[self.head:], v[:self.head])) for k, v in self.columns.items()}
+        starts = cols['start']
+        if start is not None:
+            start = math.floor(start / self.resolution) * self.resolution
+        lo = 0 if start is None else int(np.searchsorted(starts, start, side='left'))
+        hi = len(starts) if end is None else int(np.searchsorted(starts, end, side='left'))
+        return {k: v[lo:hi].copy() for k, v in cols.items()}
+
+
+def point_columns(times, values):
+    """Raw readings in bucket-column form, one bucket per reading"""
+    return {'start': times, 'min': values, 'max': values, 'sum': values.astype(np.float64),
+            'count': np.ones(len(values), dtype=np.int64), 'last': values}
+
+
+def merge_buckets(parts):
+    """Combine bucket columns (possibly overlapping, e.g. from different archive blocks)"""
+    if not parts:
+        return point_columns(np.zeros(0), np.zeros(0, dtype=np.float32))
+    cols = {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+    order = np.argsort(cols['start'], kind='stable')
+    return bucketize(*(cols[name][order] for name in ('start', 'min', 'max', 'sum', 'count', 'last')))
+
+
+def bucketize(bucket_starts, mins, maxs, sums, counts, lasts):
+    """Vectorised merge of sorted rows into buckets (one reduceat per column)"""
+    if len(bucket_starts) == 0:
+        return {'start': bucket_starts, 'min': mins, 'max': maxs, 'sum': sums, 'count': counts, 'last': lasts}
+    edges = np.flatnonzero(np.r_[True, bucket_starts[1:] != bucket_starts[:-1]])
+    ends = np.r_[edges[1:], len(bucket_starts)] - 1
+    return {
+        'start': bucket_starts[edges],
+        'min': np.minimum.reduceat(mins, edges),
+        'max': np.maximum.reduceat(maxs, edges),
+        'sum': np.add.reduceat(sums, edges),
+        'count': np.add.reduceat(counts, edges),
+        'last': lasts[ends],
+    }
+
+
+class SensorStore:
+    """Per-(device, metric) ring buffers fed by ESP32 batches.
+
+    ``ingest`` takes ``[{"timestamp": ..., "soil_moisture": 41.2, ...}, ...]``;
+    readings older than what a series already holds are dropped (a node that
+    re-sends its buffer after a reconnect does not duplicate data). The newest
+    reading per metric across all devices is kept separately so the dashboard
+    snapshot is O(1) per metric.
+    """
+
+    def __init__(self, capacity=10000, metrics=SENSOR_METRICS, max_batch=5000, rollups=None, archive=None,
+                 max_clock_skew=3600, max_scan_points=1000000):
+        self.capacity = capacity
+        self.metrics = metrics
+        self.max_batch = max_batch
+        self.max_clock_skew = max_clock_skew  # seconds a reading may be ahead of the server clock
+        self.rollups = dict(sorted((rollups or {}).items()))  # resolution seconds -> buckets kept
+        self.archive = archive  # optional SensorArchive: every accepted reading, kept on disk
+        self.max_scan_points = max_scan_points  # archive readings decoded per history query, then sampled
+        self._series = {}  # (device, metric) -> RingBuffer
+        self._rollups = {}  # (device, metric) -> {resolution: RollupSeries}
+        self._first_seen = {}  # (device, metric) -> oldest timestamp ingested by this process
+        self._latest = {}  # metric -> (device, timestamp, value)
+        self._device_seen = {}  # device -> last ingest time
+        self._lock = threading.Lock()
+        self._stats = {'batches': 0, 'accepted': 0, 'stale': 0, 'rejected': 0, 'replicated': 0}
+
+    def ingest(self, device, readings, now=None):
+        """Store a batch from one device.
+
+        Returns (summary, appended) where ``appended`` maps metric -> (times, values)
+        actually written, for anything that reacts to new data.
+        """
+        if not device or not isinstance(device, str):
+            raise SensorValidationError("'device' must be a non-empty string")
+        if not isinstance(readings, list) or not readings:
+            raise SensorValidationError("'readings' must be a non-empty list")
+        if len(readings) > self.max_batch:
+            raise SensorValidationError(f"at most {self.max_batch} readings per batch")
+
+        now = time.time() if now is None else now
+        columns, rejected = {}, {}
+        for reading in readings:
+            if not isinstance(reading, dict):
+                raise SensorValidationError("each reading must be an object")
+            ts = reading.get('timestamp', now)
+            try:
+                ts = float(ts)
+            except (TypeError, ValueError):
+                ts = math.nan
+            if ts > 1e11:  # ESP32 clocks often report milliseconds
+                ts /= 1000.0
+            if not math.isfinite(ts) or ts > now + self.max_clock_skew:
+                # One bad clock reading would poison the series (every later reading looks stale)
+                rejected['timestamp'] = 'non-numeric, non-finite or far-future timestamp'
+                continue
+            for metric, value in reading.items():
+                if metric == 'timestamp':
+                    continue
+                if metric not in self.metrics:
+                    rejected[metric] = 'unknown metric'
+                    continue
+                try:
+                    value = float(value)
+                except (TypeError, ValueError):
+                    value = math.nan
+                if not math.isfinite(value):
+                    rejected[metric] = 'non-numeric value'
+                    continue
+                columns.setdefault(metric, ([], []))
+                columns[metric][0].append(ts)
+                columns[metric][1].append(value)
+
+        with self._lock:
+            accepted, stale, appended = self._append(device, columns)
+            self._device_seen[device] = now
+            self._stats['batches'] += 1
+            self._stats['accepted'] += accepted
+            self._stats['stale'] += stale
+            self._stats['rejected'] += len(rejected)
+        return {'device': device, 'accepted': accepted, 'stale': stale, 'rejected': rejected}, appended
+
+    def replicate(self, device, columns, now=None):
+        """Store readings another worker process already ingested (and archived); returns ``appended``"""
+        columns = {metric: column for metric, column in columns.items() if metric in self.metrics}
+        with self._lock:
+            accepted, _, appended = self._append(device, columns, archive=False)
+            self._device_seen[device] = time.time() if now is None else now
+            self._stats['replicated'] += accepted
+        return appended
+
+    def _append(self, device, columns, archive=True):
+        """Add metric -> (times, values) columns to one device's series; caller holds the lock"""
+        accepted, stale, appended = 0, 0, {}
+        for metric, (times, values) in columns.items():
+            times = np.asarray(times, dtype=np.float64)
+            values = np.asarray(values, dtype=np.float32)
+            order = np.argsort(times, kind='stable')
+            times, values = times[order], values[order]
+
+            buffer = self._series.get((device, metric))
+            if buffer is None:
+                buffer = self._series[(device, metric)] = RingBuffer(self.capacity)
+            last = buffer.last()
+            if last is not None:
+                fresh = times > last[0]
+                stale += int(len(times) - fresh.sum())
+                times, values = times[fresh], values[fresh]
+            if len(times) == 0:
+                continue
+            buffer.extend(times, values)
+            for rollup in self._rollup_series(device, metric).values():
+                rollup.add(times, values)
+            self._first_seen.setdefault((device, metric), float(times[0]))
+            if archive and self.archive is not None:
+                self.archive.append(device, metric, times, values)
+            accepted += len(times)
+            appended[metric] = (times, values)
+
+            current = self._latest.get(metric)
+            if current is None or times[-1] >= current[1]:
+                self._latest[metric] = (device, float(times[-1]), float(values[-1]))
+        return accepted, stale, appended
+
+    def latest(self, metric, device=None):
+        """(device, timestamp, value) of the newest reading, optionally for one device"""
+        if device is None:
+            return self._latest.get(metric)
+        buffer = self._series.get((device, metric))
+        last = buffer.last() if buffer is not None else None
+        return (device,) + last if last is not None else None
+
+    def buffer(self, device, metric):
+        return self._series.get((device, metric))
+
+    def _rollup_series(self, device, metric):
+        series = self._rollups.get((device, metric))
+        if series is None:
+            series = self._rollups[(device, metric)] = {
+                res: RollupSeries(res, buckets) for res, buckets in self.rollups.items()}
+        return series
+
+    def history(self, device, metric, start, end, resolution):
+        """(columns, source, resolution): per-bucket t, min, max, mean, last, count for start <= t < end.
+
+        Served from the raw ring buffer when ``resolution`` is finer than every
+        rollup and the buffer still reaches back to ``start``, else from the
+        finest rollup that does, with the resolution rounded up to a multiple of
+        it - the returned resolution is the one actually used. When nothing in
+        memory reaches back far enough (evicted, or from before a restart), only
+        the older span is read from the archive, folded into buckets block by
+        block and capped at ``max_scan_points`` decoded readings; without an
+        archive the longest-reaching tier answers with what it still has.
+        Buckets are aligned to the resolution, so the first one is the bucket
+        containing ``start``.
+        """
+        resolution = max(1, int(resolution))
+        with self._lock:
+            tier, resolution, archive_until = self._source(device, metric, start, resolution)
+            if start is not None:
+                start = math.floor(start / resolution) * resolution
+            memory_from = start if archive_until is None else archive_until
+            holder = self._tier(device, metric, tier)
+            if holder is None or (end is not None and memory_from is not None and memory_from >= end):
+                cols = merge_buckets([])
+            elif tier == 'raw':
+                cols = point_columns(*holder.window(memory_from, end))
+            else:
+                cols = holder.window(memory_from, end)
+        source = 'raw' if tier == 'raw' else f"rollup_{tier}s"
+        if archive_until is not None:
+            archive_end = archive_until if end is None else min(end, archive_until)
+            archived, fraction = self._archive_buckets(device, metric, start, archive_end, resolution)
+            cols = merge_buckets([archived, cols])
+            source = (f"archive+{source}" if fraction == 1.0
+                      else f"archive(sampled {fraction:.0%})+{source}")
+        return self._bucket_columns(cols, resolution), source, resolution
+
+    def _tier(self, device, metric, tier):
+        if tier == 'raw':
+            return self._series.get((device, metric))
+        return self._rollups.get((device, metric), {}).get(tier)
+
+    def _source(self, device, metric, start, resolution):
+        """(tier, resolution, archive_until): 'raw' or a rollup resolution, the resolution rounded up
+        to a multiple of it, and the time before which readings come from the archive (None: no
+        archive needed). Caller holds the lock."""
+        series = self._rollups.get((device, metric), {})
+        buffer = self._series.get((device, metric))
+        first = self._first_seen.get((device, metric))
+        tiers = (['raw'] if buffer is not None and (not series or resolution < min(series)) else []) + sorted(series)
+        rounded = lambda tier: resolution if tier == 'raw' else -(-resolution // tier) * tier
+        before_memory = start is not None and (first is None or start < first)
+        if not before_memory or self.archive is None:
+            for tier in tiers:
+                if self._tier(device, metric, tier).covers(start):
+                    return tier, rounded(tier), None
+        if self.archive is None:
+            # Nothing in memory reaches back to start: the coarsest tier holds the most
+            tier = max(series) if series else 'raw'
+            return tier, rounded(tier), None
+        # The archive serves the older span, so keep the asked-for resolution where a tier allows it
+        fitting = [tier for tier in tiers if tier == 'raw' or tier <= resolution]
+        tier = fitting[-1] if fitting else (tiers[0] if tiers else 'raw')
+        holder = self._tier(device, metric, tier)
+        held = holder.oldest() if holder is not None else None
+        if held is None or first is None:
+            return tier, rounded(tier), math.inf
+        # Memory serves whole buckets from here on; the archive has every reading before it
+        until = max(held, first)
+        if tier != 'raw':
+            until = math.ceil(until / tier) * tier
+        return tier, rounded(tier), until
+
+    def _archive_buckets(self, device, metric, start, end, resolution):
+        """Archive readings folded into buckets one block at a time, so memory stays O(buckets)"""
+        chunks, fraction = self.archive.chunks(device, metric, start, end, self.max_scan_points)
+        parts = []
+        for times, values in chunks:
+            if len(times):
+                cols = point_columns(np.floor(times / resolution) * resolution, values)
+                parts.append(bucketize(cols['start'], cols['min'], cols['max'], cols['sum'], cols['count'], cols['last']))
+            if len(parts) >= 64:
+                parts = [merge_buckets(parts)]
+        return merge_buckets(parts), fraction
+
+    @staticmethod
+    def _bucket_columns(cols, resolution):
+        buckets = bucketize(np.floor(cols['start'] / resolution) * resolution,
+                            cols['min'], cols['max'], cols['sum'], cols['count'], cols['last'])
+        return {
+            't': buckets['start'].astype(np.int64),
+            'min': buckets['min'],
+            'max': buckets['max'],
+            'mean': (buckets['sum'] / np.maximum(buckets['count'], 1)).astype(np.float32),
+            'last': buckets['last'],
+            'count': buckets['count'],
+        }
+
+    def devices(self):
+        with self._lock:
+            return dict(self._device_seen)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['devices'] = len(self._device_seen)
+            stats['series'] = len(self._series)
+            stats['readings'] = sum(len(b) for b in self._series.values())
+            raw_bytes = sum(b.nbytes for b in self._series.values())
+            rollup_bytes = sum(r.nbytes for series in self._rollups.values() for r in series.values())
+            stats['memory_mb'] = round((raw_bytes + rollup_bytes) / (1024 * 1024), 2)
+        stats['capacity_per_series'] = self.capacity
+        stats['rollups'] = {f"{res}s": buckets for res, buckets in self.rollups.items()}
+        if self.archive is not None:
+            stats['archive'] = self.archive.stats()
+        return stats
@@ -0,0 +1,305 @@
+import contextlib
+import json
+import os
+import socket
+import struct
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+# Peer relay datagram: header length, reading count, JSON [device, crop, metric], float64 times, float32 values
+PEER_HEADER = struct.Struct('<HI')
+MAX_PEER_MESSAGE = 1 << 20
+
+
+def sse_message(event, data, event_id=None):
+    """One Server-Sent Events frame"""
+    lines = [f"event: {event}"]
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append("data: " + json.dumps(data, ensure_ascii=False, separators=(',', ':')))
+    return "\n".join(lines) + "\n\n"
+
+
+def encode_peer_batch(device, crop, metric, times, values):
+    header = json.dumps([device, crop, metric]).encode('utf-8')
+    return (PEER_HEADER.pack(len(header), len(times)) + header
+            + np.asarray(times, dtype='<f8').tobytes() + np.asarray(values, dtype='<f4').tobytes())
+
+
+def decode_peer_batch(message):
+    """(device, crop, metric, times, values) from one relay datagram"""
+    size, n = PEER_HEADER.unpack_from(message)
+    offset = PEER_HEADER.size + size
+    device, crop, metric = json.loads(message[PEER_HEADER.size:offset].decode('utf-8'))
+    if len(message) != offset + 12 * n:
+        raise ValueError("truncated peer batch")
+    times = np.frombuffer(message, dtype='<f8', count=n, offset=offset)
+    values = np.frombuffer(message, dtype='<f4', count=n, offset=offset + 8 * n)
+    return device, crop, metric, times, values
+
+
+class Subscriber:
+    """One dashboard connection: a small bounded queue of encoded frames.
+
+    If the browser (or its network) cannot keep up and the queue fills, pending
+    updates are discarded and the connection is marked for a full resync - a
+    slow client never holds memory or slows the publisher down.
+    """
+
+    def __init__(self, max_pending=32):
+        self.max_pending = max_pending
+        self.pending = deque()
+        self.resync = False
+        self.dropped = 0
+        self.connected_at = time.time()
+        self._ready = threading.Condition()
+
+    def offer(self, frame):
+        with self._ready:
+            if len(self.pending) >= self.max_pending:
+                self.dropped += len(self.pending)
+                self.pending.clear()
+                self.resync = True
+            else:
+                self.pending.append(frame)
+            self._ready.notify()
+
+    def take(self, timeout):
+        """(frames, resync) - empty frames means the heartbeat interval passed"""
+        with self._ready:
+            if not self.pending and not self.resync:
+                self._ready.wait(timeout)
+            frames, resync = list(self.pending), self.resync
+            self.pending.clear()
+            self.resync = False
+        return frames, resync
+
+
+class SensorBroadcaster:
+    """Fans sensor changes out to every SSE subscriber.
+
+    ``publish`` diffs the new entries against what was last broadcast and
+    encodes the changed metrics once; every subscriber gets the same frame.
+    """
+
+    def __init__(self, snapshot, heartbeat=15.0, max_pending=32, max_subscribers=16, refresh=5.0):
+        self.snapshot = snapshot  # () -> full {'soil_health': {...}, 'aquafarm': {...}} dict
+        self.heartbeat = heartbeat
+        self.max_pending = max_pending
+        self.max_subscribers = max_subscribers  # per process: each open stream holds a worker thread
+        self.refresh = refresh  # seconds between snapshot re-publishes while anyone is connected (0 = off)
+        self._subscribers = set()
+        self._last_sent = {}  # metric -> (value, status)
+        self._lock = threading.Lock()
+        self._event_id = 0
+        self._refresh_pid = None
+        self._stats = {'published': 0, 'unchanged': 0, 'frames_sent': 0, 'resyncs': 0, 'rejected': 0}
+
+    def subscribe(self):
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                self._stats['rejected'] += 1
+                return None
+            subscriber = Subscriber(self.max_pending)
+            self._subscribers.add(subscriber)
+            # Started lazily (and per pid) so it survives gunicorn forking a preloaded app
+            if self.refresh and self._refresh_pid != os.getpid():
+                self._refresh_pid = os.getpid()
+                threading.Thread(target=self._refresh_loop, name='sensor-refresh', daemon=True).start()
+        return subscriber
+
+    def _refresh_loop(self):
+        """Re-publish the snapshot: only changed metrics go out, so this is free when nothing moved,
+        but simulated demo readings keep moving between device batches"""
+        while True:
+            time.sleep(self.refresh)
+            if not self._subscribers:
+                continue
+            try:
+                self.publish(self.snapshot())
+            except Exception as e:
+                print(f"⚠️ Sensor snapshot refresh failed: {e}")
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def publish(self, entries):
+        """``entries`` is {section: {metric: entry}}; only changed metrics are sent"""
+        changed = {}
+        with self._lock:
+            for section, metrics in entries.items():
+                for metric, entry in metrics.items():
+                    key = (entry['value'], entry.get('status'))
+                    if self._last_sent.get(metric) == key:
+                        continue
+                    self._last_sent[metric] = key
+                    changed.setdefault(section, {})[metric] = entry
+            if not changed:
+                self._stats['unchanged'] += 1
+                return 0
+            self._event_id += 1
+            frame = sse_message('update', changed, self._event_id)
+            subscribers = list(self._subscribers)
+            self._stats['published'] += 1
+            self._stats['frames_sent'] += len(subscribers)
+        for subscriber in subscribers:
+            subscriber.offer(frame)
+        return len(subscribers)
+
+    def publish_event(self, event, data):
+        """Broadcast a one-off event (e.g. an alert) as-is, encoded once"""
+        with self._lock:
+            self._event_id += 1
+            frame = sse_message(event, data, self._event_id)
+            subscribers = list(self._subscribers)
+            self._stats['published'] += 1
+            self._stats['frames_sent'] += len(subscribers)
+        for subscriber in subscribers:
+            subscriber.offer(frame)
+        return len(subscribers)
+
+    def stream(self, subscriber):
+        """Generator of SSE text for one connection: snapshot, updates, heartbeats"""
+        try:
+            yield "retry: 3000\n\n"
+            yield sse_message('snapshot', self.snapshot(), self._event_id)
+            while True:
+                frames, resync = subscriber.take(self.heartbeat)
+                if resync:
+                    with self._lock:
+                        self._stats['resyncs'] += 1
+                    yield sse_message('snapshot', self.snapshot(), self._event_id)
+                elif frames:
+                    yield ''.join(frames)
+                else:
+                    yield f": heartbeat {int(time.time())}\n\n"
+        finally:
+            self.unsubscribe(subscriber)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['subscribers'] = len(self._subscribers)
+            stats['dropped_frames'] = sum(s.dropped for s in self._subscribers)
+        stats['heartbeat_seconds'] = self.heartbeat
+        return stats
+
+
+class SensorPeers:
+    """Relays ingested batches between the worker processes on one host.
+
+    Each gunicorn worker has its own SensorStore and broadcaster, so a batch
+    that lands on worker A would never reach dashboards connected to worker B.
+    Every process binds a Unix datagram socket in ``directory``; ``send``
+    writes each metric's new readings to every other socket there, and a
+    daemon thread hands what arrives to ``on_batch(device, crop, metric,
+    times, values)``. Sends never block: a peer that is not keeping up just
+    misses the batch (counted as dropped).
+
+    Call ``start`` once per worker process at boot (gunicorn ``post_fork``, or
+    at import without ``preload_app``): a worker that has not bound its socket
+    receives nothing, and its store and alerts drift from the others'.
+    """
+
+    def __init__(self, directory, on_batch):
+        self.directory = directory
+        self.on_batch = on_batch
+        self._pid = None
+        self._path = None
+        self._inbox = None
+        self._outbox = None
+        self._outbox_pid = None
+        self._lock = threading.Lock()
+        self._stats = {'sent': 0, 'received': 0, 'dropped': 0, 'peers': 0}
+
+    def start(self):
+        """Bind this process's socket; a no-op if already bound here, rebinds in a forked child"""
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            os.makedirs(self.directory, mode=0o700, exist_ok=True)
+            path = os.path.join(self.directory, f"{os.getpid()}.sock")
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(path)
+            inbox = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            inbox.bind(path)
+            os.chmod(path, 0o600)
+            self._path, self._inbox = path, inbox
+            self._pid = os.getpid()
+            threading.Thread(target=self._receive, args=(inbox,), name='sensor-peers', daemon=True).start()
+        print(f"✅ Sensor peer relay listening on {path}")
+
+    def stop(self):
+        """Unbind (e.g. in the gunicorn master, which never serves dashboards)"""
+        with self._lock:
+            if self._pid != os.getpid():
+                return
+            with contextlib.suppress(OSError):
+                os.unlink(self._path)
+            with contextlib.suppress(OSError):
+                self._inbox.shutdown(socket.SHUT_RDWR)  # wakes the receive thread
+            self._inbox.close()
+            self._pid, self._path, self._inbox = None, None, None
+
+    def send(self, device, crop, appended):
+        """Forward ``appended`` (metric -> (times, values)) to every other process"""
+        if self._outbox_pid != os.getpid():
+            self._outbox, self._outbox_pid = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM), os.getpid()
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return 0
+        own = self._path if self._pid == os.getpid() else None
+        peers = [os.path.join(self.directory, name) for name in names if name.endswith('.sock')]
+        peers = [peer for peer in peers if peer != own]
+        sent = dropped = 0
+        for metric, (times, values) in appended.items():
+            message = encode_peer_batch(device, crop, metric, times, values)
+            for peer in peers:
+                try:
+                    self._outbox.sendto(message, socket.MSG_DONTWAIT, peer)
+                    sent += 1
+                except (ConnectionRefusedError, FileNotFoundError):
+                    # The worker that bound it has exited
+                    with contextlib.suppress(OSError):
+                        os.unlink(peer)
+                except OSError:
+                    # Peer's queue is full or the batch is too large for one datagram
+                    dropped += 1
+        with self._lock:
+            self._stats['sent'] += sent
+            self._stats['dropped'] += dropped
+            self._stats['peers'] = len(peers)
+        return sent
+
+    def _receive(self, inbox):
+        while True:
+            try:
+                message = inbox.recv(MAX_PEER_MESSAGE)
+            except OSError:
+                return  # stopped
+            if not message:
+                return
+            try:
+                batch = decode_peer_batch(message)
+            except (ValueError, struct.error, UnicodeDecodeError) as e:
+                print(f"⚠️ Ignoring malformed sensor peer message: {e}")
+                continue
+            with self._lock:
+                self._stats['received'] += 1
+            try:
+                self.on_batch(*batch)
+            except Exception as e:
+                print(f"❌ Sensor peer batch failed: {e}")
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats['listening'] = self._pid == os.getpid()
+        return stats
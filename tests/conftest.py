@@ -0,0 +1,15 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope='session')
+def app_module():
+    """The Flask app, imported once without TTS pre-rendering or warm-up"""
+    os.environ.setdefault('TTS_PRERENDER', 'false')
+    os.environ.setdefault('WARMUP_SUBSYSTEMS', '')
+    import app
+    return app
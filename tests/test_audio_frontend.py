@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from audio_frontend import SAMPLE_RATE, VoiceActivityGate, split_at_pauses
+
+rng = np.random.default_rng(0)
+
+
+def tone(seconds, amplitude, freq=220.0):
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    # Syllable-rate amplitude wobble, never dropping to silence
+    envelope = 1.0 - 0.4 * (0.5 + 0.5 * np.sin(2 * np.pi * 4 * t))
+    return (amplitude * envelope * np.sin(2 * np.pi * freq * t)).astype(np.float32)
+
+
+def noise(seconds, level):
+    return (rng.normal(0, level, int(seconds * SAMPLE_RATE))).astype(np.float32)
+
+
+@pytest.mark.parametrize('amplitude', [0.1, 0.3, 0.6])
+def test_continuous_speech_without_pauses_is_accepted(amplitude):
+    audio = tone(4.0, amplitude) + noise(4.0, 0.002)
+    trimmed, info = VoiceActivityGate().check(audio)
+    assert info['rejected'] is None
+    assert trimmed is not None and info['speech_seconds'] > 3.5
+
+
+@pytest.mark.parametrize('audio', [np.zeros(3 * SAMPLE_RATE, dtype=np.float32), noise(3.0, 0.002)])
+def test_silence_and_quiet_noise_are_rejected(audio):
+    trimmed, info = VoiceActivityGate().check(audio)
+    assert trimmed is None and info['rejected'] == 'silent'
+
+
+def test_speech_in_background_noise_is_trimmed_to_the_voiced_part():
+    audio = np.concatenate((noise(2.0, 0.02), tone(1.5, 0.4) + noise(1.5, 0.02), noise(2.0, 0.02)))
+    trimmed, info = VoiceActivityGate(padding_ms=0).check(audio)
+    assert info['rejected'] is None
+    assert 1.3 <= len(trimmed) / SAMPLE_RATE <= 1.7
+
+
+def test_too_short_clip_is_rejected_before_any_work():
+    _, info = VoiceActivityGate().check(tone(0.1, 0.5))
+    assert info['rejected'] == 'too_short'
+
+
+def test_split_at_pauses_cuts_in_the_gap_nearest_the_target():
+    audio = np.concatenate((tone(7.0, 0.4), np.zeros(SAMPLE_RATE // 2, dtype=np.float32), tone(6.0, 0.4)))
+    bounds = split_at_pauses(audio, 8.0)
+    assert bounds[0][0] == 0 and bounds[-1][1] == len(audio)
+    cut = bounds[0][1] / SAMPLE_RATE
+    assert 7.0 <= cut <= 7.5
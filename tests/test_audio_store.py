@@ -0,0 +1,48 @@
+import os
+import time
+
+from audio_store import AudioStore
+
+
+def put(store, key, size, tmp_path):
+    src = tmp_path / f'src-{key}'
+    src.write_bytes(b'x' * size)
+    return store.put(key, str(src), '.wav')
+
+
+def key(n):
+    return f'{n:040x}'
+
+
+def test_workers_see_each_others_files(tmp_path):
+    # Two stores over one directory stand in for two gunicorn workers
+    root = str(tmp_path / 'audio')
+    a, b = AudioStore(root), AudioStore(root)
+    path = put(a, key(1), 10, tmp_path)
+    assert b.get(key(1)) == path
+    assert b.lookup(os.path.basename(path))[2] == key(1)
+    assert b.get(key(2)) is None
+
+
+def test_size_cap_counts_every_workers_files(tmp_path):
+    root = str(tmp_path / 'audio')
+    workers = [AudioStore(root, max_bytes=250) for _ in range(3)]
+    for n in range(9):
+        put(workers[n % 3], key(n), 100, tmp_path)
+    files = [name for name in os.listdir(root) if name.endswith('.wav')]
+    assert sum(os.path.getsize(os.path.join(root, name)) for name in files) <= 250
+    assert sorted(files) == [key(7) + '.wav', key(8) + '.wav']
+
+
+def test_gc_keeps_files_another_worker_used(tmp_path):
+    root = str(tmp_path / 'audio')
+    a, b = AudioStore(root, ttl=60), AudioStore(root, ttl=60)
+    used, idle = put(a, key(1), 10, tmp_path), put(a, key(2), 10, tmp_path)
+    old = time.time() - 120
+    for path in (used, idle):
+        os.utime(path, (old, old))
+    assert a.get(key(1)) == used  # a use refreshes the mtime b's GC goes by
+    assert b.gc() == 1
+    assert os.path.exists(used) and not os.path.exists(idle)
+    assert a.get(key(2)) is None
+    assert a.stats()['files'] == 1
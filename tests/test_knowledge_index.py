@@ -0,0 +1,40 @@
+import numpy as np
+
+from embeddings import HashingEmbedder
+from knowledge_index import KnowledgeIndex, Passage, disease_passages
+
+DOSAGE_QUESTION = "How much fungicide dosage per liter should I spray for late blight on my tomato?"
+
+
+def test_detected_disease_passages_come_first_and_other_diseases_are_excluded(app_module):
+    index = KnowledgeIndex(disease_passages(app_module.disease_info), HashingEmbedder())
+    hits = index.search(DOSAGE_QUESTION, k=4, disease='Tomato__Late_blight')
+
+    assert [p.disease for p, _ in hits] == ['Tomato__Late_blight'] * 4
+    treatment = next(p.text for p, _ in hits if p.id.endswith('#treatment'))
+    assert 'Metalaxyl + Mancozeb' in treatment
+    assert not any('Azoxystrobin' in p.text for p, _ in hits)
+
+
+def test_rest_is_filled_from_general_notes_only():
+    passages = [
+        Passage('a#treatment', 'disease_info', 'Tomato__Late_blight', 'late blight metalaxyl 2.5g per liter'),
+        Passage('b#treatment', 'disease_info', 'Tomato__Early_blight', 'early blight azoxystrobin 1ml per liter'),
+        Passage('notes#0', 'notes.md', '', 'spray fungicide in the early morning, per liter of water'),
+        Passage('notes#1', 'notes.md', '', 'drip irrigation schedule'),
+    ]
+    index = KnowledgeIndex(passages, HashingEmbedder())
+    hits = [p.id for p, _ in index.search('fungicide per liter', k=3, disease='Tomato Late blight')]
+    assert hits[0] == 'a#treatment'
+    assert 'b#treatment' not in hits
+    assert set(hits[1:]) == {'notes#0', 'notes#1'}
+
+
+def test_without_disease_searches_whole_corpus():
+    passages = [Passage(f"p{i}", 'notes.md', '', text) for i, text in
+                enumerate(['soil ph and lime', 'late blight fungicide', 'aphid control neem oil'])]
+    index = KnowledgeIndex(passages, HashingEmbedder())
+    hits = index.search('blight fungicide', k=2)
+    assert hits[0][0].id == 'p1'
+    assert len(hits) == 2 and hits[0][1] >= hits[1][1]
+    assert np.isfinite([s for _, s in hits]).all()
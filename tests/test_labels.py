@@ -0,0 +1,53 @@
+import pytest
+
+from labels import FAILED, RELOADED, UNCHANGED, LabelIndex, LabelIndexError, build_label_table, label_key
+
+DISEASES = {'Apple__Apple_scab': {'pesticide': 'Captan'}, 'Tomato__Late_blight': {'pesticide': 'Metalaxyl'},
+            'Tomato__healthy': {'pesticide': 'None'}}
+
+
+def write(path, mapping):
+    path.write_text(repr(mapping), encoding='utf-8')
+
+
+@pytest.fixture
+def index(tmp_path):
+    path = tmp_path / 'class_indices.txt'
+    write(path, {'Apple___Apple_scab': 0, 'Tomato___Late_blight': 1})
+    reloaded = []
+    index = LabelIndex(str(path), list(DISEASES), DISEASES.get, on_reload=reloaded.append)
+    index.reloaded = reloaded
+    return index
+
+
+def test_naming_schemes_line_up(index):
+    assert label_key('Apple___Apple_scab') == label_key('Apple__Apple_scab')
+    assert len(index.table) == 2
+
+
+def test_reload_outcomes(index, tmp_path):
+    path = tmp_path / 'class_indices.txt'
+    assert index.reload() == UNCHANGED
+    assert index.reloaded == [] and index.version == 1
+
+    write(path, {'Apple___Apple_scab': 0, 'Tomato___Late_blight': 1, 'Tomato___healthy': 2})
+    assert index.reload() == RELOADED
+    assert index.version == 2 and len(index.reloaded) == 1 and len(index.table) == 3
+
+    write(path, {'Apple___Apple_scab': 0, 'Banana___Panama': 1})
+    assert index.reload() == FAILED
+    assert 'Banana___Panama' in index.last_error
+    assert index.version == 2 and len(index.table) == 3  # previous table kept
+
+
+def test_unknown_or_non_contiguous_labels_fail_fast(tmp_path):
+    path = tmp_path / 'class_indices.txt'
+    write(path, {'Apple___Apple_scab': 0, 'Tomato___Late_blight': 2})
+    with pytest.raises(LabelIndexError):
+        build_label_table(str(path), list(DISEASES), DISEASES.get)
+
+
+def test_reload_endpoint_answers_200_when_unchanged(app_module):
+    response = app_module.app.test_client().post('/api/labels/reload')
+    assert response.status_code == 200
+    assert response.get_json()['reloaded'] is False
@@ -0,0 +1,51 @@
+import os
+
+import pytest
+
+from llm_health import CircuitBreaker, LLMHealthMonitor
+
+
+class NoEndpoints:
+    def endpoints(self):
+        return []
+
+
+def test_breaker_opens_after_threshold_and_recovers():
+    breaker = CircuitBreaker('test', 2, 0.0)
+    breaker.record_failure(RuntimeError('down'))
+    assert breaker.state == 'closed'
+    breaker.record_failure(RuntimeError('down'))
+    assert breaker.state == 'open'
+    assert breaker.allow()  # cool-down of 0 s: half-open trial
+    breaker.record_success()
+    assert breaker.state == 'closed'
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='needs fork')
+def test_monitor_restarts_its_thread_in_a_forked_worker():
+    monitor = LLMHealthMonitor(NoEndpoints(), interval=0.05)
+    parent_thread = monitor.start()
+    assert monitor.start() is parent_thread
+    pid = os.fork()
+    if pid == 0:
+        code = 1
+        try:
+            thread = monitor.start()
+            code = 0 if thread is not parent_thread and thread.is_alive() else 1
+        finally:
+            os._exit(code)
+    assert os.waitpid(pid, 0)[1] == 0
+    monitor.stop()
+
+
+def test_client_errors_do_not_open_the_breaker():
+    import requests
+
+    from llm_client import LLMEndpoint, LLMStatusError
+    endpoint = LLMEndpoint('http://llm', 1, 1, 1, CircuitBreaker('llm', 2, 60))
+    for _ in range(5):
+        endpoint.record('requests', 1.0, True, LLMStatusError(404))
+    assert endpoint.breaker.state == 'closed'
+    endpoint.record('requests', 1.0, True, LLMStatusError(503))
+    endpoint.record('requests', 1.0, True, requests.exceptions.ConnectTimeout())
+    assert endpoint.breaker.state == 'open'
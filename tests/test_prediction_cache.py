@@ -0,0 +1,42 @@
+import numpy as np
+
+from prediction_cache import PredictionCache
+
+PROBS = np.array([0.1, 0.7, 0.2], dtype=np.float32)
+
+
+def image(seed):
+    return np.random.default_rng(seed).random((1, 32, 32, 3), dtype=np.float32)
+
+
+def test_key_covers_pixels_and_namespace():
+    a, b = PredictionCache(namespace='model.h5@aaa'), PredictionCache(namespace='model.h5@bbb')
+    pixels = image(0)
+    assert a.fingerprint(pixels) == a.fingerprint(pixels.copy())
+    assert a.fingerprint(pixels) != a.fingerprint(image(1))
+    assert a.fingerprint(pixels)[0] != b.fingerprint(pixels)[0]
+
+
+def test_new_namespace_never_serves_old_entries(tmp_path):
+    path = str(tmp_path / 'predictions.sqlite')
+    cache = PredictionCache(disk_path=path, namespace='model.h5@aaa')
+    pixels = image(0)
+    cache.put(cache.fingerprint(pixels), PROBS)
+
+    cache.clear(namespace='model.h5@bbb', disk=False)
+    assert cache.get(cache.fingerprint(pixels)) is None
+
+    # Another worker still on the old label mapping restores its own entries only
+    old = PredictionCache(disk_path=path, namespace='model.h5@aaa')
+    np.testing.assert_array_equal(old.get(old.fingerprint(pixels)), PROBS)
+    assert PredictionCache(disk_path=path, namespace='model.h5@bbb').stats()['entries'] == 0
+
+
+def test_near_duplicates_share_an_entry():
+    cache = PredictionCache(phash_max_distance=4)
+    pixels = image(0)
+    cache.put(cache.fingerprint(pixels), PROBS)
+    recompressed = np.clip(pixels + 0.001, 0, 1)
+    assert cache.fingerprint(recompressed)[0] != cache.fingerprint(pixels)[0]
+    np.testing.assert_array_equal(cache.get(cache.fingerprint(recompressed)), PROBS)
+    assert cache.stats()['near_hits'] == 1
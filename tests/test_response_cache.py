@@ -0,0 +1,34 @@
+from embeddings import HashingEmbedder
+from response_cache import ResponseCache, context_key
+
+BLIGHT = {'disease_name': 'Tomato Late blight', 'pesticide': 'Metalaxyl', 'treatment': 'Remove leaves', 'cost': '300'}
+SCAB = dict(BLIGHT, disease_name='Apple scab', pesticide='Captan')
+
+
+def test_context_key_ignores_unrelated_fields():
+    assert context_key(BLIGHT) == context_key(dict(BLIGHT, confidence=0.93, image='x.jpg'))
+    assert context_key(BLIGHT) == context_key({k: f' {v} ' for k, v in BLIGHT.items()})
+    assert context_key(BLIGHT) != context_key(SCAB)
+    assert context_key(None) == context_key({})
+
+
+def test_exact_hits_are_per_context_and_normalised_question():
+    cache = ResponseCache()
+    cache.put(BLIGHT, 'How much Metalaxyl per litre?', 'Two grams per litre.')
+    assert cache.get(BLIGHT, '  how much metalaxyl, per LITRE ') == ('Two grams per litre.', {'match': 'exact'})
+    assert cache.get(SCAB, 'How much Metalaxyl per litre?') is None
+
+
+def test_namespace_separates_models(tmp_path):
+    path = str(tmp_path / 'chat.sqlite')
+    ResponseCache(disk_path=path, namespace='llama3@rag').put(BLIGHT, 'When to spray?', 'At dusk.')
+    assert ResponseCache(disk_path=path, namespace='llama3@rag').get(BLIGHT, 'When to spray?')[0] == 'At dusk.'
+    assert ResponseCache(disk_path=path, namespace='mistral@rag').get(BLIGHT, 'When to spray?') is None
+
+
+def test_similar_questions_only_match_within_a_context():
+    cache = ResponseCache(embed=HashingEmbedder(), similarity=0.6)
+    cache.put(BLIGHT, 'dosage of metalaxyl', 'Two grams per litre.')
+    answer, info = cache.get(BLIGHT, 'metalaxyl dosage')
+    assert answer == 'Two grams per litre.' and info['match'] == 'similar'
+    assert cache.get(SCAB, 'metalaxyl dosage') is None
@@ -0,0 +1,37 @@
+import pytest
+
+
+@pytest.fixture
+def client(app_module):
+    client = app_module.app.test_client()
+    client.post('/api/sensor-data/ingest', json={'device': 'api-test', 'readings': [{'soil_ph': 6.5}]})
+    return client
+
+
+@pytest.mark.parametrize('query', ['end=inf', 'end=nan', 'start=nan', 'start=-inf', 'start=abc',
+                                   'range=0', 'range=inf', 'start=10&end=5'])
+def test_history_rejects_bad_ranges_cleanly(client, query):
+    response = client.get(f"/api/sensor-history?metric=soil_ph&device=api-test&{query}")
+    assert response.status_code == 400
+    assert 'convert' not in response.get_json()['error']
+
+
+def test_history_reports_the_resolution_used(client):
+    response = client.get('/api/sensor-history?metric=soil_ph&device=api-test&range=1h&resolution=7m')
+    body = response.get_json()
+    assert response.status_code == 200
+    assert body['resolution'] % 60 == 0 and body['resolution'] >= 420
+
+
+@pytest.mark.parametrize('body', ['[1, 2]', '"text"', '3'])
+def test_ingest_rejects_non_object_bodies(client, body):
+    response = client.post('/api/sensor-data/ingest', data=body, content_type='application/json')
+    assert response.status_code == 400
+
+
+def test_ingest_reports_bad_timestamps(client):
+    response = client.post('/api/sensor-data/ingest', data='{"device": "api-test", "readings": '
+                           '[{"timestamp": NaN, "soil_ph": 6.1}]}', content_type='application/json')
+    assert response.status_code == 200
+    assert 'timestamp' in response.get_json()['rejected']
+    assert client.get('/api/sensor-data').status_code == 200
@@ -0,0 +1,90 @@
+import os
+
+import numpy as np
+import pytest
+
+from sensor_archive import SensorArchive, decode_block, encode_block
+
+START = 1.7e9
+
+
+def series(n, seed=0):
+    rng = np.random.default_rng(seed)
+    times = START + np.arange(n) + rng.integers(-5, 6, n) / 1000.0
+    values = (6.5 + np.cumsum(rng.normal(0, 0.01, n))).astype(np.float32)
+    return times, values
+
+
+def test_block_round_trip_is_exact():
+    times, values = series(2000)
+    ts = np.round(times * 1000).astype(np.int64)
+    block, n = encode_block(7, ts, values.view(np.uint32), 4096)
+    assert len(block) == 4096 and 0 < n <= 2000
+    decoded_ts, decoded_values = decode_block(block)
+    assert np.array_equal(decoded_ts, ts[:n])
+    assert np.array_equal(decoded_values.view(np.uint32), values[:n].view(np.uint32))
+
+
+def test_archive_round_trip_survives_reopen(tmp_path):
+    times, values = series(20000)
+    archive = SensorArchive(str(tmp_path), block_size=1024)
+    for i in range(0, len(times), 60):
+        archive.append('esp32-01', 'soil_ph', times[i:i + 60], values[i:i + 60])
+    archive.close()
+
+    reopened = SensorArchive(str(tmp_path))
+    got_times, got_values = reopened.scan('esp32-01', 'soil_ph')
+    assert np.allclose(got_times, np.round(times * 1000) / 1000)
+    assert np.array_equal(got_values, values)
+    lo, hi = START + 5000, START + 6000
+    window_times, _ = reopened.scan('esp32-01', 'soil_ph', lo, hi)
+    assert len(window_times) == 1000 and window_times.min() >= lo and window_times.max() < hi
+    assert reopened.stats()['compression_ratio'] > 2
+    reopened.close()
+
+
+def test_point_cap_samples_blocks(tmp_path):
+    times, values = series(20000)
+    archive = SensorArchive(str(tmp_path), block_size=512)
+    archive.append('d', 'soil_ph', times, values)
+    archive.flush()
+    chunks, fraction = archive.chunks('d', 'soil_ph', max_points=5000)
+    decoded = sum(len(t) for t, _ in chunks)
+    assert fraction < 1 and decoded < 10000
+    archive.close()
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='needs fork')
+def test_concurrent_appends_from_several_processes(tmp_path):
+    root = str(tmp_path)
+    workers = 4
+    pids = []
+    for w in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                archive = SensorArchive(root, block_size=512)
+                for i in range(200):
+                    # The shared series interleaves in time across processes
+                    t = START + i * 40 + w * 10 + np.arange(10)
+                    archive.append('shared', 'soil_ph', t, np.full(10, w, dtype=np.float32))
+                    archive.append(f"dev{w}", 'turbidity', t, np.full(10, w, dtype=np.float32))
+                    if i % 25 == 0:
+                        archive.flush()
+                        archive.scan('shared', 'soil_ph')
+                archive.close()
+            finally:
+                os._exit(0)
+        pids.append(pid)
+    for pid in pids:
+        assert os.waitpid(pid, 0)[1] == 0
+
+    archive = SensorArchive(root)
+    times, _ = archive.scan('shared', 'soil_ph')
+    assert len(times) == workers * 2000
+    assert np.all(np.diff(times) > 0)
+    for w in range(workers):
+        _, values = archive.scan(f"dev{w}", 'turbidity')
+        assert len(values) == 2000 and np.all(values == w)
+    assert archive.stats()['series'] == workers + 1
+    archive.close()
@@ -0,0 +1,99 @@
+import math
+
+import numpy as np
+import pytest
+
+from sensor_store import SensorStore, SensorValidationError
+
+NOW = 1.8e9
+
+
+def test_ingest_accepts_seconds_and_milliseconds():
+    store = SensorStore()
+    summary, appended = store.ingest('esp32-01', [{'timestamp': NOW - 2, 'soil_ph': 6.4},
+                                                  {'timestamp': (NOW - 1) * 1000, 'soil_ph': 6.5}], now=NOW)
+    assert summary['accepted'] == 2 and summary['rejected'] == {}
+    assert appended['soil_ph'][0].tolist() == [NOW - 2, NOW - 1]
+    assert store.latest('soil_ph') == ('esp32-01', NOW - 1, pytest.approx(6.5))
+
+
+@pytest.mark.parametrize('timestamp', ['nan', math.nan, math.inf, -math.inf, 'soon', NOW + 86400])
+def test_bad_timestamps_are_rejected_per_reading(timestamp):
+    store = SensorStore()
+    summary, _ = store.ingest('esp32-01', [{'timestamp': timestamp, 'soil_ph': 6.0},
+                                           {'timestamp': NOW, 'soil_ph': 6.2}], now=NOW)
+    assert summary['accepted'] == 1
+    assert 'timestamp' in summary['rejected']
+    # The series is not poisoned: later readings are still fresh
+    summary, _ = store.ingest('esp32-01', [{'timestamp': NOW + 1, 'soil_ph': 6.3}], now=NOW + 1)
+    assert summary['accepted'] == 1 and summary['stale'] == 0
+    assert store.latest('soil_ph')[1] == NOW + 1
+
+
+def test_bad_values_and_unknown_metrics_are_reported():
+    store = SensorStore()
+    summary, _ = store.ingest('esp32-01', [{'timestamp': NOW, 'soil_ph': 'x', 'turbidity': math.inf,
+                                            'humidity': 40, 'soil_moisture': 41}], now=NOW)
+    assert summary['accepted'] == 1
+    assert summary['rejected'] == {'soil_ph': 'non-numeric value', 'turbidity': 'non-numeric value',
+                                   'humidity': 'unknown metric'}
+
+
+@pytest.mark.parametrize('device, readings', [(None, [{}]), ('', [{}]), ('d', []), ('d', {}), ('d', [1])])
+def test_malformed_batches_raise(device, readings):
+    with pytest.raises(SensorValidationError):
+        SensorStore().ingest(device, readings, now=NOW)
+
+
+def test_resent_readings_are_stale_not_duplicated():
+    store = SensorStore()
+    readings = [{'timestamp': NOW + i, 'soil_ph': 6.0} for i in range(5)]
+    store.ingest('d', readings, now=NOW + 5)
+    summary, appended = store.ingest('d', readings + [{'timestamp': NOW + 5, 'soil_ph': 6.1}], now=NOW + 6)
+    assert (summary['accepted'], summary['stale']) == (1, 5)
+    assert len(store.buffer('d', 'soil_ph')) == 6
+    assert np.array_equal(appended['soil_ph'][0], [NOW + 5])
+
+
+ROLLUPS = {60: 2 * 1440, 3600: 90 * 24, 86400: 2 * 365}
+
+
+def fill(store, start, end, step):
+    times = np.arange(start, end, step)
+    for i in range(0, len(times), 5000):
+        store.ingest('d', [{'timestamp': t, 'soil_ph': 6.0} for t in times[i:i + 5000]], now=end)
+    return len(times)
+
+
+@pytest.mark.parametrize('span, resolution, source, used', [
+    (3600, 5, 'raw', 5),
+    (86400, 300, 'rollup_60s', 300),
+    (30 * 86400, 3600, 'rollup_3600s', 3600),
+    (365 * 86400, 43200, 'rollup_86400s', 86400),
+])
+def test_history_uses_finest_tier_covering_start(span, resolution, source, used):
+    store = SensorStore(capacity=10000, rollups=ROLLUPS)
+    fill(store, NOW - 400 * 86400, NOW, 600.0)
+    store.ingest('d', [{'timestamp': NOW + i, 'soil_ph': 6.0} for i in range(1, 3601)], now=NOW + 3600)
+    end = NOW + 3600
+    cols, got_source, got_resolution = store.history('d', 'soil_ph', end - span, end, resolution)
+    assert (got_source, got_resolution) == (source, used)
+    # The first bucket is the one containing start
+    assert cols['t'][0] <= end - span < cols['t'][0] + used
+
+
+def test_history_reads_only_the_uncovered_span_from_the_archive(tmp_path):
+    from sensor_archive import SensorArchive
+    archive = SensorArchive(str(tmp_path))
+    before = SensorStore(rollups=ROLLUPS, archive=archive)
+    archived = fill(before, NOW - 10 * 86400, NOW - 86400, 60.0)
+    archive.flush()
+
+    # After a restart memory only holds the last day
+    after = SensorStore(rollups=ROLLUPS, archive=archive)
+    recent = fill(after, NOW - 86400, NOW, 60.0)
+    cols, source, resolution = after.history('d', 'soil_ph', NOW - 10 * 86400, NOW, 3600)
+    assert source == 'archive+rollup_3600s' and resolution == 3600
+    assert int(cols['count'].sum()) == archived + recent
+    assert np.all(np.diff(cols['t']) == 3600)
+    archive.close()
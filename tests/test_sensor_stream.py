@@ -0,0 +1,67 @@
+import os
+
+import numpy as np
+import pytest
+
+from sensor_stream import SensorBroadcaster, SensorPeers, Subscriber, decode_peer_batch, encode_peer_batch
+
+
+def entry(value, status='optimal'):
+    return {'value': value, 'unit': '', 'status': status, 'timestamp': 0}
+
+
+def test_publish_sends_only_changed_metrics():
+    broadcaster = SensorBroadcaster(lambda: {}, refresh=0)
+    subscriber = broadcaster.subscribe()
+    assert broadcaster.publish({'soil_health': {'soil_ph': entry(6.5), 'soil_moisture': entry(40)}}) == 1
+    assert broadcaster.publish({'soil_health': {'soil_ph': entry(6.5)}}) == 0
+    broadcaster.publish({'soil_health': {'soil_ph': entry(6.6), 'soil_moisture': entry(40)}})
+    frames, resync = subscriber.take(0)
+    assert not resync and len(frames) == 2
+    assert 'soil_moisture' not in frames[1]
+
+
+def test_slow_subscriber_is_resynced_instead_of_buffering():
+    subscriber = Subscriber(max_pending=3)
+    for i in range(5):
+        subscriber.offer(f"frame {i}")
+    frames, resync = subscriber.take(0)
+    assert resync and subscriber.dropped == 3
+    assert len(frames) <= 3
+
+
+def test_subscriber_cap_per_process():
+    broadcaster = SensorBroadcaster(lambda: {}, max_subscribers=2, refresh=0)
+    assert broadcaster.subscribe() and broadcaster.subscribe()
+    assert broadcaster.subscribe() is None
+    assert broadcaster.stats()['rejected'] == 1
+
+
+def test_peer_message_round_trip():
+    times, values = np.array([1.7e9, 1.7e9 + 1.5]), np.array([6.5, 6.25], dtype=np.float32)
+    device, crop, metric, t, v = decode_peer_batch(encode_peer_batch('esp32-01', 'tomato', 'soil_ph', times, values))
+    assert (device, crop, metric) == ('esp32-01', 'tomato', 'soil_ph')
+    assert np.array_equal(t, times) and np.array_equal(v, values)
+    with pytest.raises(ValueError):
+        decode_peer_batch(encode_peer_batch('d', None, 'soil_ph', times, values)[:-4])
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='needs fork')
+def test_batches_reach_a_worker_bound_at_boot(tmp_path):
+    received = []
+    peers = SensorPeers(str(tmp_path), lambda *batch: received.append(batch))
+    ready_r, ready_w = os.pipe()
+    done_r, done_w = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        try:
+            peers.start()  # what post_fork does
+            os.write(ready_w, b'1')
+            os.read(done_r, 1)
+        finally:
+            os._exit(0)
+    os.read(ready_r, 1)
+    assert peers.send('d', None, {'soil_ph': (np.array([1.0]), np.array([6.0], dtype=np.float32))}) == 1
+    assert peers.stats()['listening'] is False  # sending never binds
+    os.write(done_w, b'1')
+    os.waitpid(pid, 0)
@@ -0,0 +1,32 @@
+from audio_store import AudioStore
+from tts_service import TTSService
+
+
+def service(tmp_path, loads):
+    def get_modules():
+        loads.append(1)
+        return None
+    return TTSService(get_modules, AudioStore(str(tmp_path)))
+
+
+def test_prerender_runs_in_one_process_only(tmp_path):
+    loads = []
+    tts = service(tmp_path, loads)
+    # Another worker holds the store lock (flock conflicts across descriptors, even in one process)
+    with tts.store.exclusive('prerender') as held:
+        assert held
+        tts.prerender(['Namaste'], background=False)
+    assert loads == []
+
+    tts.prerender(['Namaste'], background=False)
+    assert loads == [1]
+
+
+def test_prerender_skips_engines_when_phrases_are_stored(tmp_path):
+    loads = []
+    tts = service(tmp_path, loads)
+    src = tmp_path / 'clip.wav'
+    src.write_bytes(b'RIFF')
+    tts.store.put(tts.cache_key('Namaste', 'english'), str(src), '.wav')
+    tts.prerender(['Namaste'], background=False)
+    assert loads == []
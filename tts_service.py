@@ -0,0 +1,184 @@
+import hashlib
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+
+class TTSService:
+    """Text-to-speech with long-lived engines and a size-bounded phrase cache.
+
+    ``get_modules`` returns ``{'pyttsx3': module, 'gTTS': class}`` (lazily
+    imported). English goes through a pool of pyttsx3 engines, each owned by one
+    worker thread because pyttsx3 engines are not thread-safe; Tamil goes through
+    gTTS. Audio is cached in an ``AudioStore`` keyed by (text, language, voice),
+    which handles size/TTL eviction. Identical requests that arrive while a
+    phrase is being synthesised share one render.
+    """
+
+    def __init__(self, get_modules, store, engines=1, voice=None, rate=150, volume=0.8):
+        self.get_modules = get_modules
+        self.store = store
+        self.engines = max(1, int(engines))
+        self.voice = voice
+        self.rate = rate
+        self.volume = volume
+        self._queue = queue.Queue()
+        self._threads = []
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._metrics = {
+            'hits': 0,
+            'misses': 0,
+            'coalesced': 0,
+            'errors': 0,
+            'synth_ms_total': 0.0,
+        }
+
+    def _engine_for(self, language):
+        return 'gtts' if language in ('tamil', 'tanglish') else 'pyttsx3'
+
+    def cache_key(self, text, language):
+        engine = self._engine_for(language)
+        voice = f"{self.voice}:{self.rate}:{self.volume}" if engine == 'pyttsx3' else 'ta'
+        return hashlib.sha1(f"{engine}\0{voice}\0{text.strip()}".encode('utf-8')).hexdigest()
+
+    def synthesize(self, text, language='english'):
+        """Path to an audio file speaking ``text``, or None if synthesis failed"""
+        text = (text or '').strip()
+        if not text:
+            return None
+        key = self.cache_key(text, language)
+
+        path = self.store.get(key)
+        with self._lock:
+            if path:
+                self._metrics['hits'] += 1
+                return path
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+                self._metrics['misses'] += 1
+            else:
+                self._metrics['coalesced'] += 1
+
+        if not owner:
+            return future.result()
+
+        path = None
+        try:
+            path = self._render(key, text, language)
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            future.set_result(path)
+        return path
+
+    def _render(self, key, text, language):
+        engine = self._engine_for(language)
+        ext = '.mp3' if engine == 'gtts' else '.wav'
+        tmp_path = self.store.temp_path(key, ext)
+        started = time.perf_counter()
+        try:
+            if engine == 'gtts':
+                # gTTS objects are bound to one text, so there is nothing to reuse between calls
+                self.get_modules()['gTTS'](text=text, lang='ta', slow=False).save(tmp_path)
+            else:
+                self._run_on_engine(text, tmp_path)
+            final_path = self.store.put(key, tmp_path, ext)
+        except Exception as e:
+            print(f"TTS Error: {e}")
+            with self._lock:
+                self._metrics['errors'] += 1
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            return None
+
+        with self._lock:
+            self._metrics['synth_ms_total'] += (time.perf_counter() - started) * 1000.0
+        return final_path
+
+    def _run_on_engine(self, text, path):
+        self._ensure_engines()
+        future = Future()
+        self._queue.put((text, path, future))
+        future.result()
+
+    def _ensure_engines(self):
+        if len(self._threads) == self.engines:
+            return
+        with self._lock:
+            while len(self._threads) < self.engines:
+                thread = threading.Thread(target=self._engine_loop, name=f'tts-engine-{len(self._threads)}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _engine_loop(self):
+        engine, error = None, None
+        try:
+            # Engine() rather than init(): init() hands every caller the same cached instance
+            engine = self.get_modules()['pyttsx3'].Engine()
+            engine.setProperty('rate', self.rate)
+            engine.setProperty('volume', self.volume)
+            if self.voice:
+                engine.setProperty('voice', self.voice)
+        except Exception as e:
+            print(f"❌ TTS engine failed to start: {e}")
+            error = e
+        while True:
+            text, path, future = self._queue.get()
+            if error is not None:
+                future.set_exception(error)
+                continue
+            try:
+                engine.save_to_file(text, path)
+                engine.runAndWait()
+                future.set_result(path)
+            except Exception as e:
+                future.set_exception(e)
+
+    def prerender(self, phrases, language='english', background=True):
+        """Synthesise fixed phrases ahead of time so they are served from cache"""
+        phrases = list(OrderedDict.fromkeys(p.strip() for p in phrases if p and p.strip()))
+
+        def run():
+            # Every worker imports the app; the store lock lets one of them render and the rest skip
+            with self.store.exclusive('prerender') as held:
+                if not held:
+                    return
+                # Phrases already in the store need no engine: only import pyttsx3/gTTS if something is missing
+                missing = [p for p in phrases if not self.store.get(self.cache_key(p, language))]
+                if not missing:
+                    return
+                if self.get_modules() is None:
+                    print("⚠️ TTS engines not available - skipping phrase pre-rendering")
+                    return
+                started = time.perf_counter()
+                rendered = sum(1 for p in missing if self.synthesize(p, language))
+                print(f"✅ Pre-rendered {rendered}/{len(missing)} missing TTS phrases in {time.perf_counter() - started:.1f}s")
+
+        if not phrases:
+            return None
+        if background:
+            thread = threading.Thread(target=run, name='tts-prerender', daemon=True)
+            thread.start()
+            return thread
+        run()
+        return None
+
+    def metrics(self):
+        with self._lock:
+            m = dict(self._metrics)
+            m['inflight'] = len(self._inflight)
+        lookups = m['hits'] + m['misses']
+        m['hit_rate'] = round(m['hits'] / lookups, 4) if lookups else 0.0
+        rendered = m['misses'] - m['errors']
+        m['avg_synth_ms'] = round(m['synth_ms_total'] / rendered, 2) if rendered > 0 else 0.0
+        m['synth_ms_total'] = round(m['synth_ms_total'], 2)
+        m['config'] = {'engines': self.engines, 'voice': self.voice}
+        return m